@@ -0,0 +1,82 @@
+"""
+Per-map best runs for the maps table: each map's world record plus the
+medal positions, as static/maps.00e83aba.js shows them.
+
+Maps are keyed by name like the browser code does. Each map keeps only its
+BEST_RECORDS_PER_MAP fastest finished runs (earlier runs first on a tie), so
+a replay costs a comparison or two, and the snapshot served to clients is only
+rebuilt when a top run or the map catalog changed.
+"""
+
+import bisect
+import itertools
+from typing import Any, Dict, List, Optional
+
+BEST_RECORDS_PER_MAP = 3
+
+# Fields of the world record the maps table shows
+RECORD_FIELDS = ("uuid", "map_id", "record_time", "timestamp", "capping_player",
+                 "capping_player_user_id", "capping_player_quote")
+
+
+class BestRecords:
+    """Top runs per map, as a StatsStore index."""
+
+    def __init__(self, per_map: int = BEST_RECORDS_PER_MAP):
+        self.per_map = per_map
+        self.catalog: Dict[str, Dict[str, Any]] = {}
+        self.version = 0
+        self._top: Dict[str, List[tuple]] = {}
+        self._seq = itertools.count()
+        self._snapshot: Optional[List[Dict[str, Any]]] = None
+
+    def rebuild(self, records: Dict[str, Dict[str, Any]]) -> None:
+        self._top = {}
+        for uuid, record in records.items():
+            self.add(uuid, record)
+        self._changed()
+
+    def add(self, uuid: str, record: Dict[str, Any]) -> None:
+        if record.get("record_time") is None:
+            return
+        top = self._top.setdefault(record["map_name"], [])
+        entry = (record["record_time"], next(self._seq), uuid, record)
+        if len(top) == self.per_map and entry >= top[-1]:
+            return
+        bisect.insort(top, entry)
+        del top[self.per_map:]
+        self._changed()
+
+    def set_catalog(self, maps: List[Dict[str, Any]]) -> None:
+        """Use the spreadsheet maps for difficulty and balls_req."""
+        catalog = {m["map_id"]: {"difficulty": m.get("difficulty"), "balls_req": m.get("balls_req")} for m in maps}
+        if catalog != self.catalog:
+            self.catalog = catalog
+            self._changed()
+
+    def _changed(self) -> None:
+        self.version += 1
+        self._snapshot = None
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        """
+        One entry per map with a finished run, by map name:
+        {map_name, map_id, difficulty, balls_req, record, medals}, where
+        record is the world record and medals the top runs' uuid and record_time.
+        """
+        if self._snapshot is None:
+            snapshot = []
+            for map_name in sorted(self._top):
+                top = self._top[map_name]
+                best = top[0][3]
+                info = self.catalog.get(best.get("map_id"), {})
+                snapshot.append({
+                    "map_name": map_name,
+                    "map_id": best.get("map_id"),
+                    "difficulty": info.get("difficulty"),
+                    "balls_req": info.get("balls_req"),
+                    "record": {field: best.get(field) for field in RECORD_FIELDS},
+                    "medals": [{"uuid": uuid, "record_time": record_time} for record_time, _, uuid, _ in top],
+                })
+            self._snapshot = snapshot
+        return self._snapshot
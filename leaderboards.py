@@ -0,0 +1,94 @@
+"""
+Materialized leaderboards, computed the same way as processLeaderboardData in
+static/leaderboard.a6bf37e4.js but kept up to date as replays are committed.
+
+Only finished runs (record_time set) count. Each map (by name) has one world
+record: its fastest run, the first one on a tie. When a run beats a record,
+the old record's points are taken back and the new one's handed out, so each
+replay costs time proportional to its player count.
+"""
+
+import re
+from typing import Any, Dict, List
+
+SOME_BALL = re.compile(r"^Some Ball(?:\s*\d+)?$", re.IGNORECASE)
+BOARDS = ("world_records", "solo_records", "capping_records", "games_completed")
+
+
+def player_key(player: Dict[str, Any]) -> str:
+    """Leaderboard key: the user id, else the name; every Some Ball is "Some Balls"."""
+    if SOME_BALL.match(player["name"] or ""):
+        return "Some Balls"
+    return player["user_id"] or player["name"]
+
+
+def player_display_name(player: Dict[str, Any]) -> str:
+    if SOME_BALL.match(player["name"] or ""):
+        return "Some Balls"
+    return player["name"]
+
+
+def new_entry(player: Dict[str, Any]) -> Dict[str, Any]:
+    """A board entry with no points yet, named after player."""
+    return {
+        "name": player_display_name(player),
+        "score": 0,
+        "has_player_id": bool(player["user_id"]) and not SOME_BALL.match(player["name"] or ""),
+    }
+
+
+class Leaderboards:
+    """The four leaderboards of the leaderboard page, as a StatsStore index."""
+
+    def __init__(self):
+        self.best: Dict[str, Dict[str, Any]] = {}  # map name -> world record
+        self.boards: Dict[str, Dict[str, Dict[str, Any]]] = {board: {} for board in BOARDS}
+
+    def rebuild(self, records: Dict[str, Dict[str, Any]]) -> None:
+        self.best = {}
+        self.boards = {board: {} for board in BOARDS}
+        for uuid, record in records.items():
+            self.add(uuid, record)
+
+    def add(self, uuid: str, record: Dict[str, Any]) -> None:
+        if record.get("record_time") is None:
+            return
+        self._count("games_completed", record["players"], 1)
+        best = self.best.get(record["map_name"])
+        if best is not None and not record["record_time"] < best["record_time"]:
+            return
+        if best is not None:
+            self._count_record(best, -1)
+        self.best[record["map_name"]] = record
+        self._count_record(record, 1)
+
+    def _count_record(self, record: Dict[str, Any], delta: int) -> None:
+        """Give (or with delta=-1 take back) the points for holding a world record."""
+        self._count("world_records", record["players"], delta)
+        if record.get("is_solo"):
+            self._count("solo_records", record["players"], delta)
+        if record.get("capping_player"):
+            capper = {"name": record["capping_player"], "user_id": record.get("capping_player_user_id")}
+            self._count("capping_records", [capper], delta)
+
+    def _count(self, board: str, players: List[Dict[str, Any]], delta: int) -> None:
+        entries = self.boards[board]
+        seen = set()
+        for player in players:
+            key = player_key(player)
+            if key in seen:
+                continue
+            seen.add(key)
+            entry = entries.get(key)
+            if entry is None:
+                entry = entries[key] = new_entry(player)
+            entry["score"] += delta
+            if entry["score"] <= 0:
+                del entries[key]
+
+    def snapshot(self) -> Dict[str, List[Dict[str, Any]]]:
+        """Every board as a list of {key, name, score, has_player_id}, highest score first."""
+        return {
+            board: sorted(({"key": key, **entry} for key, entry in entries.items()), key=lambda e: -e["score"])
+            for board, entries in self.boards.items()
+        }
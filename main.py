@@ -4,27 +4,42 @@ import json, time
 from pathlib import Path
 
 from fastapi import FastAPI, HTTPException, Query, Request
-from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse, RedirectResponse
+from fastapi.responses import RedirectResponse
 
 from fastapi_utils.tasks import repeat_every
 
 from maps import get_spreadsheet_maps
 from replays import process_unprocessed_replays, get_replay_details, retrieve_replay_data
 import jsonutil
+from static_assets import StaticAssets
+from stats_store import ORDERS, StatsStore, project
+from leaderboards import Leaderboards
+from best_records import BestRecords
+from players import RECENT_RUNS, PlayerIndex
+from time_index import BUCKET_MS, PERIODS, TimeIndex
+from progression import Progression
 from starlette.responses import Response
 from starlette.status import HTTP_404_NOT_FOUND
 
 app = FastAPI()
 
-app.mount("/static", StaticFiles(directory=Path(__file__).parent / "static"), name="static")
 STATIC_ROOT = (Path(__file__).parent / "static").resolve()
+static_assets = StaticAssets(STATIC_ROOT)
 
 DATA_DIR = Path("data")
 REPLAYS_DIR = DATA_DIR / "replays"
 STATS_FILE = DATA_DIR / "replay_stats.json"
 URIS_FILE = DATA_DIR / "replay_uris.json"
 UNPROCESSED_FILE = DATA_DIR / "unprocessed_replays.json"
+STATS_PAGE_SIZE = 500  # records per page when paginating without a limit
+STATS_MAX_PAGE_SIZE = 5000
+
+stats_store = StatsStore(STATS_FILE)
+leaderboards = stats_store.add_index(Leaderboards())
+best_records = stats_store.add_index(BestRecords())
+player_index = stats_store.add_index(PlayerIndex())
+time_index = stats_store.add_index(TimeIndex())
+progression = stats_store.add_index(Progression())
 
 
 @app.on_event("startup")
@@ -37,17 +52,23 @@ async def startup():
         print(f"Warning: Failed to load maps during startup: {e}")
         print("Application will start with empty maps and retry later")
         app.state.maps = []
+    best_records.set_catalog(app.state.maps)
+
+    # Index static files and make sure their compressed variants exist
+    static_assets.load()
     
     DATA_DIR.mkdir(exist_ok=True)
     REPLAYS_DIR.mkdir(exist_ok=True)
     for path, init in [(STATS_FILE, {}), (URIS_FILE, []), (UNPROCESSED_FILE, {})]:
         if not path.exists():
             await jsonutil.write_json(path, init)
+    await stats_store.load()
 
 
 @repeat_every(seconds=60, wait_first=True)
 async def sync_replays():
-    await process_unprocessed_replays(STATS_FILE, UNPROCESSED_FILE, REPLAYS_DIR, app.state.maps)
+    new = await process_unprocessed_replays(STATS_FILE, UNPROCESSED_FILE, REPLAYS_DIR, app.state.maps)
+    stats_store.add(new)
 
 
 @repeat_every(seconds=6 * 3600, wait_first=True)
@@ -55,6 +76,7 @@ async def refresh_maps():
     try:
         maps = await get_spreadsheet_maps()
         app.state.maps = maps
+        best_records.set_catalog(maps)
         print(f"Successfully refreshed maps, loaded {len(maps)} maps")
     except Exception as e:
         print(f"Error refreshing maps: {e}")
@@ -65,8 +87,11 @@ async def refresh_maps():
 
 
 @app.get("/")
-async def serve_index():
-    return FileResponse(Path(__file__).parent / "static" / "index.html")
+async def serve_index(request: Request):
+    response = static_assets.response("index.html", request.headers)
+    if response is None:
+        return Response("Not Found", status_code=HTTP_404_NOT_FOUND)
+    return response
 
 
 @app.get("/health")
@@ -136,9 +161,7 @@ async def post_replay(payload: dict):
     (REPLAYS_DIR / f"{uuid}.json").write_text(json.dumps(replay))
 
     # update stats
-    stats = await jsonutil.read_json(STATS_FILE)
-    stats[uuid] = details
-    await jsonutil.write_json(STATS_FILE, stats)
+    await stats_store.commit({uuid: details})
 
     # remove from unprocessed
     unproc = await jsonutil.read_json(UNPROCESSED_FILE)
@@ -150,27 +173,105 @@ async def post_replay(payload: dict):
 
 @app.get("/stats")
 async def get_stats(
+    request: Request,
     capping_player_user_id: Optional[str] = Query(None),
     map_id: Optional[str] = Query(None),
     topk: Optional[int] = Query(
         None, ge=1, description="Return top K fastest records per map"
     ),
-) -> Dict[str, Any]:
+    fields: Optional[str] = Query(
+        None, description="Comma-separated record fields to return, e.g. map_id,record_time"
+    ),
+    order: Optional[str] = Query(
+        None, description="Paginate in this order: timestamp (newest first) or record_time (fastest first)"
+    ),
+    limit: Optional[int] = Query(
+        None, ge=1, le=STATS_MAX_PAGE_SIZE, description="Records per page"
+    ),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
+    format: str = Query("json", description="json, or ndjson to stream one record per line"),
+    since: Optional[int] = Query(None, description="Only runs started at or after this time (ms since epoch)"),
+    until: Optional[int] = Query(None, description="Only runs started before this time (ms since epoch)"),
+) -> Response:
     """
     Fetch stats with optional filters:
       - capping_player_user_id: only include replays by this user
       - map_id: only include replays on this map
       - topk: if set, return up to that many fastest records per map
-    """
-    stats = await jsonutil.read_json(STATS_FILE)
+      - fields: only include these fields of each record
+      - since/until: only include runs started in [since, until), in ms since epoch
+
+    Without order/limit/cursor the result is an object keyed by replay UUID.
+    With any of them it is a page, {"records": [...], "next_cursor": ...},
+    where next_cursor is null on the last page. format=ndjson streams the
+    records instead, with the next page's cursor in X-Next-Cursor.
 
-    # apply capping_player_user_id & map_id filters
+    Responses carry an ETag that changes only when a replay is added.
+    """
+    if format not in ("json", "ndjson"):
+        raise HTTPException(400, "format must be json or ndjson")
+    if order is not None and order not in ORDERS:
+        raise HTTPException(400, f"order must be one of: {', '.join(ORDERS)}")
+    paginated = order is not None or limit is not None or cursor is not None
+    if topk is not None and paginated:
+        raise HTTPException(400, "topk can't be combined with order, limit or cursor")
+    field_list = [f.strip() for f in fields.split(",") if f.strip()] if fields else None
+
+    def matches(data):
+        return ((capping_player_user_id is None or data.get("capping_player_user_id") == capping_player_user_id)
+                and (map_id is None or data.get("map_id") == map_id)
+                and in_window(data, since, until))
+
+    def get_page(page_size):
+        try:
+            return stats_store.page(order or "timestamp", matches, page_size, cursor)
+        except ValueError as e:
+            raise HTTPException(400, str(e))
+
+    if format == "ndjson":
+        not_modified = stats_store.not_modified(request.headers)
+        if not_modified is not None:
+            return not_modified
+        if paginated:
+            records, next_cursor = get_page(limit)
+        else:
+            records, next_cursor = list(filter_stats(stats_store.records, capping_player_user_id, map_id, topk, since, until).values()), None
+        lines = (json.dumps(project(data, field_list)).encode() + b"\n" for data in records)
+        return stats_store.stream(lines, extra_headers={"X-Next-Cursor": next_cursor} if next_cursor else None)
+
+    if paginated:
+        def build():
+            records, next_cursor = get_page(limit or STATS_PAGE_SIZE)
+            return {"records": [project(data, field_list) for data in records], "next_cursor": next_cursor}
+    else:
+        def build():
+            filtered = filter_stats(stats_store.records, capping_player_user_id, map_id, topk, since, until)
+            return {uid: project(data, field_list) for uid, data in filtered.items()}
+
+    key = ("stats", capping_player_user_id, map_id, topk, tuple(field_list or ()), order, limit, cursor, since, until)
+    return stats_store.cached_response(key, build, request.headers)
+
+
+def filter_stats(
+    stats: Dict[str, Any],
+    capping_player_user_id: Optional[str],
+    map_id: Optional[str],
+    topk: Optional[int],
+    since: Optional[int] = None,
+    until: Optional[int] = None,
+) -> Dict[str, Any]:
+    """Apply the /stats filters to the records."""
+
+    # apply capping_player_user_id, since/until & map_id filters
+    if capping_player_user_id is not None:
+        stats = {uid: stats[uid] for uid in player_index.capped.get(capping_player_user_id, ())
+                 if in_window(stats[uid], since, until)}
+    elif since is not None or until is not None:
+        stats = {uid: stats[uid] for uid in time_index.uuids(since, until)}
     filtered = {
         uid: data
         for uid, data in stats.items()
-        if (capping_player_user_id is None
-            or data.get("capping_player_user_id") == capping_player_user_id)
-        and (map_id is None or data.get("map_id") == map_id)
+        if map_id is None or data.get("map_id") == map_id
     }
 
     if topk is None:
@@ -192,16 +293,101 @@ async def get_stats(
 
     return result
 
+@app.get("/leaderboards")
+async def get_leaderboards(request: Request) -> Response:
+    """
+    Overall world record, solo, capping and games completed leaderboards,
+    each a list of {key, name, score, has_player_id} sorted by score.
+    """
+    return stats_store.cached_response(("leaderboards",), leaderboards.snapshot, request.headers)
+
+
+def in_window(data: Dict[str, Any], since: Optional[int], until: Optional[int]) -> bool:
+    timestamp = data.get("timestamp") or 0
+    return (since is None or timestamp >= since) and (until is None or timestamp < until)
+
+
+@app.get("/leaderboards/window")
+async def get_window_leaderboard(
+    request: Request,
+    period: Optional[str] = Query(None, description="week or month: the last 7 or 30 days, from midnight UTC"),
+    since: Optional[int] = Query(None, description="Window start (ms since epoch)"),
+    until: Optional[int] = Query(None, description="Window end, exclusive (ms since epoch)"),
+) -> Response:
+    """
+    Fastest run per map within a time window, and how many of those runs
+    each player was in.
+    """
+    if period is not None:
+        if period not in PERIODS:
+            raise HTTPException(400, f"period must be one of: {', '.join(PERIODS)}")
+        if since is not None:
+            raise HTTPException(400, "period can't be combined with since")
+        # whole days, so the window (and its cached response) only moves daily
+        today = int(time.time() * 1000) // BUCKET_MS
+        since = (today + 1 - PERIODS[period]) * BUCKET_MS
+    # period URLs stay the same while the window moves, so the ETag has to name it
+    return stats_store.cached_response(
+        ("leaderboards/window", since, until), lambda: time_index.window_leaderboard(since, until), request.headers,
+        version=f"window{since}-{until}-{stats_store.generation}",
+    )
+
+
+@app.get("/records/best")
+async def get_best_records(request: Request) -> Response:
+    """
+    Each map's world record and medal positions, joined with the map's
+    difficulty and balls_req. The ETag only changes when a top run improves.
+    """
+    return stats_store.cached_response(
+        ("records/best",), best_records.snapshot, request.headers, version=f"best{best_records.version}"
+    )
+
+
+@app.get("/players/{user_id}")
+async def get_player(
+    request: Request,
+    user_id: str,
+    recent: int = Query(RECENT_RUNS, ge=0, le=100, description="Number of newest runs to include"),
+) -> Response:
+    """
+    A player's run and cap counts, world record counts, best time per map
+    and most recent runs, from every replay they capped or played in.
+    """
+    if user_id not in player_index.runs:
+        raise HTTPException(404, "No runs for this player")
+    return stats_store.cached_response(
+        ("players", user_id, recent),
+        lambda: player_index.profile(user_id, stats_store.records, leaderboards, recent),
+        request.headers,
+    )
+
+
+@app.get("/maps/{map_id}/progression")
+async def get_map_progression(request: Request, map_id: str) -> Response:
+    """
+    Every run that broke the map's world record, oldest first, with the
+    margin it beat the previous record by (null for the first record).
+    """
+    if map_id not in progression.versions:
+        raise HTTPException(404, "No finished runs on this map")
+    return stats_store.cached_response(
+        ("progression", map_id), lambda: progression.for_map(map_id), request.headers,
+        version=f"progression{map_id}-{progression.versions[map_id]}",
+    )
+
+
 @app.get("/GLTP")
 @app.get("/GLTP/")
 async def redirect_gltp():
     return RedirectResponse(url="/")
 
 @app.get("/{full_path:path}")
-async def serve_static_catchall(full_path: str):
-    path = (STATIC_ROOT / full_path).resolve()
-    if not STATIC_ROOT in path.parents:
+@app.get("/static/{full_path:path}")  # registered first, so it takes precedence
+async def serve_static_catchall(full_path: str, request: Request):
+    if static_assets.is_forbidden(full_path):
         return Response("Forbidden", status_code=403)
-    if path.is_file():
-        return FileResponse(path)
-    return Response("Not Found", status_code=HTTP_404_NOT_FOUND)
\ No newline at end of file
+    response = static_assets.response(full_path, request.headers)
+    if response is None:
+        return Response("Not Found", status_code=HTTP_404_NOT_FOUND)
+    return response
\ No newline at end of file
@@ -0,0 +1,77 @@
+"""
+Inverted index from TagPro user id to the replays a player took part in,
+whether as the capper or as any other ball, for player profiles and the
+/stats capping_player_user_id filter.
+"""
+
+import bisect
+from typing import Any, Dict, List, Optional, Tuple
+
+RECENT_RUNS = 10
+
+# Fields of a run in a profile's recent runs
+RUN_FIELDS = ("uuid", "map_id", "map_name", "record_time", "timestamp", "capping_player", "is_solo")
+
+
+class PlayerIndex:
+    """Per user id: runs (newest first), capped runs and personal bests, as a StatsStore index."""
+
+    def __init__(self):
+        self.runs: Dict[str, List[Tuple[int, str]]] = {}  # user id -> [(-timestamp, uuid)], sorted
+        self.capped: Dict[str, List[str]] = {}  # user id -> uuids, in ingest order
+        self.best: Dict[str, Dict[str, Tuple[int, str]]] = {}  # user id -> map name -> (record_time, uuid)
+
+    def rebuild(self, records: Dict[str, Dict[str, Any]]) -> None:
+        self.runs, self.capped, self.best = {}, {}, {}
+        for uuid, record in records.items():
+            self.add(uuid, record)
+
+    def add(self, uuid: str, record: Dict[str, Any]) -> None:
+        capper = record.get("capping_player_user_id")
+        user_ids = {player["user_id"] for player in record["players"] if player.get("user_id")}
+        if capper:
+            user_ids.add(capper)
+            self.capped.setdefault(capper, []).append(uuid)
+        record_time = record.get("record_time")
+        for user_id in user_ids:
+            bisect.insort(self.runs.setdefault(user_id, []), (-(record.get("timestamp") or 0), uuid))
+            if record_time is not None:
+                best = self.best.setdefault(user_id, {})
+                current = best.get(record["map_name"])
+                if current is None or record_time < current[0]:
+                    best[record["map_name"]] = (record_time, uuid)
+
+    def profile(self, user_id: str, records: Dict[str, Dict[str, Any]], leaderboards,
+                recent: int = RECENT_RUNS) -> Optional[Dict[str, Any]]:
+        """
+        A player's summary, or None if they have no runs.
+
+        Args:
+            user_id: TagPro user id
+            records: The StatsStore records the index was built from
+            leaderboards: The Leaderboards index, for world record counts
+            recent: How many of the newest runs to include
+        """
+        runs = self.runs.get(user_id)
+        if not runs:
+            return None
+        recent_runs = [records[uuid] for _, uuid in runs[:recent]]
+        latest = records[runs[0][1]]
+        name = next((p["name"] for p in latest["players"] if p.get("user_id") == user_id), latest["capping_player"])
+        best = self.best.get(user_id, {})
+        return {
+            "user_id": user_id,
+            "name": name,
+            "runs": len(runs),
+            "completed_maps": len(best),
+            "caps": len(self.capped.get(user_id, ())),
+            "world_records": leaderboards.boards["world_records"].get(user_id, {}).get("score", 0),
+            "solo_records": leaderboards.boards["solo_records"].get(user_id, {}).get("score", 0),
+            "capping_records": leaderboards.boards["capping_records"].get(user_id, {}).get("score", 0),
+            "records": [
+                {"map_name": map_name, "map_id": records[uuid]["map_id"], "uuid": uuid,
+                 "record_time": record_time, "timestamp": records[uuid]["timestamp"]}
+                for map_name, (record_time, uuid) in sorted(best.items())
+            ],
+            "recent": [{field: run.get(field) for field in RUN_FIELDS} for run in recent_runs],
+        }
@@ -0,0 +1,79 @@
+"""
+World record progression per map: every run that beat the map's record at
+the time it was played, with the margin it won by.
+
+Replays normally arrive in the order they were played, so a new run only has
+to be compared with the map's current record. A run older than the map's
+latest record (e.g. a backfilled replay) can change the history, so that map's
+series is recomputed from its runs instead.
+"""
+
+from typing import Any, Dict, List, Optional
+
+# Fields of a record-breaking run in a progression
+PROGRESSION_FIELDS = ("uuid", "timestamp", "record_time", "capping_player", "capping_player_user_id")
+
+
+class Progression:
+    """Per map id, the chronological series of world records, as a StatsStore index."""
+
+    def __init__(self):
+        self.series: Dict[str, List[Dict[str, Any]]] = {}
+        self.versions: Dict[str, int] = {}  # map id -> bumped whenever its series changes
+        self.map_names: Dict[str, str] = {}
+        self._runs: Dict[str, List[str]] = {}  # map id -> uuids of finished runs
+        self.records: Dict[str, Dict[str, Any]] = {}
+
+    def rebuild(self, records: Dict[str, Dict[str, Any]]) -> None:
+        self.series, self._runs, self.map_names, self.records = {}, {}, {}, records
+        finished = [(uuid, record) for uuid, record in records.items() if self._counts(record)]
+        for uuid, record in sorted(finished, key=lambda item: item[1].get("timestamp") or 0):
+            self._runs.setdefault(record["map_id"], []).append(uuid)
+            self._extend(record)
+        self.versions = {map_id: self.versions.get(map_id, 0) + 1 for map_id in self.series}
+
+    @staticmethod
+    def _counts(record: Dict[str, Any]) -> bool:
+        return record.get("record_time") is not None and record.get("map_id") is not None
+
+    def add(self, uuid: str, record: Dict[str, Any]) -> None:
+        if not self._counts(record):
+            return
+        map_id = record["map_id"]
+        self._runs.setdefault(map_id, []).append(uuid)
+        series = self.series.get(map_id)
+        if series and (record.get("timestamp") or 0) < series[-1]["timestamp"]:
+            self._recompute(map_id)
+        elif not self._extend(record):
+            return
+        self.versions[map_id] = self.versions.get(map_id, 0) + 1
+
+    def _extend(self, record: Dict[str, Any]) -> bool:
+        """Append record to its map's series if it beats the current record."""
+        series = self.series.setdefault(record["map_id"], [])
+        previous = series[-1]["record_time"] if series else None
+        if previous is not None and not record["record_time"] < previous:
+            return False
+        entry = {field: record.get(field) for field in PROGRESSION_FIELDS}
+        entry["margin"] = None if previous is None else previous - record["record_time"]
+        series.append(entry)
+        self.map_names[record["map_id"]] = record["map_name"]
+        return True
+
+    def _recompute(self, map_id: str) -> None:
+        self.series[map_id] = []
+        runs = sorted((self.records[uuid] for uuid in self._runs[map_id]), key=lambda r: r.get("timestamp") or 0)
+        for record in runs:
+            self._extend(record)
+
+    def for_map(self, map_id: str) -> Optional[Dict[str, Any]]:
+        """The map's progression, oldest record first, or None if it has no finished runs."""
+        series = self.series.get(map_id)
+        if not series:
+            return None
+        return {
+            "map_id": map_id,
+            "map_name": self.map_names[map_id],
+            "current": series[-1],
+            "progression": series,
+        }
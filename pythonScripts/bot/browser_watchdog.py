@@ -0,0 +1,134 @@
+import logging
+import os
+import signal
+import threading
+import time
+from collections import deque
+
+import metrics
+from driver_adapter import process_tree_pids, process_tree_rss
+from constants import (
+    WATCHDOG_INTERVAL, WATCHDOG_HEARTBEAT_TIMEOUT, WATCHDOG_MAX_WS_FAILURES,
+    WATCHDOG_RSS_LIMIT_MB, WATCHDOG_QUIT_TIMEOUT
+)
+
+
+event_logger = logging.getLogger("events_logger")
+
+RECYCLES = metrics.counter("bot_browser_recycles_total", "Browser restarts by the watchdog, by reason")
+RECOVERY_SECONDS = metrics.histogram(
+    "bot_browser_recovery_seconds", "Time to replace a failed browser", (1, 2, 5, 10, 20, 30, 60, 120)
+)
+
+
+def call_with_timeout(func, timeout):
+    """Run func in a daemon thread.
+
+    Returns (True, result) if it returned in time, otherwise (False, the
+    exception it raised or None if it is still running).
+    """
+    outcome = {}
+
+    def run():
+        try:
+            outcome["result"] = func()
+        except Exception as e:
+            outcome["error"] = e
+
+    thread = threading.Thread(target=run, name="watchdog-call", daemon=True)
+    thread.start()
+    thread.join(timeout)
+    if thread.is_alive():
+        return False, None
+    return "result" in outcome, outcome.get("result", outcome.get("error"))
+
+
+class BrowserWatchdog:
+    """Replaces the shared Chrome when it hangs, dies or grows too large.
+
+    Every WATCHDOG_INTERVAL ticks the browser gets a CDP heartbeat
+    (Browser.getVersion, which doesn't touch any page) with a timeout, its
+    RSS is checked against WATCHDOG_RSS_LIMIT_MB and the adapters' failed
+    WebSocket drains are counted. On failure the browser is killed, a new one
+    started, every adapter re-attached to a fresh tab and each bot's state
+    handed over with export_state/restore_state.
+    """
+
+    def __init__(self, bots, interval=WATCHDOG_INTERVAL, rss_limit_mb=WATCHDOG_RSS_LIMIT_MB):
+        self.bots = bots
+        self.interval = interval
+        self.rss_limit_mb = rss_limit_mb
+        self.last_rss_mb = None
+        self.recoveries = deque(maxlen=20)  # (time, reason, seconds)
+
+    @property
+    def tabs(self):
+        return self.bots[0].adapter.tabs
+
+    def check(self):
+        """Return (kind, detail) if the browser needs replacing, or None if it is healthy."""
+        for bot in self.bots:
+            if bot.adapter.consecutive_ws_failures >= WATCHDOG_MAX_WS_FAILURES:
+                return "ws_failures", f"{bot.name}: {bot.adapter.consecutive_ws_failures} failed WebSocket drains"
+
+        ok, result = call_with_timeout(
+            lambda: self.tabs.driver.execute_cdp_cmd("Browser.getVersion", {}), WATCHDOG_HEARTBEAT_TIMEOUT
+        )
+        if not ok:
+            return "heartbeat", f"heartbeat failed: {result or 'timed out'}"
+
+        pid = self.tabs.pid
+        rss = None if pid is None else process_tree_rss(pid)
+        if rss is not None:
+            self.last_rss_mb = rss / 2 ** 20
+            if self.last_rss_mb > self.rss_limit_mb:
+                return "rss", f"RSS {self.last_rss_mb:.0f} MB over {self.rss_limit_mb} MB"
+        return None
+
+    def _shutdown(self, tabs):
+        """Quit the old browser, killing it if quit() hangs or fails."""
+        pid = tabs.pid
+        pids = process_tree_pids(pid) if pid is not None else []
+        ok, _ = call_with_timeout(tabs.driver.quit, WATCHDOG_QUIT_TIMEOUT)
+        if ok:
+            return
+        for stale in pids:
+            try:
+                os.kill(stale, signal.SIGKILL)
+            except OSError:
+                pass
+
+    def recycle(self, kind, detail=""):
+        """Replace the browser and move every group into it."""
+        start = time.time()
+        event_logger.info(f"WATCHDOG: recycling browser ({detail or kind})")
+        states = [bot.export_state() for bot in self.bots]
+
+        self._shutdown(self.tabs)
+        tabs = None
+        for bot, state in zip(self.bots, states):
+            bot.adapter.attach(tabs)
+            tabs = bot.adapter.tabs
+            bot.restore_state(state)
+
+        elapsed = time.time() - start
+        self.recoveries.append((start, kind, elapsed))
+        RECYCLES.inc(reason=kind)
+        RECOVERY_SECONDS.observe(elapsed)
+        event_logger.info(f"WATCHDOG: browser replaced in {elapsed:.1f}s")
+
+    def tick(self, i):
+        """Check the browser every interval ticks and recycle it if needed."""
+        if i % self.interval:
+            return
+        problem = self.check()
+        if problem is not None:
+            self.recycle(*problem)
+
+    def stats(self):
+        return {
+            "rss_mb": None if self.last_rss_mb is None else round(self.last_rss_mb, 1),
+            "recycles": len(self.recoveries),
+            "last_recovery_seconds": self.recoveries[-1][2] if self.recoveries else None,
+            "last_reason": self.recoveries[-1][1] if self.recoveries else None,
+        }
@@ -7,7 +7,8 @@ except ImportError:
         return 0.0 if query.lower() not in target.lower() else 50.0
     fuzz = type('Fuzz', (), {'partial_ratio': fuzz_partial_ratio})()
 from maps import inject_map_id_into_preset
-from utils import find_best_info_message, get_game_info
+from utils import InfoMessageIndex, get_game_info
+from command_router import CommandRouter
 from constants import (
     MODERATOR_NAMES, RESTRICTED_NAMES, PERIODIC_MESSAGES, 
     DISCORD_LINK
@@ -23,6 +24,20 @@ class ChatHandler:
         self.bot = bot
         self.authed_members = {}
         self.disallow_someballs = False
+        self.info_index = InfoMessageIndex(PERIODIC_MESSAGES)
+
+        self.router = CommandRouter()
+        self.router.register("HELP", lambda sender, msg, details: self._handle_help_command())
+        self.router.register("SAVE", lambda sender, msg, details: self._handle_save_command())
+        self.router.register("PLAY", lambda sender, msg, details: self._handle_play_command())
+        self.router.register("ALLOW SOMEBALLS", lambda sender, msg, details: self._handle_allow_someballs_command())
+        self.router.register("BAN SOMEBALLS", lambda sender, msg, details: self._handle_ban_someballs_command())
+        self.router.register("LAUNCHNEW", self._handle_launchnew_command, exact=False)
+        self.router.register("SETTINGS", lambda sender, msg, details: self._handle_settings_command(msg), exact=False)
+        self.router.register("MAP", lambda sender, msg, details: self._handle_map_command())
+        self.router.register("INFO", lambda sender, msg, details: self._handle_info_command(msg), exact=False)
+        self.router.register("MODERATE", lambda sender, msg, details: self._handle_moderate_command(sender, details))
+        self.router.register("REGION", lambda sender, msg, details: self._handle_region_command(msg), exact=False)
 
     def handle_chat(self, event_details):
         """Main chat message handler."""
@@ -59,28 +74,7 @@ class ChatHandler:
                 return
         
         # Process commands
-        if msg.strip() == "HELP":
-            self._handle_help_command()
-        elif msg.strip() == "SAVE":
-            self._handle_save_command()
-        elif msg.strip() == "PLAY":
-            self._handle_play_command()
-        elif msg.strip() == "ALLOW SOMEBALLS":
-            self._handle_allow_someballs_command()
-        elif msg.strip() == "BAN SOMEBALLS":
-            self._handle_ban_someballs_command()
-        elif msg.startswith("LAUNCHNEW"):
-            self._handle_launchnew_command(sender, msg, event_details)
-        elif msg.startswith("SETTINGS"):
-            self._handle_settings_command(msg)
-        elif msg == "MAP":
-            self._handle_map_command()
-        elif msg.startswith("INFO"):
-            self._handle_info_command(msg)
-        elif msg == "MODERATE":
-            self._handle_moderate_command(sender, event_details)
-        elif msg.startswith("REGION"):
-            self._handle_region_command(msg)
+        self.router.dispatch(sender, msg, event_details)
 
     def _handle_help_command(self):
         """Handle HELP command."""
@@ -130,7 +124,6 @@ class ChatHandler:
             self.adapter.send_ws_message(["endGame"])
             self.bot.game_id_pending = False
             self.bot.load_preset(preset)
-            time.sleep(2)
             self.bot.maybe_launch()
 
     def _handle_settings_command(self, msg):
@@ -150,7 +143,7 @@ class ChatHandler:
         """Handle INFO command."""
         if len(msg.strip().split()) > 1:
             query = msg.strip().split(" ", 1)[1]
-            best_info_str = find_best_info_message(query, PERIODIC_MESSAGES)
+            best_info_str = self.info_index.best(query)
             self.adapter.send_chat_msg(best_info_str)
         else:
             self.adapter.send_chat_msg(random.choice(PERIODIC_MESSAGES))
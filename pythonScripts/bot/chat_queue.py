@@ -0,0 +1,72 @@
+import time
+from collections import deque
+
+from constants import (
+    CHAT_PRIORITY_LOW, CHAT_PRIORITY_NORMAL, CHAT_BATCH_SIZE, CHAT_LINE_INTERVAL,
+    CHAT_QUEUE_LOW_PRIORITY_LIMIT, CHAT_QUEUE_MAX_SIZE
+)
+
+
+class ChatQueue:
+    """Outbound chat lines waiting to be sent to the group.
+
+    Lines are flushed in batches through send_batch(lines, interval), which is
+    expected to deliver the whole batch in a single browser round-trip, spacing
+    lines interval seconds apart. Low-priority lines (periodic messages) are
+    dropped instead of queued when the backlog is already long.
+    """
+
+    def __init__(self, send_batch):
+        self.send_batch = send_batch
+        self._pending = deque()
+        self._busy_until = 0.0
+
+        # Visibility counters
+        self.sent = 0
+        self.dropped = 0
+        self.latencies = deque(maxlen=100)
+
+    def __len__(self):
+        return len(self._pending)
+
+    def put(self, text, priority=CHAT_PRIORITY_NORMAL):
+        """Queue text for sending, one entry per line."""
+        lines = text.split("\n")
+        if priority <= CHAT_PRIORITY_LOW and len(self._pending) >= CHAT_QUEUE_LOW_PRIORITY_LIMIT:
+            self.dropped += len(lines)
+            return False
+        now = time.time()
+        for line in lines:
+            self._pending.append((line, now))
+        while len(self._pending) > CHAT_QUEUE_MAX_SIZE:
+            self._pending.popleft()
+            self.dropped += 1
+        return True
+
+    def flush(self):
+        """Send the next batch if the previous one has finished going out."""
+        now = time.time()
+        if not self._pending or now < self._busy_until:
+            return 0
+
+        batch = [self._pending.popleft() for _ in range(min(CHAT_BATCH_SIZE, len(self._pending)))]
+        if not self.send_batch([line for line, _ in batch], CHAT_LINE_INTERVAL):
+            # undeliverable (no socket or not on the groups page), same as before queuing
+            self.dropped += len(batch)
+            return 0
+
+        self._busy_until = now + len(batch) * CHAT_LINE_INTERVAL
+        for n, (_, queued_at) in enumerate(batch):
+            self.latencies.append(now + n * CHAT_LINE_INTERVAL - queued_at)
+        self.sent += len(batch)
+        return len(batch)
+
+    def stats(self):
+        """Return queue depth, send latency and drop figures."""
+        return {
+            "depth": len(self._pending),
+            "sent": self.sent,
+            "dropped": self.dropped,
+            "avg_latency": sum(self.latencies) / len(self.latencies) if self.latencies else None,
+            "max_latency": max(self.latencies, default=None),
+        }
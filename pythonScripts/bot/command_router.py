@@ -0,0 +1,107 @@
+import logging
+import time
+
+from constants import CHAT_COMMAND_RATE, CHAT_COMMAND_BURST, CHAT_COMMAND_MAX_SENDERS
+
+
+bot_logger = logging.getLogger("bot_logger")
+
+
+class TokenBucket:
+    """Classic token bucket: `rate` tokens per second, holding at most `capacity`."""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated_at = time.time()
+
+    def allow(self, now=None):
+        """Take a token if one is available."""
+        now = time.time() if now is None else now
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+
+class CommandRouter:
+    """Dispatches chat commands on their first token.
+
+    Commands are registered with the exact full text they must match
+    (e.g. "ALLOW SOMEBALLS", "MAP") or as prefix commands that take
+    arguments (e.g. "SETTINGS ..."). Every recognised command costs the sender
+    a token; senders who run out are ignored until their bucket refills.
+    """
+
+    def __init__(self, rate=CHAT_COMMAND_RATE, burst=CHAT_COMMAND_BURST):
+        self.rate = rate
+        self.burst = burst
+        self.commands = {}
+        self.buckets = {}
+        self.timings = {}
+        self.rate_limited = 0
+
+    def register(self, command, handler, exact=True):
+        """Register handler(sender, msg, event_details) for command."""
+        self.commands[command.split()[0]] = (command, handler, exact)
+        self.timings[command] = [0, 0.0, 0.0]  # count, total seconds, max seconds
+
+    def match(self, msg):
+        """Return (command, handler) for msg, or None if it isn't a command."""
+        parts = msg.split(None, 1)
+        if not parts:
+            return None
+        entry = self.commands.get(parts[0])
+        if entry is None:
+            return None
+        command, handler, exact = entry
+        if exact and msg.strip() != command:
+            return None
+        return command, handler
+
+    def _allow(self, sender):
+        bucket = self.buckets.get(sender)
+        if bucket is None:
+            if len(self.buckets) >= CHAT_COMMAND_MAX_SENDERS:
+                # forget senders whose buckets have refilled, they are equivalent to new ones
+                now = time.time()
+                for name, b in list(self.buckets.items()):
+                    if b.tokens + (now - b.updated_at) * b.rate >= b.capacity:
+                        del self.buckets[name]
+            bucket = self.buckets[sender] = TokenBucket(self.rate, self.burst)
+        return bucket.allow()
+
+    def dispatch(self, sender, msg, event_details):
+        """Run the handler for msg. Returns True if msg was a command."""
+        matched = self.match(msg)
+        if matched is None:
+            return False
+        command, handler = matched
+        if not self._allow(sender):
+            self.rate_limited += 1
+            bot_logger.debug("Rate limited %s from %s", command, sender)
+            return True
+
+        start = time.perf_counter()
+        try:
+            handler(sender, msg, event_details)
+        finally:
+            elapsed = time.perf_counter() - start
+            timing = self.timings[command]
+            timing[0] += 1
+            timing[1] += elapsed
+            timing[2] = max(timing[2], elapsed)
+        return True
+
+    def stats(self):
+        """Return per-command call counts and handling times in milliseconds."""
+        return {
+            "rate_limited": self.rate_limited,
+            "commands": {
+                command: {"count": count, "avg_ms": 1000 * total / count, "max_ms": 1000 * worst}
+                for command, (count, total, worst) in self.timings.items() if count
+            },
+        }
@@ -1,7 +1,8 @@
 # Constants and configuration for the TagPro bot
+import os
 
-# Base URLs
-BASE_URL = "https://tagpro.koalabeast.com"
+# Base URLs (TAGPRO_BASE_URL points the bot at e.g. local_groups_server.py instead)
+BASE_URL = os.environ.get("TAGPRO_BASE_URL", "https://tagpro.koalabeast.com").rstrip("/")
 GROUPS_URL = f"{BASE_URL}/groups/"
 GAME_URL = f"{BASE_URL}/game"
 
@@ -20,6 +21,18 @@ GROUP_SETTINGS = {
     "ghostMode": "noPlayerOrMarsCollisions"
 }
 
+# Groups managed by this bot process. Each group runs in its own tab of a
+# shared Chrome with its own settings and map rotation.
+GROUPS = [
+    {
+        "name": "main",
+        "room_name": ROOM_NAME,
+        "region": "US Central",
+        "settings_file": "logs/bot_settings.json",
+    },
+]
+MAX_GROUPS = 4  # every group costs a browser tab, this bounds total memory
+
 # Default settings
 DEFAULT_MAP_SETTINGS = {
     "category": None,
@@ -116,6 +129,26 @@ CHROME_OPTIONS = [
     "--remote-debugging-port=9222"
 ]
 
+# Lean mode: block images, sounds, fonts and analytics and mute audio (BOT_LEAN_MODE=1).
+# The bot only needs the group socket and a few DOM nodes.
+LEAN_MODE = os.environ.get("BOT_LEAN_MODE", "0") == "1"
+LEAN_CHROME_OPTIONS = [
+    "--mute-audio",
+    "--blink-settings=imagesEnabled=false",
+    "--disable-remote-fonts",
+    "--disable-background-networking",
+    "--disable-component-update",
+    "--disable-default-apps",
+    "--disable-sync",
+    "--disable-features=Translate,MediaRouter,OptimizationHints,AudioServiceOutOfProcess",
+]
+LEAN_BLOCKED_URLS = [
+    "*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.svg", "*.ico",
+    "*.mp3", "*.ogg", "*.wav", "*.m4a", "*.webm", "*.mp4",
+    "*.woff", "*.woff2", "*.ttf", "*.otf", "*fonts.googleapis.com*",
+    "*google-analytics.com*", "*googletagmanager.com*", "*doubleclick.net*", "*googlesyndication.com*",
+]
+
 # Login mode configuration
 LOGIN_MODE = True  # Set to True for manual login, False for normal operation
 CHROME_PROFILE_DIR = "/app/chrome-profile/login"  # Persistent profile directory
@@ -139,8 +172,84 @@ FINDING_GAME_TIMEOUT = 300
 GAME_END_TIMEOUT = 2  
 PERIODIC_MESSAGE_INTERVAL = 1800  
 PRESET_LOAD_INTERVAL = 5  #
-LAUNCH_DELAY = 5  
 GAME_STR_DELAY = 5  
+PRESET_APPLY_TIMEOUT = 2  # max wait for the server to confirm a preset
+LAUNCH_ACK_TIMEOUT = 5  # max wait for the server's game event after groupPlay
+ACK_POLL_INTERVAL = 0.1
+
+# Browser watchdog
+WATCHDOG_INTERVAL = 10  # ticks between health checks
+WATCHDOG_HEARTBEAT_TIMEOUT = 5  # seconds a CDP heartbeat may take before the browser counts as hung
+WATCHDOG_MAX_WS_FAILURES = 5  # consecutive failed WebSocket drains before recycling
+WATCHDOG_RSS_LIMIT_MB = 1500  # recycle when chromedriver + Chrome exceed this
+WATCHDOG_QUIT_TIMEOUT = 10  # seconds to wait for driver.quit() before killing Chrome
+
+# Bot state snapshots, used to resume after a restart
+STATE_PATH = "logs/bot_state.json"
+STATE_SNAPSHOT_INTERVAL = 5  # ticks between snapshots (only written when state changed)
+STATE_MAX_AGE = 3600  # seconds after which a snapshot is too old to resume from
+
+# Injected WebSocket interceptor
+WS_EVENT_ALLOWLIST = ["chat", "member", "removed", "game", "you"]  # events process_ws_events handles
+WS_RING_CAPACITY = 500  # frames kept per socket between drains, oldest overwritten first
+
+# Logging
+LOG_MAX_BYTES = 10 * 1024 * 1024  # log files rotate at this size
+LOG_BACKUP_COUNT = 5
+BOT_LOG_LEVEL = "INFO"  # set to "DEBUG" for the per-tick lobby diagnostics in bot.txt
+# ws.txt keeps one in N frames of each event type listed, 0 suppresses a type; unlisted types are all kept
+WS_LOG_SAMPLE_EVERY = {"member": 10}
+
+# Record each group's WebSocket traffic for replay_adapter.py, e.g. "logs/recordings"
+RECORDING_DIR = None
+RECORDING_FLUSH_INTERVAL = 5  # seconds between flushes of the recording file
+
+# local_groups_server.py (offline load testing)
+LOCAL_SERVER_PORT = 8765
+SIM_PLAYERS_PER_GROUP = 8  # simulated players joining each group
+SIM_JOIN_INTERVAL = 2  # seconds between simulated players joining
+SIM_CHAT_INTERVAL = 10  # average seconds between simulated chat lines per group
+SIM_GAME_SECONDS = 30  # how long simulated players take to finish a game
+SIM_CHAT_LINES = ["gg", "nice", "one more", "lol", "MAP", "HELP"]
+
+# Prometheus metrics, served at http://localhost:<port>/metrics when BOT_METRICS_PORT is set
+METRICS_PORT = int(os.environ["BOT_METRICS_PORT"]) if os.environ.get("BOT_METRICS_PORT") else None
+METRICS_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+METRICS_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+
+# Chat command rate limiting
+CHAT_COMMAND_RATE = 0.5  # commands per second refilled per sender
+CHAT_COMMAND_BURST = 4  # commands a sender may issue back to back
+CHAT_COMMAND_MAX_SENDERS = 500  # idle senders are forgotten past this many
+
+# Outbound chat queue
+CHAT_PRIORITY_LOW = 0  # periodic messages, dropped when chat is backed up
+CHAT_PRIORITY_NORMAL = 1
+CHAT_BATCH_SIZE = 5  # lines sent per browser round-trip
+CHAT_LINE_INTERVAL = 0.3  # seconds between chat lines
+CHAT_QUEUE_LOW_PRIORITY_LIMIT = 5  # backlog at which low-priority lines are dropped
+CHAT_QUEUE_MAX_SIZE = 50
+
+# Legal map pools
+MAP_POOL_MAX_BALLS = 100  # highest ready-ball count legality is precomputed for
+MAP_POOL_CACHE_SIZE = 64  # number of (settings, ready balls) pools kept cached
+
+# Map rotation
+ROTATION_RECENT_SIZE = 20  # recently played presets to avoid
+ROTATION_MAX_REJECTIONS = 8  # resamples before accepting a recent preset
+ROTATION_STATS_TTL = 3600  # seconds between completion rate reloads
+ROTATION_DEFAULT_FUN = 3.0  # weight for maps without a fun rating
 
 # File paths
 REPLAY_STATS_PATH = "data/replay_stats.json"
+
+# Replay upload queue
+UPLOAD_QUEUE_PATH = "logs/upload_queue.json"
+UPLOAD_RETRY_BASE = 10  # seconds before the first retry, doubled each attempt
+UPLOAD_RETRY_MAX = 600
+UPLOAD_MAX_AGE = 86400  # give up on replays that still fail after a day
+
+# World record cache
+WR_URL = "https://worldrecords.bambitp.workers.dev/"
+WR_CACHE_TTL = 300  # seconds before the cached records are refreshed in the background
+WR_PENDING_MAX_AGE = 86400  # seconds our own uploads are overlaid on the site's records before giving up on them
@@ -7,24 +7,162 @@ from selenium.webdriver.common.by import By
 from selenium.webdriver.chrome.service import Service
 from selenium.common.exceptions import JavascriptException
 
-from constants import CHROME_OPTIONS, CHROME_PATHS, GROUPS_URL, GAME_URL, LOGIN_MODE, CHROME_PROFILE_DIR
+from constants import (
+    CHROME_OPTIONS, CHROME_PATHS, GROUPS_URL, GAME_URL, LOGIN_MODE, CHROME_PROFILE_DIR,
+    ACK_POLL_INTERVAL, CHAT_PRIORITY_NORMAL, WS_EVENT_ALLOWLIST, WS_RING_CAPACITY, WS_LOG_SAMPLE_EVERY,
+    LEAN_MODE, LEAN_CHROME_OPTIONS, LEAN_BLOCKED_URLS
+)
 from utils import setup_logger
+from chat_queue import ChatQueue
+import metrics
 
 
 # Create logger for WebSocket events
-ws_logger = setup_logger("ws_logger", "ws.txt")
+ws_logger = setup_logger("ws_logger", "ws.txt", sample_every=WS_LOG_SAMPLE_EVERY)
+
+WEBDRIVER_CALLS = metrics.counter("bot_webdriver_calls_total", "WebDriver accesses made by the bot")
+WS_DRAIN_SECONDS = metrics.histogram("bot_ws_drain_seconds", "Time to drain the page's WebSocket buffers")
+WS_FRAMES = metrics.counter("bot_ws_frames_total", "WebSocket frames handled, by event type")
+WS_DRAIN_FAILURES = metrics.counter("bot_ws_drain_failures_total", "Failed attempts to drain the page's WebSocket buffers")
+CHROME_RSS_BYTES = metrics.gauge("bot_chrome_rss_bytes", "Resident memory of chromedriver and Chrome")
+
+
+def process_tree_pids(pid):
+    """pid and all its descendants, from /proc (just [pid] without /proc)."""
+    if not os.path.isdir("/proc"):
+        return [pid]
+    children = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                # the command name may contain spaces, ppid is the second field after it
+                ppid = int(f.read().rsplit(")", 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        children.setdefault(ppid, []).append(int(entry))
+
+    pids, stack = [], [pid]
+    while stack:
+        current = stack.pop()
+        pids.append(current)
+        stack.extend(children.get(current, []))
+    return pids
+
+
+def process_tree_rss(pid):
+    """Total resident memory in bytes of pid and its descendants, from /proc.
+
+    Returns None where /proc is not available (e.g. macOS).
+    """
+    if not os.path.isdir("/proc"):
+        return None
+    total = 0
+    for current in process_tree_pids(pid):
+        try:
+            with open(f"/proc/{current}/status") as f:
+                for line in f:
+                    if line.startswith("VmRSS:"):
+                        total += int(line.split()[1]) * 1024
+                        break
+        except OSError:
+            continue
+    return total
+
+
+class BrowserTabs:
+    """A Chrome instance shared by several adapters, one tab per adapter.
+
+    WebDriver commands always go to the focused tab, so adapters activate
+    their own tab before using the driver. The focused handle is tracked here
+    to avoid a round-trip when it is already active.
+    """
+
+    def __init__(self, driver):
+        self.driver = driver
+        self.active = driver.current_window_handle
+        self.handles = [self.active]
+        self._first_claimed = False
+
+    def claim_tab(self):
+        """Return a tab for a new adapter: the browser's first tab, then new ones."""
+        if not self._first_claimed:
+            self._first_claimed = True
+            self.activate(self.handles[0])
+            return self.handles[0]
+        return self.open_tab()
+
+    @property
+    def pid(self):
+        """Process id of chromedriver (Chrome runs as its child), if known."""
+        try:
+            return self.driver.service.process.pid
+        except AttributeError:
+            return None
+
+    def open_tab(self):
+        """Open and focus a new tab, returning its handle."""
+        self.driver.switch_to.new_window('tab')
+        self.active = self.driver.current_window_handle
+        self.handles.append(self.active)
+        return self.active
+
+    def activate(self, handle):
+        """Focus the tab with the given handle."""
+        if handle != self.active:
+            self.driver.switch_to.window(handle)
+            self.active = handle
 
 
 class DriverAdapter:
-    """Handles WebDriver setup and WebSocket communication for TagPro."""
+    """Handles WebDriver setup and WebSocket communication for TagPro.
+
+    Pass the `tabs` of an existing adapter to run this adapter in a new tab of
+    the same browser instead of starting another Chrome. Pass a WsRecorder
+    as `recorder` to capture frames and DOM reads for ReplayAdapter. With
+    `lean` the browser skips images, sounds, fonts and analytics.
+    """
     
-    def __init__(self):
-        self.driver = self._setup_driver()
-        self.my_id = None
+    def __init__(self, tabs=None, recorder=None, lean=LEAN_MODE):
+        self.lean = lean
+        self.recorder = recorder
+        self.webdriver_calls = 0
+        self.ws_failures = 0
+        self.consecutive_ws_failures = 0
         self.event_handlers = {}
-        
+        self.chat_queue = ChatQueue(self._send_chat_lines)
+        self.attach(tabs)
+
+    def new_browser(self):
+        """Start a Chrome for adapters to claim tabs from."""
+        return BrowserTabs(self._setup_driver())
+
+    def attach(self, tabs=None):
+        """Move this adapter to a tab of tabs (a new browser if None).
+
+        Used at startup and by BrowserWatchdog after the browser is
+        recycled. Event handlers and queued chat are kept.
+        """
+        if tabs is None:
+            tabs = self.new_browser()
+        self.tabs = tabs
+        self.window_handle = tabs.claim_tab()
+        self.my_id = None
+        self.consecutive_ws_failures = 0
+
         self.inject_ws_intercept()
         self.inject_auto_close_alerts()
+        if self.lean:
+            self.block_nonessential_requests()
+
+    @property
+    def driver(self):
+        """The shared WebDriver, focused on this adapter's tab."""
+        self.webdriver_calls += 1
+        WEBDRIVER_CALLS.inc()
+        self.tabs.activate(self.window_handle)
+        return self.tabs.driver
 
     def _setup_driver(self):
         """Set up Chrome WebDriver with appropriate options."""
@@ -40,6 +178,8 @@ class DriverAdapter:
             chrome_options = [opt for opt in CHROME_OPTIONS if opt != "--headless"]
         else:
             chrome_options = CHROME_OPTIONS
+        if self.lean:
+            chrome_options = chrome_options + LEAN_CHROME_OPTIONS
         
         # Add chrome options
         for option in chrome_options:
@@ -92,22 +232,73 @@ class DriverAdapter:
             print(f"Automatic detection failed: {e}")
             raise Exception("Could not start any webdriver")
 
+    def block_nonessential_requests(self):
+        """Have this tab drop requests for LEAN_BLOCKED_URLS before they are sent."""
+        self.driver.execute_cdp_cmd("Network.enable", {})
+        self.driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": LEAN_BLOCKED_URLS})
+
+    def get_browser_resources(self):
+        """Return Chrome's resident memory and the current page's load time."""
+        pid = self.tabs.pid
+        rss = None if pid is None else process_tree_rss(pid)
+        if rss is not None:
+            CHROME_RSS_BYTES.set(rss)
+        try:
+            load_ms = self.driver.execute_script("""
+                var nav = performance.getEntriesByType('navigation')[0];
+                return nav && nav.loadEventEnd ? nav.loadEventEnd - nav.startTime : null;
+            """)
+        except Exception:
+            load_ms = None
+        return {
+            "lean": self.lean,
+            "rss_mb": None if rss is None else round(rss / 2 ** 20, 1),
+            "page_load_ms": None if load_ms is None else round(load_ms),
+        }
+
     def inject_ws_intercept(self):
-        """Inject JavaScript to intercept WebSocket messages."""
+        """Inject JavaScript to intercept WebSocket messages.
+
+        Frames are parsed in the page and only events in WS_EVENT_ALLOWLIST
+        are kept, in a fixed-size ring buffer per socket, so a stalled bot
+        can't grow the page's heap without bound. Counters for kept, filtered
+        and dropped frames are in window.myWsStats (see get_ws_stats).
+        """
         ws_injection_script = """
         if (!window.myWebSockets) {
+            const WS_ALLOWLIST = new Set(__WS_ALLOWLIST__);
+            const WS_CAPACITY = __WS_CAPACITY__;
             window.myWebSockets = {};
             window.myWsMessages = {};
+            window.myWsEventCounts = {};
+            window.myWsStats = {received: 0, queued: 0, filtered: 0, dropped: 0};
             window.myWsCounter = 0;
+            window.myWsDrain = function() {
+                var messagesCopy = {};
+                for (var id in window.myWsMessages) {
+                    var ring = window.myWsMessages[id];
+                    var out = new Array(ring.len);
+                    for (var i = 0; i < ring.len; i++) {
+                        var slot = (ring.start + i) % WS_CAPACITY;
+                        out[i] = ring.buf[slot];
+                        ring.buf[slot] = undefined;
+                    }
+                    ring.start = 0;
+                    ring.len = 0;
+                    messagesCopy[id] = out;
+                }
+                return messagesCopy;
+            };
             const OriginalWebSocket = window.WebSocket;
             window.WebSocket = function(url, protocols) {
                 const ws = protocols ? new OriginalWebSocket(url, protocols) : new OriginalWebSocket(url);
                 ws._id = window.myWsCounter++;
                 window.myWebSockets[ws._id] = ws;
-                window.myWsMessages[ws._id] = [];
+                const ring = window.myWsMessages[ws._id] = {buf: new Array(WS_CAPACITY), start: 0, len: 0};
                 ws.addEventListener('message', function(event) {
                     let message = event.data;
                     let parsed = null;
+                    window.myWsStats.received++;
                     try {
                         let commaIndex = message.indexOf(',');
                         if (commaIndex > -1) {
@@ -119,7 +310,25 @@ class DriverAdapter:
                     } catch(e) {
                         parsed = message;
                     }
-                    window.myWsMessages[ws._id].push(parsed);
+                    if (!Array.isArray(parsed)) {
+                        window.myWsStats.filtered++;
+                        return;
+                    }
+                    window.myWsEventCounts[parsed[0]] = (window.myWsEventCounts[parsed[0]] || 0) + 1;
+                    if (!WS_ALLOWLIST.has(parsed[0])) {
+                        window.myWsStats.filtered++;
+                        return;
+                    }
+                    if (ring.len < WS_CAPACITY) {
+                        ring.buf[(ring.start + ring.len) % WS_CAPACITY] = parsed;
+                        ring.len++;
+                    } else {
+                        // full: overwrite the oldest frame
+                        ring.buf[ring.start] = parsed;
+                        ring.start = (ring.start + 1) % WS_CAPACITY;
+                        window.myWsStats.dropped++;
+                    }
+                    window.myWsStats.queued++;
                 });
                 return ws;
             };
@@ -130,8 +339,18 @@ class DriverAdapter:
             window.WebSocket.CLOSED = OriginalWebSocket.CLOSED;
         }
         """
+        ws_injection_script = ws_injection_script.replace(
+            "__WS_ALLOWLIST__", json.dumps(WS_EVENT_ALLOWLIST)
+        ).replace("__WS_CAPACITY__", str(WS_RING_CAPACITY))
         self.driver.execute_cdp_cmd("Page.addScriptToEvaluateOnNewDocument", {"source": ws_injection_script})
 
+    def get_ws_stats(self):
+        """Return the page's frame counters: received, queued, filtered and dropped."""
+        try:
+            return self.driver.execute_script("return window.myWsStats || null;")
+        except Exception:
+            return None
+
     def inject_auto_close_alerts(self):
         """Inject JavaScript to automatically close alerts and popups."""
         alert_injection_script = """
@@ -153,22 +372,26 @@ class DriverAdapter:
     def process_ws_events(self):
         """Process WebSocket messages and trigger event handlers."""
         try:
-            ws_messages = self.driver.execute_script("""
-                var messagesCopy = {};
-                for (var id in window.myWsMessages) {
-                    messagesCopy[id] = window.myWsMessages[id].slice();
-                    window.myWsMessages[id] = [];
-                }
-                return messagesCopy;
-            """)
-        except Exception as _:
+            with WS_DRAIN_SECONDS.time():
+                ws_messages = self.driver.execute_script("return window.myWsDrain ? window.myWsDrain() : {};")
+        except Exception as e:
+            # BrowserWatchdog recycles the browser when these keep failing
+            self.ws_failures += 1
+            self.consecutive_ws_failures += 1
+            WS_DRAIN_FAILURES.inc()
+            if self.consecutive_ws_failures == 1:
+                ws_logger.info(f"DRAIN_ERROR: {e}")
             return
+        self.consecutive_ws_failures = 0
+        if self.recorder is not None:
+            self.recorder.record_frames(ws_messages)
         
         for msg_key, msgs in ws_messages.items():
             for msg in msgs:
-                ws_logger.info(f"RECV: ({msg_key}) {msg}")
+                ws_logger.info("RECV: (%s) %s", msg_key, msg, extra={"event_type": msg[0] if msg else None})
                 if isinstance(msg, list) and len(msg) >= 2:
                     event_type, event_details = msg[0], msg[1]
+                    WS_FRAMES.inc(event=event_type)
                     event_key = f"ws_{event_type}"
                     if event_key in self.event_handlers:
                         try:
@@ -178,6 +401,38 @@ class DriverAdapter:
                     elif event_key == "ws_you":
                         self.my_id = event_details
 
+    def get_event_count(self, event_type):
+        """Return how many event_type frames the page has received so far."""
+        try:
+            return self.driver.execute_script(
+                "return (window.myWsEventCounts || {})[arguments[0]] || 0;", event_type
+            )
+        except Exception:
+            return None
+
+    def wait_for_event(self, event_type, count_before, timeout):
+        """Wait until the page receives an event_type frame.
+
+        count_before is get_event_count(event_type) from before the request was
+        sent. Frames are only counted, not consumed, so the regular
+        process_ws_events pass still dispatches them. Returns True if the
+        event arrived within timeout seconds.
+
+        If count_before is None (the page couldn't be read) the first count
+        read here becomes the baseline, so an ack that arrived before it is
+        missed and the wait runs to the timeout rather than passing unchecked.
+        """
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            count = self.get_event_count(event_type)
+            if count is not None:
+                if count_before is None:
+                    count_before = count
+                elif count != count_before:
+                    return True
+            time.sleep(ACK_POLL_INTERVAL)
+        return False
+
     def get_ws_ids(self):
         """Return list of injected WebSocket IDs if available."""
         try:
@@ -207,7 +462,7 @@ class DriverAdapter:
 
     def send_ws_message(self, contents: list):
         """Send WebSocket message to TagPro."""
-        ws_logger.info(f"SEND: {contents}")
+        ws_logger.info("SEND: %s", contents)
         try:
             ws_ids = self.driver.execute_script("return Object.keys(window.myWebSockets || {});")
             if not ws_ids:
@@ -244,6 +499,43 @@ class DriverAdapter:
         except JavascriptException as e:
             print("TODO: LOOK INTO THIS", e)
 
+    def send_ws_batch(self, contents_list, interval):
+        """Send several WebSocket messages in a single browser round-trip.
+
+        The first message goes out immediately and the rest are spaced
+        interval seconds apart by the page itself. Returns True if the batch
+        was handed to an open group socket.
+        """
+        for contents in contents_list:
+            ws_logger.info("SEND: %s", contents)
+        try:
+            status = self.driver.execute_script(
+                """
+                var ids = Object.keys(window.myWebSockets || {});
+                if (!ids.length) return "no websocket";
+                if (!window.location.href.startsWith(arguments[0])) return "not on groups page";
+                var groupId = window.location.pathname.replace(/\\/+$/, '').split('/').pop();
+                var ws = window.myWebSockets[ids[ids.length - 1]];
+                if (!ws || ws.readyState !== WebSocket.OPEN) return "websocket not open";
+                var payloads = arguments[1], intervalMs = arguments[2] * 1000;
+                payloads.forEach(function(payload, i) {
+                    var frame = '42/groups/' + groupId + ',' + payload;
+                    setTimeout(function() {
+                        if (ws.readyState === WebSocket.OPEN) ws.send(frame);
+                    }, i * intervalMs);
+                });
+                return "ok";
+                """,
+                GROUPS_URL, [json.dumps(contents) for contents in contents_list], interval
+            )
+        except Exception as e:
+            print(f"WebSocket batch send failed: {e}")
+            return False
+        if status != "ok":
+            print(f"DEBUG: Batch of {len(contents_list)} messages not sent: {status}")
+            return False
+        return True
+
     def get_lobby_players(self):
         """Get current lobby players organized by team."""
         teams = ["red-team", "blue-team", "spectators", "waiting"]
@@ -259,6 +551,8 @@ class DriverAdapter:
                 }});
             """)
         
+        if self.recorder is not None:
+            self.recorder.record_dom("lobby_players", lobby_players)
         return lobby_players
 
     def find_elements(self, css_selector: str):
@@ -268,18 +562,33 @@ class DriverAdapter:
     def is_game_active(self):
         """Return True if the join-game button is displayed."""
         join_game_btns = self.find_elements("#join-game-btn")
-        return any(b.is_displayed() for b in join_game_btns)
+        active = any(b.is_displayed() for b in join_game_btns)
+        if self.recorder is not None:
+            self.recorder.record_dom("game_active", active)
+        return active
 
-    def send_chat_msg(self, text: str):
-        """Send chat message, splitting on newlines."""
-        for line in text.split("\n"):
-            self.send_ws_message(["chat", line])
+    def send_chat_msg(self, text: str, priority=CHAT_PRIORITY_NORMAL):
+        """Queue a chat message (one chat line per text line) and try to send it."""
+        self.chat_queue.put(text, priority)
+        self.flush_chat()
+
+    def _send_chat_lines(self, lines, interval):
+        return self.send_ws_batch([["chat", line] for line in lines], interval)
+
+    def flush_chat(self):
+        """Send the next batch of queued chat lines, if pacing allows."""
+        return self.chat_queue.flush()
 
     def get_game_uuid(self):
         """Extract game UUID from client info."""
         for _ in range(5):
             client_info = self.driver.execute_script("return tagpro.clientInfo;")
             if client_info is not None:
-                return client_info["gameUuid"]
+                game_uuid = client_info["gameUuid"]
+                break
             time.sleep(1)
-        return None
+        else:
+            game_uuid = None
+        if self.recorder is not None:
+            self.recorder.record_dom("game_uuid", game_uuid)
+        return game_uuid
@@ -0,0 +1,92 @@
+import os
+import time
+
+from driver_adapter import DriverAdapter
+from tagpro_bot import TagproBot, event_logger
+from upload_queue import ReplayUploadQueue
+from ws_recorder import WsRecorder
+from browser_watchdog import BrowserWatchdog
+from state_snapshot import StateSnapshots
+from constants import GROUPS, MAX_GROUPS, PERIODIC_MESSAGE_INTERVAL, RECORDING_DIR, STATE_SNAPSHOT_INTERVAL
+
+
+class GroupOrchestrator:
+    """Runs several TagPro groups from one process.
+
+    Every group gets its own TagproBot (settings, rotation, chat) driving its
+    own tab of a single shared Chrome. The map catalog and world record cache
+    are module-level and the replay upload queue is shared, so each extra
+    group only costs a tab. Groups are ticked round-robin once per second.
+    """
+
+    def __init__(self, group_configs=GROUPS):
+        if not group_configs:
+            raise ValueError("No groups configured")
+        if len(group_configs) > MAX_GROUPS:
+            raise ValueError(f"{len(group_configs)} groups configured, at most {MAX_GROUPS} are allowed")
+
+        self.upload_queue = ReplayUploadQueue()
+        self.bots = []
+        tabs = None
+        for config in group_configs:
+            recorder = None
+            if RECORDING_DIR:
+                recorder = WsRecorder(os.path.join(RECORDING_DIR, f"{config['name']}-{int(time.time())}.ndjson.gz"))
+            adapter = DriverAdapter(tabs=tabs, recorder=recorder)
+            tabs = adapter.tabs
+            self.bots.append(TagproBot(adapter, upload_queue=self.upload_queue, group_config=config))
+        self.watchdog = BrowserWatchdog(self.bots)
+        self.snapshots = StateSnapshots()
+        self.resume_state()
+
+    def resume_state(self):
+        """Restore each group from the last snapshot, if it's recent enough."""
+        states = self.snapshots.load()
+        for bot in self.bots:
+            if bot.name in states:
+                try:
+                    bot.resume(states[bot.name])
+                except Exception as e:
+                    event_logger.info(f"RESUME: {bot.name} state not restored: {e}")
+
+    def save_state(self):
+        """Snapshot every group's state; the file is only rewritten when it changed."""
+        self.snapshots.save({bot.name: bot.export_state() for bot in self.bots})
+
+    def stats(self):
+        """Return per-group stats plus the shared upload queue's."""
+        return {
+            "groups": [bot.stats() for bot in self.bots],
+            "upload_queue": self.upload_queue.stats(),
+            "browser": self.watchdog.stats(),
+        }
+
+    def tick(self, i):
+        """Tick every group once. A failing group doesn't stop the others."""
+        try:
+            self.watchdog.tick(i)
+        except Exception as e:
+            # e.g. the new browser failed to start; the next check tries again
+            event_logger.info(f"WATCHDOG: recycle failed: {e}")
+        for bot in self.bots:
+            try:
+                bot.tick(i)
+            except Exception as e:
+                event_logger.info(f"GROUP_ERROR: {bot.name} tick failed: {e}")
+        if i % STATE_SNAPSHOT_INTERVAL == 0:
+            try:
+                self.save_state()
+            except Exception as e:
+                event_logger.info(f"STATE: snapshot failed: {e}")
+
+    def run(self):
+        """Main loop for all groups."""
+        i = 1
+        while True:
+            start = time.time()
+            self.tick(i)
+            if i % PERIODIC_MESSAGE_INTERVAL == 0:
+                event_logger.info(f"Orchestrator stats: {self.stats()}")
+            # keep roughly one tick per second no matter how many groups there are
+            time.sleep(max(0.0, 1 - (time.time() - start)))
+            i += 1
@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+"""
+Compare Chrome's memory and page-load time with and without lean mode.
+"""
+
+import argparse
+import json
+import time
+
+from driver_adapter import DriverAdapter
+from constants import GROUPS_URL
+
+
+def measure(lean, url, settle):
+    """Start a fresh browser, load url, wait settle seconds and report its resources."""
+    adapter = DriverAdapter(lean=lean)
+    try:
+        start = time.time()
+        adapter.driver.get(url)
+        get_seconds = time.time() - start
+        time.sleep(settle)
+        return dict(adapter.get_browser_resources(), get_seconds=round(get_seconds, 2))
+    finally:
+        adapter.tabs.driver.quit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip())
+    parser.add_argument("--url", default=GROUPS_URL)
+    parser.add_argument("--settle", type=float, default=10, help="seconds to wait before sampling memory")
+    args = parser.parse_args()
+
+    results = [measure(lean, args.url, args.settle) for lean in (False, True)]
+    for result in results:
+        print(json.dumps(result))
+    full, lean = results
+    if full["rss_mb"] and lean["rss_mb"]:
+        print(f"RSS: {full['rss_mb']} MB -> {lean['rss_mb']} MB ({100 * (1 - lean['rss_mb'] / full['rss_mb']):.0f}% less)")
+    if full["page_load_ms"] and lean["page_load_ms"]:
+        print(f"Page load: {full['page_load_ms']} ms -> {lean['page_load_ms']} ms")
+
+
+if __name__ == '__main__':
+    main()
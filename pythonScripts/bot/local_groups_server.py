@@ -0,0 +1,453 @@
+import argparse
+import asyncio
+import base64
+import hashlib
+import itertools
+import json
+import random
+import struct
+import time
+import uuid
+from collections import deque
+
+from constants import (
+    LOCAL_SERVER_PORT, SIM_PLAYERS_PER_GROUP, SIM_JOIN_INTERVAL, SIM_CHAT_INTERVAL,
+    SIM_GAME_SECONDS, SIM_CHAT_LINES
+)
+
+
+WS_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+COMMAND_LINES = {"MAP", "HELP"}
+
+
+class WebSocket:
+    """Just enough of RFC 6455 for text frames between the page and the server."""
+
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+        self.closed = False
+
+    @staticmethod
+    def accept_key(key):
+        return base64.b64encode(hashlib.sha1((key + WS_GUID).encode()).digest()).decode()
+
+    async def recv(self):
+        """Return the next text message, or None once the socket is closed."""
+        while not self.closed:
+            try:
+                head = await self.reader.readexactly(2)
+                opcode, length = head[0] & 0x0F, head[1] & 0x7F
+                if length == 126:
+                    length = struct.unpack("!H", await self.reader.readexactly(2))[0]
+                elif length == 127:
+                    length = struct.unpack("!Q", await self.reader.readexactly(8))[0]
+                mask = await self.reader.readexactly(4) if head[1] & 0x80 else None
+                payload = await self.reader.readexactly(length)
+            except (asyncio.IncompleteReadError, ConnectionError):
+                self.closed = True
+                return None
+            if mask:
+                payload = bytes(b ^ mask[i % 4] for i, b in enumerate(payload))
+            if opcode == 0x8:
+                self.closed = True
+                return None
+            if opcode == 0x9:
+                self._write_frame(0xA, payload)
+                continue
+            if opcode in (0x1, 0x0):
+                return payload.decode("utf-8", "replace")
+        return None
+
+    def _write_frame(self, opcode, payload):
+        length = len(payload)
+        if length < 126:
+            header = struct.pack("!BB", 0x80 | opcode, length)
+        elif length < 1 << 16:
+            header = struct.pack("!BBH", 0x80 | opcode, 126, length)
+        else:
+            header = struct.pack("!BBQ", 0x80 | opcode, 127, length)
+        self.writer.write(header + payload)
+
+    async def send(self, text):
+        if self.closed:
+            return
+        try:
+            self._write_frame(0x1, text.encode())
+            await self.writer.drain()
+        except ConnectionError:
+            self.closed = True
+
+
+def _percentile(samples, q):
+    if not samples:
+        return None
+    samples = sorted(samples)
+    return samples[int(q * (len(samples) - 1))]
+
+
+class Group:
+    """One emulated group: members, settings and the current game."""
+
+    def __init__(self, group_id, name):
+        self.id = group_id
+        self.name = name
+        self.members = {}
+        self.sockets = {}
+        self.settings = {}
+        self.game_id = None
+        self.game_uuid = None
+        self.game_task = None
+
+        # Lobby-handling latency as seen by the players
+        self.ready_since = None
+        self.launch_latencies = []
+        self.pending_commands = deque()
+        self.chat_latencies = []
+        self.games_started = 0
+        self.games_finished = 0
+        self.frames_in = 0
+        self.frames_out = 0
+
+    @property
+    def red_count(self):
+        return sum(1 for m in self.members.values() if m["team"] == 1)
+
+    async def emit(self, member_id, event, data):
+        ws = self.sockets.get(member_id)
+        if ws is not None:
+            self.frames_out += 1
+            await ws.send(f"42/groups/{self.id},{json.dumps([event, data])}")
+
+    async def broadcast(self, event, data):
+        for member_id in list(self.sockets):
+            await self.emit(member_id, event, data)
+
+    async def add_member(self, member, ws=None):
+        self.members[member["id"]] = member
+        if ws is not None:
+            self.sockets[member["id"]] = ws
+            await self.emit(member["id"], "you", member["id"])
+            for other in self.members.values():
+                await self.emit(member["id"], "member", other)
+        await self.broadcast("member", member)
+        await self.broadcast("chat", {"from": None, "to": "all", "message": f"{member['name']} has joined the group"})
+
+    async def remove_member(self, member_id):
+        self.members.pop(member_id, None)
+        self.sockets.pop(member_id, None)
+        await self.broadcast("removed", {"id": member_id})
+        self._update_ready()
+
+    async def set_team(self, member_id, team):
+        member = self.members.get(member_id)
+        if member is None:
+            return
+        member["team"] = team
+        await self.broadcast("member", member)
+        self._update_ready()
+
+    def _update_ready(self):
+        if self.red_count and self.ready_since is None and self.game_id is None:
+            self.ready_since = time.time()
+        elif not self.red_count:
+            self.ready_since = None
+
+    async def chat(self, member_id, message):
+        member = self.members.get(member_id)
+        if member is None:
+            return
+        now = time.time()
+        if member_id in self.sockets and self.pending_commands:
+            # a reply from the bot answers the oldest pending command
+            self.chat_latencies.append(now - self.pending_commands.popleft())
+        elif member_id not in self.sockets and message in COMMAND_LINES:
+            self.pending_commands.append(now)
+        await self.broadcast("chat", {"from": member["name"], "to": "all", "message": message, "id": member_id})
+
+    async def handle(self, member_id, event, data):
+        """Apply a frame sent by a connected client."""
+        self.frames_in += 1
+        if event == "setting":
+            self.settings[data["name"]] = data["value"]
+            if data["name"] == "groupName":
+                self.name = data["value"]
+            await self.broadcast("setting", data)
+        elif event == "groupPresetApply":
+            self.settings["preset"] = data
+            await self.broadcast("setting", {"name": "preset", "value": data})
+        elif event == "team":
+            await self.set_team(data["id"], data["team"])
+        elif event == "chat":
+            await self.chat(member_id, data)
+        elif event == "kick":
+            await self.remove_member(data)
+        elif event == "groupPlay":
+            await self.start_game()
+        elif event == "endGame":
+            # end_game paces its events, don't hold up this client's frames
+            asyncio.ensure_future(self.end_game())
+
+    async def start_game(self):
+        if self.game_id is not None:
+            return
+        if not self.red_count:
+            await self.broadcast("chat", {"from": None, "to": "all", "message": "Please move some or all players to one of the teams and try again."})
+            return
+        if self.ready_since is not None:
+            self.launch_latencies.append(time.time() - self.ready_since)
+            self.ready_since = None
+        self.games_started += 1
+        self.game_id = f"game-{self.id}-{self.games_started}"
+        self.game_uuid = str(uuid.uuid4())
+        await self.broadcast("game", {"gameId": None})
+        await self.broadcast("game", {"gameId": self.game_id})
+        self.game_task = asyncio.ensure_future(self._finish_game_later())
+
+    async def _finish_game_later(self):
+        await asyncio.sleep(random.uniform(0.5, 1.5) * SIM_GAME_SECONDS)
+        await self.end_game()
+
+    async def end_game(self):
+        if self.game_id is None:
+            return
+        if self.game_task is not None and self.game_task is not asyncio.current_task():
+            self.game_task.cancel()
+        self.game_task = None
+        self.game_id = None
+        self.games_finished += 1
+        # the real server keeps reporting no game; the bot needs a few of these to notice the end
+        for _ in range(5):
+            await self.broadcast("game", {"gameId": None})
+            await asyncio.sleep(1)
+        self._update_ready()
+
+    def stats(self):
+        return {
+            "name": self.name,
+            "members": len(self.members),
+            "red": self.red_count,
+            "games_started": self.games_started,
+            "games_finished": self.games_finished,
+            "frames_in": self.frames_in,
+            "frames_out": self.frames_out,
+            "launch_latency_avg": sum(self.launch_latencies) / len(self.launch_latencies) if self.launch_latencies else None,
+            "launch_latency_p95": _percentile(self.launch_latencies, 0.95),
+            "chat_latency_avg": sum(self.chat_latencies) / len(self.chat_latencies) if self.chat_latencies else None,
+            "chat_latency_p95": _percentile(self.chat_latencies, 0.95),
+        }
+
+
+class SimulatedLobby:
+    """Fake players who join a group, ready up, chat and finish games."""
+
+    def __init__(self, group, players=SIM_PLAYERS_PER_GROUP, join_interval=SIM_JOIN_INTERVAL, chat_interval=SIM_CHAT_INTERVAL):
+        self.group = group
+        self.players = players
+        self.join_interval = join_interval
+        self.chat_interval = chat_interval
+
+    async def run(self):
+        ids = []
+        for n in range(self.players):
+            await asyncio.sleep(self.join_interval)
+            member = {"id": f"sim-{self.group.id}-{n}", "name": f"Some Ball {n + 1}", "team": 0, "location": "page", "auth": False}
+            await self.group.add_member(member)
+            await self.group.set_team(member["id"], 1)
+            ids.append(member["id"])
+        while self.chat_interval:
+            await asyncio.sleep(random.expovariate(1 / self.chat_interval))
+            member_id = random.choice(ids)
+            if member_id in self.group.members:
+                await self.group.chat(member_id, random.choice(SIM_CHAT_LINES))
+
+
+GROUPS_PAGE = """<!DOCTYPE html>
+<html><head><title>TagPro Groups</title></head><body>
+<h1>Groups</h1>
+<button id="create-group-btn" onclick="location.href='/groups/create'">Create Group</button>
+{groups}
+</body></html>"""
+
+GROUP_ITEM = """<div class="group-item"><span class="group-name">{name}</span>
+<a class="btn btn-primary pull-right" href="/groups/{id}">Join</a></div>"""
+
+GROUP_PAGE = """<!DOCTYPE html>
+<html><head><title>TagPro Group</title></head><body>
+<button id="join-game-btn" style="display: none" onclick="location.href='/game'">Join Game</button>
+<button id="pug-btn">PUG</button>
+<div id="red-team"><ul></ul></div>
+<div id="blue-team"><ul></ul></div>
+<div id="spectators"><ul></ul></div>
+<div id="waiting"><ul></ul></div>
+<script>
+var groupId = location.pathname.split('/').filter(Boolean).pop();
+var teams = {0: "waiting", 1: "red-team", 2: "blue-team", 3: "spectators"};
+var members = {};
+function render() {
+    for (var team in teams) document.querySelector('#' + teams[team] + ' ul').innerHTML = '';
+    for (var id in members) {
+        var m = members[id], li = document.createElement('li');
+        li.className = 'player-item';
+        li.innerHTML = '<span class="player-name"></span> <span class="player-location"></span>';
+        li.querySelector('.player-name').innerText = m.name;
+        li.querySelector('.player-location').innerText = m.location;
+        document.querySelector('#' + (teams[m.team] || 'waiting') + ' ul').appendChild(li);
+    }
+}
+var ws = new WebSocket((location.protocol === 'https:' ? 'wss://' : 'ws://') + location.host + '/socket.io/?EIO=4&transport=websocket');
+ws.onopen = function() { ws.send('40/groups/' + groupId + ','); };
+ws.onmessage = function(event) {
+    var m = event.data;
+    if (m === '2') { ws.send('3'); return; }
+    if (m.indexOf('42/groups/') !== 0) return;
+    var p = JSON.parse(m.substring(m.indexOf(',') + 1));
+    if (p[0] === 'member') { members[p[1].id] = p[1]; render(); }
+    else if (p[0] === 'removed') { delete members[p[1].id]; render(); }
+    else if (p[0] === 'game') { document.getElementById('join-game-btn').style.display = p[1].gameId ? '' : 'none'; }
+};
+</script>
+</body></html>"""
+
+GAME_PAGE = """<!DOCTYPE html>
+<html><head><title>TagPro</title></head><body>
+<script>window.tagpro = {{clientInfo: {client_info}}};</script>
+</body></html>"""
+
+
+class LocalGroupsServer:
+    """Stand-in for the TagPro groups site, for running the bot offline.
+
+    Serves a groups list, group pages with the elements DriverAdapter and
+    TagproBot look for, and a socket.io-style WebSocket that speaks the group
+    events the bot uses (setting, team, groupPresetApply, groupPlay, chat,
+    kick, endGame in; you, member, removed, setting, chat, game out). Every
+    new group gets a SimulatedLobby. Start the bot with
+    TAGPRO_BASE_URL=http://localhost:<port> to point it here.
+    """
+
+    def __init__(self, players=SIM_PLAYERS_PER_GROUP, join_interval=SIM_JOIN_INTERVAL, chat_interval=SIM_CHAT_INTERVAL):
+        self.players = players
+        self.join_interval = join_interval
+        self.chat_interval = chat_interval
+        self.groups = {}
+        self._ids = itertools.count(1)
+        self._tasks = []
+
+    def create_group(self, name=None):
+        group_id = f"g{next(self._ids)}"
+        group = self.groups[group_id] = Group(group_id, name or f"Group {group_id}")
+        if self.players:
+            lobby = SimulatedLobby(group, self.players, self.join_interval, self.chat_interval)
+            self._tasks.append(asyncio.ensure_future(lobby.run()))
+        return group
+
+    def stats(self):
+        return {"groups": {group_id: group.stats() for group_id, group in self.groups.items()}}
+
+    async def handle_connection(self, reader, writer):
+        try:
+            request = await reader.readuntil(b"\r\n\r\n")
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+            writer.close()
+            return
+        lines = request.decode("latin-1").split("\r\n")
+        method, target = lines[0].split(" ")[:2]
+        headers = {}
+        for line in lines[1:]:
+            if ":" in line:
+                key, value = line.split(":", 1)
+                headers[key.strip().lower()] = value.strip()
+        path = target.split("?")[0]
+
+        if path.startswith("/socket.io/") and headers.get("upgrade", "").lower() == "websocket":
+            await self._handle_socket(reader, writer, headers)
+            return
+        status, content_type, body, extra = self._route(method, path, headers)
+        head = f"HTTP/1.1 {status}\r\nContent-Type: {content_type}\r\nContent-Length: {len(body)}\r\nConnection: close\r\n{extra}\r\n"
+        writer.write(head.encode() + body)
+        try:
+            await writer.drain()
+        finally:
+            writer.close()
+
+    def _route(self, method, path, headers):
+        html = "text/html; charset=utf-8"
+        if path in ("/groups", "/groups/"):
+            items = "\n".join(GROUP_ITEM.format(id=g.id, name=g.name) for g in self.groups.values())
+            return "200 OK", html, GROUPS_PAGE.format(groups=items).encode(), ""
+        if path == "/groups/create":
+            group = self.create_group()
+            return "302 Found", html, b"", f"Location: /groups/{group.id}\r\n"
+        if path.startswith("/groups/") and path.strip("/").split("/")[-1] in self.groups:
+            return "200 OK", html, GROUP_PAGE.encode(), ""
+        if path == "/game":
+            # the join button links here from the group page, so the referer names the group
+            referer = headers.get("referer", "").split("?")[0].rstrip("/")
+            group = self.groups.get(referer.split("/")[-1]) if "/groups/" in referer else None
+            game_uuid = group.game_uuid if group is not None else None
+            client_info = json.dumps({"gameUuid": game_uuid}) if game_uuid else "null"
+            return "200 OK", html, GAME_PAGE.format(client_info=client_info).encode(), ""
+        if path == "/stats":
+            return "200 OK", "application/json", json.dumps(self.stats(), indent=2).encode(), ""
+        return "404 Not Found", "text/plain", b"not found", ""
+
+    async def _handle_socket(self, reader, writer, headers):
+        accept = WebSocket.accept_key(headers.get("sec-websocket-key", ""))
+        writer.write((
+            "HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+            f"Sec-WebSocket-Accept: {accept}\r\n\r\n"
+        ).encode())
+        ws = WebSocket(reader, writer)
+        sid = uuid.uuid4().hex
+        await ws.send("0" + json.dumps({"sid": sid, "upgrades": [], "pingInterval": 25000, "pingTimeout": 20000}))
+
+        group, member_id = None, f"bot-{sid[:8]}"
+        while True:
+            message = await ws.recv()
+            if message is None:
+                break
+            if message.startswith("40/groups/"):
+                group_id = message[len("40/groups/"):].rstrip(",")
+                group = self.groups.get(group_id)
+                if group is None:
+                    break
+                await ws.send(f"40/groups/{group_id}," + json.dumps({"sid": sid}))
+                await group.add_member({"id": member_id, "name": "Bot", "team": 0, "location": "page", "auth": True}, ws)
+            elif message.startswith("42/groups/") and group is not None:
+                try:
+                    event, *data = json.loads(message[message.index(",") + 1:])
+                    await group.handle(member_id, event, data[0] if data else None)
+                except (ValueError, KeyError, TypeError) as e:
+                    print(f"Bad frame from {member_id}: {message[:200]} ({e})")
+        if group is not None:
+            await group.remove_member(member_id)
+        writer.close()
+
+    async def serve(self, host="127.0.0.1", port=LOCAL_SERVER_PORT, stats_interval=60):
+        server = await asyncio.start_server(self.handle_connection, host, port)
+        print(f"Local groups server on http://{host}:{port}/groups/ (stats at /stats)")
+        async with server:
+            while True:
+                await asyncio.sleep(stats_interval)
+                print(json.dumps(self.stats()))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a local stand-in for the TagPro groups site.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=LOCAL_SERVER_PORT)
+    parser.add_argument("--players", type=int, default=SIM_PLAYERS_PER_GROUP, help="simulated players per group")
+    parser.add_argument("--join-interval", type=float, default=SIM_JOIN_INTERVAL)
+    parser.add_argument("--chat-interval", type=float, default=SIM_CHAT_INTERVAL, help="0 disables simulated chat")
+    args = parser.parse_args()
+
+    server = LocalGroupsServer(args.players, args.join_interval, args.chat_interval)
+    try:
+        asyncio.run(server.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        print(json.dumps(server.stats(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
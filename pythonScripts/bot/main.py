@@ -4,19 +4,19 @@ Main entry point for the TagPro bot.
 This file orchestrates all the refactored components.
 """
 
-from driver_adapter import DriverAdapter
-from tagpro_bot import TagproBot
+from group_orchestrator import GroupOrchestrator
+import metrics
 
 
 def main():
     """Main function to start the TagPro bot."""
     try:
-        # Initialize the WebDriver adapter
-        adapter = DriverAdapter()
-        
-        # Create and run the bot
-        bot = TagproBot(adapter)
-        bot.run()
+        # Serve /metrics if BOT_METRICS_PORT is set
+        metrics.start_server()
+
+        # Start one browser tab and bot per configured group, then run them
+        orchestrator = GroupOrchestrator()
+        orchestrator.run()
         
     except KeyboardInterrupt:
         print("\nBot stopped by user.")
@@ -0,0 +1,92 @@
+from collections import OrderedDict
+
+from maps import get_maps
+from utils import default_float
+from constants import MAP_POOL_MAX_BALLS, MAP_POOL_CACHE_SIZE
+
+
+def min_balls_required(balls_req):
+    """Smallest ball count whose digits appear in the balls_req cell.
+
+    A map is legal for n ready balls when any of str(0)..str(n) is a
+    substring of balls_req, so this is the smallest n for which that holds
+    (None if there is none).
+    """
+    for n in range(MAP_POOL_MAX_BALLS + 1):
+        if str(n) in balls_req:
+            return n
+    return None
+
+
+def settings_key(settings):
+    """Normalize map settings into a hashable key.
+
+    Raises ValueError for difficulty bounds that aren't numbers.
+    """
+    category = settings["category"].lower() if settings["category"] else None
+    difficulty = None
+    if settings["difficulty"]:
+        difficulty = (float(settings["difficulty"][0] or 0.0), float(settings["difficulty"][1] or 100.0))
+    minfun = default_float(settings["minfun"], 0.0)
+    return category, difficulty, minfun
+
+
+class MapPool:
+    """The map catalog pre-bucketed into typed fields, with cached legal pools.
+
+    Each map's category, difficulty, fun and minimum ball count are parsed
+    once per catalog load, and the legal list for a given (settings, ready
+    balls) pair is computed once and then served from cache until get_maps
+    returns a new catalog.
+    """
+
+    def __init__(self):
+        self._catalog = None
+        self._entries = []
+        self._pools = OrderedDict()
+
+    def _sync_catalog(self):
+        """Rebuild the typed entries when get_maps returns a new catalog."""
+        maps = get_maps()
+        if maps is self._catalog:
+            return
+        self._catalog = maps
+        self._entries = [
+            (
+                m,
+                m["category"].lower(),
+                default_float(m["difficulty"], 10),
+                default_float(m["fun"], 100),
+                min_balls_required(m["balls_req"]),
+            )
+            for m in maps
+        ]
+        self._pools.clear()
+
+    def _filter(self, key, num_balls):
+        category, difficulty, minfun = key
+        return [
+            m for m, m_category, m_difficulty, m_fun, m_min_balls in self._entries
+            if (category is None or category in m_category)
+            and (difficulty is None or difficulty[0] <= m_difficulty <= difficulty[1])
+            and m_fun >= minfun
+            and m_min_balls is not None and m_min_balls <= num_balls
+        ]
+
+    def get_legal_maps(self, settings, num_ready_balls):
+        """Return maps legal with settings and number of ready players."""
+        self._sync_catalog()
+        cache_key = (settings_key(settings), min(num_ready_balls or 1, MAP_POOL_MAX_BALLS))
+        pool = self._pools.get(cache_key)
+        if pool is None:
+            pool = self._filter(*cache_key)
+            self._pools[cache_key] = pool
+            if len(self._pools) > MAP_POOL_CACHE_SIZE:
+                self._pools.popitem(last=False)
+        else:
+            self._pools.move_to_end(cache_key)
+        return pool
+
+
+# Shared by every settings manager, the catalog is the same for all groups
+map_pool = MapPool()
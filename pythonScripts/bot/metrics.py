@@ -0,0 +1,210 @@
+import bisect
+import threading
+import time
+from functools import wraps
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from constants import METRICS_PORT, METRICS_BUCKETS
+
+
+# Metrics are only collected when METRICS_PORT is set; otherwise every
+# constructor below returns the shared no-op metric and timed() returns the
+# function untouched, so instrumented code pays (almost) nothing.
+enabled = METRICS_PORT is not None
+
+_registry = []
+_lock = threading.Lock()
+
+
+def _label_key(labels):
+    return tuple(sorted(labels.items()))
+
+
+def _format_labels(key, extra=()):
+    pairs = list(key) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, value in pairs)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + "}"
+
+
+class Counter:
+    """Monotonic count, optionally split by labels."""
+
+    kind = "counter"
+
+    def __init__(self, name, help_text):
+        self.name = name
+        self.help = help_text
+        self.values = {}
+
+    def inc(self, amount=1, **labels):
+        key = _label_key(labels)
+        with _lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def render(self):
+        with _lock:
+            values = list(self.values.items())
+        return [f"{self.name}{_format_labels(key)} {value}" for key, value in values]
+
+
+class Gauge(Counter):
+    """Value that can go up and down, e.g. a queue depth."""
+
+    kind = "gauge"
+
+    def set(self, value, **labels):
+        with _lock:
+            self.values[_label_key(labels)] = value
+
+
+class _Timer:
+    def __init__(self, histogram, labels):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.start, **self.labels)
+        return False
+
+
+class Histogram:
+    """Distribution of observed values over fixed buckets."""
+
+    kind = "histogram"
+
+    def __init__(self, name, help_text, buckets=METRICS_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.buckets = tuple(sorted(buckets))
+        self.values = {}  # label key -> [count per bucket..., count above last bucket, sum]
+
+    def observe(self, value, **labels):
+        key = _label_key(labels)
+        i = bisect.bisect_left(self.buckets, value)
+        with _lock:
+            entry = self.values.get(key)
+            if entry is None:
+                entry = self.values[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            entry[i] += 1
+            entry[-1] += value
+
+    def time(self, **labels):
+        """Context manager observing the seconds spent in its block."""
+        return _Timer(self, labels)
+
+    def timed(self, func):
+        """Decorator observing the seconds spent in each call of func."""
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.observe(time.perf_counter() - start)
+        return wrapper
+
+    def render(self):
+        with _lock:
+            values = [(key, list(entry)) for key, entry in self.values.items()]
+        lines = []
+        for key, entry in values:
+            cumulative = 0
+            for bound, count in zip(self.buckets, entry):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{_format_labels(key, [('le', bound)])} {cumulative}")
+            cumulative += entry[len(self.buckets)]
+            lines.append(f"{self.name}_bucket{_format_labels(key, [('le', '+Inf')])} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(key)} {entry[-1]}")
+            lines.append(f"{self.name}_count{_format_labels(key)} {cumulative}")
+        return lines
+
+
+class _NullTimer:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+class _NullMetric:
+    """Stands in for every metric type when metrics are disabled."""
+
+    _timer = _NullTimer()
+
+    def inc(self, amount=1, **labels):
+        pass
+
+    def set(self, value, **labels):
+        pass
+
+    def observe(self, value, **labels):
+        pass
+
+    def time(self, **labels):
+        return self._timer
+
+    def timed(self, func):
+        return func
+
+
+_NULL = _NullMetric()
+
+
+def _register(metric):
+    _registry.append(metric)
+    return metric
+
+
+def counter(name, help_text):
+    return _register(Counter(name, help_text)) if enabled else _NULL
+
+
+def gauge(name, help_text):
+    return _register(Gauge(name, help_text)) if enabled else _NULL
+
+
+def histogram(name, help_text, buckets=METRICS_BUCKETS):
+    return _register(Histogram(name, help_text, buckets)) if enabled else _NULL
+
+
+def render():
+    """All registered metrics in the Prometheus text exposition format."""
+    lines = []
+    for metric in _registry:
+        lines.append(f"# HELP {metric.name} {metric.help}")
+        lines.append(f"# TYPE {metric.name} {metric.kind}")
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = render().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_server(port=METRICS_PORT, host="127.0.0.1"):
+    """Serve /metrics from a daemon thread. Does nothing when metrics are disabled."""
+    if not enabled:
+        return None
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    threading.Thread(target=server.serve_forever, name="metrics", daemon=True).start()
+    print(f"Serving metrics on http://{host}:{port}/metrics")
+    return server
@@ -0,0 +1,315 @@
+import argparse
+import contextlib
+import json
+import os
+import sys
+import tempfile
+import time
+from collections import Counter
+
+import chat_queue
+import command_router
+import tagpro_bot
+from chat_queue import ChatQueue
+from tagpro_bot import TagproBot
+from ws_recorder import load_recording
+from constants import GROUPS, GROUPS_URL, CHAT_PRIORITY_NORMAL
+
+
+class VirtualClock:
+    """Stands in for the time module while a recording is replayed.
+
+    time() follows the recording's timestamps and sleep() only advances the
+    clock, so timeouts such as GAME_END_TIMEOUT behave as they did live but
+    nothing actually waits. Everything else (perf_counter, ...) is real.
+    """
+
+    def __init__(self, start=0.0):
+        self.now = start
+
+    def time(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+    def advance_to(self, t):
+        self.now = max(self.now, t)
+
+    def __getattr__(self, name):
+        return getattr(time, name)
+
+
+@contextlib.contextmanager
+def use_clock(clock, modules=(tagpro_bot, chat_queue, command_router)):
+    """Point the bot modules' `time` at clock for the duration of the block."""
+    originals = [(module, module.time) for module in modules]
+    try:
+        for module, _ in originals:
+            module.time = clock
+        yield clock
+    finally:
+        for module, original in originals:
+            module.time = original
+
+
+class ReplayDriver:
+    """The few WebDriver attributes the bot reads, parked on the groups page."""
+
+    def __init__(self):
+        self.current_url = GROUPS_URL + "/replay"
+        self.title = "TagPro Groups"
+
+    def get(self, url):
+        self.current_url = url
+
+    def execute_script(self, script, *args):
+        return None
+
+    def find_elements(self, *args):
+        return []
+
+
+class UploadCollector:
+    """Upload queue stand-in that only remembers what was enqueued."""
+
+    def __init__(self, clock):
+        self.clock = clock
+        self.enqueued = []
+
+    def add_listener(self, listener):
+        pass
+
+    def start(self):
+        pass
+
+    def enqueue(self, game_uuid, source=None):
+        self.enqueued.append((self.clock.time(), game_uuid))
+
+    @property
+    def depth(self):
+        return 0
+
+    def stats(self):
+        return {"depth": 0, "enqueued": len(self.enqueued)}
+
+
+class ReplayAdapter:
+    """DriverAdapter replacement that feeds a WsRecorder recording to the handlers.
+
+    Each process_ws_events call delivers the next recorded drain. DOM reads
+    return the value recorded for them if it was read before the next drain,
+    otherwise the last known value. Everything sent is kept in `sent`.
+    """
+
+    def __init__(self, records, clock):
+        self.records = records
+        self.clock = clock
+        self.recorder = None
+        self.webdriver_calls = 0
+        self.my_id = None
+        self.event_handlers = {}
+        self.chat_queue = ChatQueue(self._send_chat_lines)
+        self.driver = ReplayDriver()
+        self.sent = []
+        self.dom = {
+            "lobby_players": {"red-team": [], "blue-team": [], "spectators": [], "waiting": []},
+            "game_active": False,
+            "game_uuid": None,
+        }
+        self.cursor = 0
+        self.frames = 0
+        self.event_counts = Counter()
+        self.latencies = {}
+
+    @property
+    def finished(self):
+        return self.cursor >= len(self.records)
+
+    def pending_dom(self):
+        """Names of the DOM reads recorded before the next drain."""
+        names = []
+        for _, kind, data in self.records[self.cursor:]:
+            if kind == "frames":
+                break
+            names.extend(data)
+        return names
+
+    def _dom(self, name):
+        for i in range(self.cursor, len(self.records)):
+            t, kind, data = self.records[i]
+            if kind == "frames":
+                break
+            if name in data:
+                # apply everything read up to here, in order
+                for _, _, earlier in self.records[self.cursor:i + 1]:
+                    self.dom.update(earlier)
+                self.cursor = i + 1
+                self.clock.advance_to(t)
+                break
+        return self.dom[name]
+
+    def process_ws_events(self):
+        """Deliver the next recorded drain to the event handlers."""
+        while not self.finished:
+            t, kind, data = self.records[self.cursor]
+            self.cursor += 1
+            self.clock.advance_to(t)
+            if kind == "dom":
+                self.dom.update(data)
+                continue
+            for msgs in data.values():
+                for msg in msgs:
+                    self._dispatch(msg)
+            return
+
+    def _dispatch(self, msg):
+        self.frames += 1
+        if not (isinstance(msg, list) and len(msg) >= 2):
+            return
+        event_type, event_details = msg[0], msg[1]
+        self.event_counts[event_type] += 1
+        event_key = f"ws_{event_type}"
+        if event_key in self.event_handlers:
+            start = time.perf_counter()
+            try:
+                self.event_handlers[event_key](event_details)
+            except Exception as e:
+                print(f"HANDLER_ERROR: {event_key} {e}")
+            self.latencies.setdefault(event_type, []).append(time.perf_counter() - start)
+        elif event_key == "ws_you":
+            self.my_id = event_details
+
+    def get_event_count(self, event_type):
+        return self.event_counts[event_type]
+
+    def wait_for_event(self, event_type, count_before, timeout):
+        # acks are only delivered by the next drain, so never block
+        return self.event_counts[event_type] != count_before
+
+    def get_ws_ids(self):
+        return ["0"]
+
+    def get_ws_debug_info(self):
+        return {"url": self.driver.current_url, "ws_ids": ["0"], "last_ready_state": 1, "on_groups": True}
+
+    def get_ws_stats(self):
+        return {"received": self.frames, "queued": self.frames, "filtered": 0, "dropped": 0}
+
+    def get_browser_resources(self):
+        return {"lean": False, "rss_mb": None, "page_load_ms": None}
+
+    def send_ws_message(self, contents):
+        self.sent.append((self.clock.time(), contents))
+
+    def send_ws_batch(self, contents_list, interval):
+        for contents in contents_list:
+            self.send_ws_message(contents)
+        return True
+
+    def get_lobby_players(self):
+        return self._dom("lobby_players")
+
+    def find_elements(self, css_selector):
+        return []
+
+    def is_game_active(self):
+        return self._dom("game_active")
+
+    def send_chat_msg(self, text, priority=CHAT_PRIORITY_NORMAL):
+        self.chat_queue.put(text, priority)
+        self.flush_chat()
+
+    def _send_chat_lines(self, lines, interval):
+        return self.send_ws_batch([["chat", line] for line in lines], interval)
+
+    def flush_chat(self):
+        return self.chat_queue.flush()
+
+    def get_game_uuid(self):
+        return self._dom("game_uuid")
+
+
+def _latency_summary(samples):
+    samples = sorted(samples)
+    return {
+        "count": len(samples),
+        "avg_ms": 1000 * sum(samples) / len(samples),
+        "p95_ms": 1000 * samples[int(0.95 * (len(samples) - 1))],
+        "max_ms": 1000 * samples[-1],
+    }
+
+
+def replay_recording(path, group_config=None, speed=None):
+    """Replay a recording through a real TagproBot and summarize what it did.
+
+    speed=None replays as fast as possible; otherwise recorded gaps are
+    slept through, divided by speed. The "games" and "uploads" entries only
+    depend on the recording, so they can be compared between runs to catch
+    regressions in game start/end detection.
+    """
+    records = load_recording(path)
+    clock = VirtualClock()
+    settings_dir = tempfile.mkdtemp(prefix="replay-")
+    group_config = dict(group_config or GROUPS[0], settings_file=os.path.join(settings_dir, "bot_settings.json"))
+
+    games = []
+    with use_clock(clock):
+        adapter = ReplayAdapter(records, clock)
+        uploads = UploadCollector(clock)
+        bot = TagproBot(adapter, upload_queue=uploads, group_config=group_config)
+
+        start = time.perf_counter()
+        while not adapter.finished:
+            if "game_uuid" in adapter.pending_dom():
+                # the live bot read the UUID from the game page during a tick
+                bot._handle_game_page()
+            last_t = clock.time()
+            was_active = bot.game_is_active
+            adapter.process_ws_events()
+            if speed:
+                time.sleep((clock.time() - last_t) / speed)
+            if bot.game_is_active and not was_active:
+                games.append({"started_at": clock.time(), "ended_at": None, "preset": bot.current_game_preset})
+            elif was_active and not bot.game_is_active and games:
+                games[-1]["ended_at"] = clock.time()
+        elapsed = time.perf_counter() - start
+
+    all_latencies = [s for samples in adapter.latencies.values() for s in samples]
+    return {
+        "recording": path,
+        "frames": adapter.frames,
+        "recorded_seconds": records[-1][0] if records else 0,
+        "replay_seconds": elapsed,
+        "frames_per_second": adapter.frames / elapsed if elapsed else None,
+        "handler_latency": {
+            "all": _latency_summary(all_latencies) if all_latencies else None,
+            **{event_type: _latency_summary(samples) for event_type, samples in adapter.latencies.items()},
+        },
+        "games": games,
+        "uploads": [game_uuid for _, game_uuid in uploads.enqueued],
+        "sent": len(adapter.sent),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a recorded group session through the bot's handlers.")
+    parser.add_argument("recording", help="a .ndjson.gz file written by WsRecorder")
+    parser.add_argument("--speed", type=float, default=None, help="replay N times faster than recorded (default: no waiting)")
+    parser.add_argument("--expect", help="JSON file with the expected games/uploads; exit 1 if they differ")
+    args = parser.parse_args()
+
+    summary = replay_recording(args.recording, speed=args.speed)
+    print(json.dumps(summary, indent=2))
+    if args.expect:
+        with open(args.expect) as f:
+            expected = json.load(f)
+        detected = {"games": summary["games"], "uploads": summary["uploads"]}
+        if detected != {"games": expected["games"], "uploads": expected["uploads"]}:
+            print("Game detection differs from expected")
+            sys.exit(1)
+        print("✓ Game detection matches expected")
+
+
+if __name__ == "__main__":
+    main()
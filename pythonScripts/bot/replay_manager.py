@@ -5,6 +5,14 @@ import os
 
 from maps import get_maps
 from constants import REPLAY_STATS_PATH
+from wr_cache import WorldRecordCache
+import metrics
+
+
+# Shared world record index, refreshed in the background
+wr_cache = WorldRecordCache()
+
+WR_ENTRY_SECONDS = metrics.histogram("bot_get_wr_entry_seconds", "Time to look up a map's world record")
 
 
 def process_replays():
@@ -102,60 +110,10 @@ def push_replay_stats_to_leaderboard(replay_stats_path):
     print("Push to leaderboard status code:", response.status_code)
 
 
-def get_wr_entry(map_id, replay_stats_path=REPLAY_STATS_PATH):
-    """load wr for map_id from external world records site"""
-    print(f"DEBUG: Looking for world record for map_id: {map_id}")
-    
-    try:
-        # Pull from external world records site
-        response = requests.get("https://worldrecords.bambitp.workers.dev/", timeout=10)
-        response.raise_for_status()
-        data = response.json()
-        print(f"DEBUG: Successfully loaded external world records, found {len(data)} entries")
-        
-        # Find entries for this map_id
-        map_entries = [entry for entry in data if entry["map_id"] == map_id and entry["record_time"]]
-        if not map_entries:
-            print(f"DEBUG: No world record found for map_id: {map_id}")
-            return None
-            
-        # Return the fastest time
-        fastest_entry = min(map_entries, key=lambda e: e["record_time"])
-        print(f"DEBUG: Found world record: {fastest_entry['record_time']}ms by {fastest_entry['capping_player']}")
-        return fastest_entry
-        
-    except requests.RequestException as e:
-        print(f"DEBUG: Failed to fetch from external site: {e}")
-        # Fallback to local file if external site is unavailable
-        print(f"DEBUG: Falling back to local file: {replay_stats_path}")
-        
-        for _ in range(10):
-            try:
-                data = json.load(open(replay_stats_path))
-                print(f"DEBUG: Successfully loaded local replay stats, found {len(data)} entries")
-            except json.decoder.JSONDecodeError:
-                print(f"DEBUG: JSON decode error, retrying...")
-                time.sleep(0.1)
-                continue
-            except FileNotFoundError:
-                print(f"DEBUG: Local file not found: {replay_stats_path}")
-                return None
-            break
-
-        if isinstance(data, dict):
-            data_iter = data.values()
-        elif isinstance(data, list):
-            data_iter = data
-        else:
-            raise TypeError("Unexpected data format in replay_stats.json")
-
-        map_entries = [entry for entry in data_iter if entry["map_id"] == map_id and entry["record_time"]]
-        if not map_entries:
-            return None
-        return min(
-            map_entries,
-            key=lambda e: e["record_time"]
-        )
+@WR_ENTRY_SECONDS.timed
+def get_wr_entry(map_id):
+    """load wr for map_id from the cached world records index"""
+    return wr_cache.get(map_id)
 
 
 def get_details(replay):
@@ -231,6 +189,44 @@ def get_details(replay):
     }
 
 
+def fetch_replay_details(game_uuid):
+    """Fetch a finished game's replay and extract its record details.
+
+    Returns None while the replay is not available from TagPro yet.
+    """
+    replay_data = get_replay_data(game_uuid)
+    if not replay_data:
+        return None
+    return get_details(replay_data)
+
+
+def is_uploadable(replay_details):
+    """Return True for completed runs on maps which are in the spreadsheet."""
+    if not replay_details or replay_details.get("record_time") is None:
+        return False
+    spreadsheet_map_ids = set([m["map_id"] for m in get_maps()])
+    return replay_details["map_id"] in spreadsheet_map_ids
+
+
+def upload_replay_details(replay_details):
+    """Upload a single run to the world records site. Returns True on success."""
+    response = requests.post(
+        "https://worldrecords.bambitp.workers.dev/upload",
+        params={"password": "insertPW"},
+        headers={"Content-Type": "application/json"},
+        json=[replay_details],
+        timeout=30
+    )
+    if response.status_code != 200:
+        print(f"Failed to upload replay. Status: {response.status_code}, Response: {response.text}")
+        return False
+
+    print(f"Record: {replay_details['record_time']}ms by {replay_details['capping_player']} on {replay_details['map_name']}")
+    # only save UUID to file after successful upload
+    write_replay_uuid(replay_details["uuid"])
+    return True
+
+
 def write_replay_uuid(uuid):
     with open("replay_uuids.txt", "a") as f:
         f.write("\n" + uuid.strip())
@@ -0,0 +1,119 @@
+import json
+import random
+import time
+from collections import OrderedDict
+
+from utils import default_float
+from constants import (
+    REPLAY_STATS_PATH, ROTATION_RECENT_SIZE, ROTATION_MAX_REJECTIONS,
+    ROTATION_STATS_TTL, ROTATION_DEFAULT_FUN, MAP_POOL_CACHE_SIZE
+)
+
+
+class AliasTable:
+    """Vose's alias method: O(n) to build, O(1) per weighted sample."""
+
+    def __init__(self, weights):
+        n = len(weights)
+        total = sum(weights)
+        if total <= 0:
+            weights, total = [1.0] * n, float(n)
+        scaled = [w * n / total for w in weights]
+        self.prob = [1.0] * n
+        self.alias = list(range(n))
+
+        small = [i for i, p in enumerate(scaled) if p < 1.0]
+        large = [i for i, p in enumerate(scaled) if p >= 1.0]
+        while small and large:
+            s, l = small.pop(), large.pop()
+            self.prob[s] = scaled[s]
+            self.alias[s] = l
+            scaled[l] -= 1.0 - scaled[s]
+            (small if scaled[l] < 1.0 else large).append(l)
+
+    def sample(self):
+        i = random.randrange(len(self.prob))
+        return i if random.random() < self.prob[i] else self.alias[i]
+
+
+def load_completion_rates(replay_stats_path):
+    """Return map_id -> smoothed fraction of recorded games that were finished."""
+    try:
+        with open(replay_stats_path) as f:
+            stats = json.load(f)
+    except (FileNotFoundError, json.decoder.JSONDecodeError):
+        return {}
+
+    counts = {}
+    for entry in stats.values() if isinstance(stats, dict) else stats:
+        finished, total = counts.get(entry["map_id"], (0, 0))
+        counts[entry["map_id"]] = (finished + (entry.get("record_time") is not None), total + 1)
+    # Laplace smoothing so maps with a couple of games aren't zeroed out
+    return {map_id: (finished + 1) / (total + 2) for map_id, (finished, total) in counts.items()}
+
+
+class RotationScheduler:
+    """Picks the next preset from a legal pool.
+
+    Maps are weighted by fun rating times completion rate (from replay stats),
+    and presets in the recently-played LRU are skipped. Alias tables are built
+    once per legal pool, so each pick is O(1) regardless of catalog size.
+    """
+
+    def __init__(self, replay_stats_path=REPLAY_STATS_PATH, recent_size=ROTATION_RECENT_SIZE):
+        self.replay_stats_path = replay_stats_path
+        self.recent_size = recent_size
+        self.recent = OrderedDict()
+        self._tables = OrderedDict()
+        self._completion_rates = {}
+        self._stats_loaded_at = None
+
+    def _refresh_stats(self):
+        """Reload completion rates every ROTATION_STATS_TTL seconds."""
+        now = time.time()
+        if self._stats_loaded_at is not None and now - self._stats_loaded_at < ROTATION_STATS_TTL:
+            return
+        self._stats_loaded_at = now
+        rates = load_completion_rates(self.replay_stats_path)
+        if rates != self._completion_rates:
+            self._completion_rates = rates
+            self._tables.clear()
+
+    def weight(self, m):
+        """Sampling weight for a map."""
+        fun = default_float(m["fun"], ROTATION_DEFAULT_FUN)
+        return max(fun, 0.0) * self._completion_rates.get(m["map_id"], 0.5)
+
+    def _table_for(self, maps):
+        """Return the alias table for a legal pool, building it on first use.
+
+        Pools from MapPool are cached list objects, so identity is a cheap key.
+        """
+        entry = self._tables.get(id(maps))
+        if entry is not None and entry[0] is maps:
+            self._tables.move_to_end(id(maps))
+            return entry[1]
+        table = AliasTable([self.weight(m) for m in maps])
+        self._tables[id(maps)] = (maps, table)
+        if len(self._tables) > MAP_POOL_CACHE_SIZE:
+            self._tables.popitem(last=False)
+        return table
+
+    def pick(self, maps):
+        """Return a weighted-random preset from maps, avoiding recent ones."""
+        self._refresh_stats()
+        table = self._table_for(maps)
+        for _ in range(ROTATION_MAX_REJECTIONS):
+            preset = maps[table.sample()]["preset"]
+            if preset not in self.recent:
+                return preset
+        # Pool is (nearly) all recently played, take the least recent of a few candidates
+        candidates = {maps[table.sample()]["preset"] for _ in range(ROTATION_MAX_REJECTIONS)}
+        return min(candidates, key=lambda p: self.recent.get(p, 0))
+
+    def mark_played(self, preset):
+        """Remember that preset was just launched."""
+        self.recent[preset] = time.time()
+        self.recent.move_to_end(preset)
+        while len(self.recent) > self.recent_size:
+            self.recent.popitem(last=False)
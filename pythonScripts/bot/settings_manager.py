@@ -1,23 +1,26 @@
-import random
-from maps import get_maps, inject_map_id_into_preset
-from utils import get_legal_maps, save_settings, load_settings, default_float
+from maps import inject_map_id_into_preset
+from map_pool import map_pool
+from rotation import RotationScheduler
+from utils import save_settings, load_settings, default_float
 from constants import DEFAULT_MAP_SETTINGS, DEFAULT_LOBBY_SETTINGS, REGION_MAP
 
 
 class SettingsManager:
     """Manages bot settings and configuration."""
     
-    def __init__(self):
+    def __init__(self, settings_file='logs/bot_settings.json', lobby_settings=None):
+        self.settings_file = settings_file
         self.settings = self.load_saved_settings()
-        self.lobby_settings = dict(DEFAULT_LOBBY_SETTINGS)
+        self.lobby_settings = dict(DEFAULT_LOBBY_SETTINGS, **(lobby_settings or {}))
+        self.rotation = RotationScheduler()
 
     def load_saved_settings(self):
         """Load settings from file, fall back to defaults if file doesn't exist."""
-        return load_settings('logs/bot_settings.json', DEFAULT_MAP_SETTINGS)
+        return load_settings(self.settings_file, DEFAULT_MAP_SETTINGS)
 
     def save_current_settings(self):
         """Save current settings to file."""
-        return save_settings(self.settings, 'logs/bot_settings.json')
+        return save_settings(self.settings, self.settings_file)
 
     def reset_to_defaults(self):
         """Reset settings to default values."""
@@ -40,7 +43,7 @@ class SettingsManager:
         
         # Test if the new settings are valid
         try:
-            legal_maps = get_legal_maps(get_maps(), new_settings, 1)  # Test with 1 player
+            legal_maps = map_pool.get_legal_maps(new_settings, 1)  # Test with 1 player
         except Exception as e:
             return False, f"Error validating settings: {e}"
         
@@ -54,7 +57,7 @@ class SettingsManager:
 
     def get_legal_maps_for_players(self, num_ready_balls):
         """Get maps that are legal with current settings and player count."""
-        return get_legal_maps(get_maps(), self.settings, num_ready_balls)
+        return map_pool.get_legal_maps(self.settings, num_ready_balls)
 
     def get_random_preset(self, num_ready_balls):
         """Get a random preset that matches current settings."""
@@ -62,17 +65,17 @@ class SettingsManager:
         
         if not maps:
             # Try with default settings temporarily
-            temp_maps = get_legal_maps(get_maps(), DEFAULT_MAP_SETTINGS, num_ready_balls)
+            temp_maps = map_pool.get_legal_maps(DEFAULT_MAP_SETTINGS, num_ready_balls)
             if temp_maps:
                 # Use default settings temporarily but don't overwrite user settings
-                return random.choice([m["preset"] for m in temp_maps])
+                return self.rotation.pick(temp_maps)
             
             # If still no maps, fall back to defaults permanently
             self.settings = dict(DEFAULT_MAP_SETTINGS)
             self.save_current_settings()
             maps = self.get_legal_maps_for_players(num_ready_balls)
         
-        return random.choice([m["preset"] for m in maps])
+        return self.rotation.pick(maps)
 
     def handle_settings_command(self, msg):
         """Handle SETTINGS command from chat."""
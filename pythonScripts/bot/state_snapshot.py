@@ -0,0 +1,50 @@
+import json
+import os
+import time
+
+from constants import STATE_PATH, STATE_MAX_AGE
+
+
+class StateSnapshots:
+    """Compact on-disk snapshot of every group's TagproBot.export_state().
+
+    The file is rewritten atomically, and only when some group's state
+    changed, so saving every few ticks costs next to nothing. load() ignores
+    snapshots older than STATE_MAX_AGE: by then the group is long gone.
+    """
+
+    def __init__(self, path=STATE_PATH, max_age=STATE_MAX_AGE):
+        self.path = path
+        self.max_age = max_age
+        self._last_saved = None
+        self.saves = 0
+
+    def save(self, states):
+        """Persist {group name: state} if it differs from the last save. Returns True if written."""
+        body = json.dumps(states, separators=(",", ":"), sort_keys=True)
+        if body == self._last_saved:
+            return False
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        tmp = self.path + ".tmp"
+        with open(tmp, 'w') as f:
+            f.write(f'{{"saved_at":{time.time()},"groups":{body}}}')
+        os.replace(tmp, self.path)
+        self._last_saved = body
+        self.saves += 1
+        return True
+
+    def load(self):
+        """Return {group name: state} from a fresh snapshot, or {} if there is none."""
+        try:
+            with open(self.path, 'r') as f:
+                snapshot = json.load(f)
+        except FileNotFoundError:
+            return {}
+        except Exception as e:
+            print(f"Failed to load bot state: {e}")
+            return {}
+        age = time.time() - snapshot.get("saved_at", 0)
+        if age > self.max_age:
+            print(f"Ignoring bot state saved {age:.0f}s ago")
+            return {}
+        return snapshot.get("groups", {})
@@ -1,30 +1,58 @@
+import logging
 import time
 import random
-import requests
+import queue
+from collections import deque
 from selenium.webdriver.common.by import By
 from driver_adapter import DriverAdapter
 from settings_manager import SettingsManager
 from chat_handler import ChatHandler
-from utils import setup_logger, get_game_info
+from utils import setup_logger, get_game_info, get_record_announcement
 from constants import (
-    ROOM_NAME, GROUPS_URL, GAME_URL, GROUP_SETTINGS, PERIODIC_MESSAGES,
+    GROUPS, BASE_URL, GROUPS_URL, GAME_URL, GROUP_SETTINGS, PERIODIC_MESSAGES,
     FINDING_GAME_TIMEOUT, GAME_END_TIMEOUT, PERIODIC_MESSAGE_INTERVAL,
-    PRESET_LOAD_INTERVAL, LAUNCH_DELAY, GAME_STR_DELAY
+    PRESET_LOAD_INTERVAL, GAME_STR_DELAY, PRESET_APPLY_TIMEOUT, LAUNCH_ACK_TIMEOUT,
+    CHAT_PRIORITY_LOW, BOT_LOG_LEVEL, METRICS_COUNT_BUCKETS
 )
-from replay_manager import write_replay_uuid, get_replay_data, get_details
+from upload_queue import ReplayUploadQueue
+from wr_cache import RECORDS_UNKNOWN
+import metrics
 
 
 # Create event logger
 event_logger = setup_logger("events_logger", "events.txt")
+# Lobby diagnostics, only built when BOT_LOG_LEVEL is DEBUG
+bot_logger = setup_logger("bot_logger", "bot.txt", level=BOT_LOG_LEVEL)
+
+TICK_SECONDS = metrics.histogram("bot_tick_seconds", "Duration of one lobby loop tick, by group")
+TICK_WEBDRIVER_CALLS = metrics.histogram(
+    "bot_tick_webdriver_calls", "WebDriver accesses per lobby loop tick, by group", METRICS_COUNT_BUCKETS
+)
+GAMES_ENDED = metrics.counter("bot_games_ended_total", "Games the bot saw end, by group")
 
 
 class TagproBot:
     """Main TagPro bot class that manages the game lobby and coordinates all components."""
     
-    def __init__(self, adapter: DriverAdapter):
+    def __init__(self, adapter: DriverAdapter, upload_queue=None, group_config=None):
+        group_config = group_config or GROUPS[0]
+        self.name = group_config["name"]
+        self.room_name = group_config["room_name"]
+        self.group_settings = dict(GROUP_SETTINGS, groupName=self.room_name, regions=group_config["region"])
+
         self.adapter = adapter
-        self.settings_manager = SettingsManager()
+        self.settings_manager = SettingsManager(
+            group_config.get("settings_file", f"logs/bot_settings_{self.name}.json"),
+            {"region": group_config["region"]},
+        )
         self.chat_handler = ChatHandler(adapter, self.settings_manager, self)
+
+        # Replays are uploaded off the lobby loop by a background worker
+        self.upload_queue = upload_queue or ReplayUploadQueue()
+        self.upload_queue.add_listener(self.handle_replay_processed)
+        self.upload_queue.start()
+        # Chat lines produced off the main thread, sent on the next tick
+        self.announcements = queue.Queue()
         
         # Game state
         self.lobby_players = None
@@ -35,7 +63,20 @@ class TagproBot:
         self.game_is_active = False
         self.game_id_pending = False
         self.group_configured = False
+        # Set when restored state says the group was already configured, so
+        # rejoining it skips _configure_group
+        self.resume_configured = False
         self.joiner_started_at = None
+        self.game_str_due_at = None
+        self.launched_new = False
+
+        # Per-group counters, see stats()
+        self.metrics = {"ticks": 0, "tick_seconds": 0.0, "max_tick_seconds": 0.0, "launches": 0, "games_ended": 0}
+
+        # Launch latency: from red team filling up to the game starting
+        self.lobby_filled_at = None
+        self.launch_requested = False
+        self.launch_latencies = deque(maxlen=50)
 
         # Set up event handlers
         self.adapter.event_handlers["ws_chat"] = self.chat_handler.handle_chat
@@ -52,11 +93,11 @@ class TagproBot:
     def num_ready_balls(self):
         """Get number of ready players."""
         if self.lobby_players is None:
-            print(f"DEBUG: lobby_players is None")
+            bot_logger.debug("lobby_players is None")
             return 0
         # Use .get to avoid KeyError if snapshot is malformed or incomplete
         red_team_count = len(self.lobby_players.get("red-team", []))
-        print(f"DEBUG: num_ready_balls calculation: lobby_players={self.lobby_players}, red_team_count={red_team_count}")
+        bot_logger.debug("num_ready_balls calculation: lobby_players=%s, red_team_count=%s", self.lobby_players, red_team_count)
         return red_team_count
 
     @property
@@ -70,7 +111,7 @@ class TagproBot:
         """Ensure the browser is in the desired group."""
         current_url = self.adapter.driver.current_url
         
-        print(f"DEBUG: ensure_in_group called. Current URL: {current_url}, room_name: {room_name}")
+        bot_logger.debug(f"ensure_in_group called. Current URL: {current_url}, room_name: {room_name}")
 
         # If game ID is pending, don't navigate away from game page
         if self.game_id_pending and current_url == GAME_URL:
@@ -78,7 +119,7 @@ class TagproBot:
             return
 
         # Handle finding game state
-        if current_url == "https://tagpro.koalabeast.com/games/find":
+        if current_url == f"{BASE_URL}/games/find":
             if self.finding_game_start_time is None:
                 self.finding_game_start_time = time.time()
             
@@ -118,16 +159,16 @@ class TagproBot:
 
         # Handle group configuration
         else:
-            print(f"DEBUG: In group configuration section. group_configured = {self.group_configured}")
+            bot_logger.debug(f"In group configuration section. group_configured = {self.group_configured}")
             
             # Only configure once, since the server confirms settings are applied
             if not self.group_configured:
-                print("DEBUG: Calling _configure_group()")
+                bot_logger.debug("Calling _configure_group()")
                 self._configure_group()
                 self.group_configured = True
-                print("DEBUG: Set group_configured = True")
+                bot_logger.debug("Set group_configured = True")
             else:
-                print("DEBUG: Group already configured, skipping configuration")
+                bot_logger.debug("Group already configured, skipping configuration")
 
     def ensure_group_session(self):
         """Health check to ensure we are in a group; join or create if needed.
@@ -144,28 +185,28 @@ class TagproBot:
             
         # Do not navigate or reconfigure during joiner/game start phase
         if self.game_id_pending:
-            print("DEBUG: ensure_group_session: joiner active, skipping navigation")
+            bot_logger.debug("ensure_group_session: joiner active, skipping navigation")
             return
         
         # Joiner navigation lock: after launching, avoid forcing navigation for a grace period
         if self.joiner_started_at is not None:
             elapsed = time.time() - self.joiner_started_at
             if elapsed < 30:
-                print(f"DEBUG: ensure_group_session: joiner lock active ({elapsed:.1f}s), skipping navigation")
+                bot_logger.debug(f"ensure_group_session: joiner lock active ({elapsed:.1f}s), skipping navigation")
                 return
 
         if not current_url.startswith(GROUPS_URL):
             # Avoid navigating away from the game page if we happen to be there
             if current_url == GAME_URL:
-                print("DEBUG: ensure_group_session: on GAME_URL, not navigating to groups")
+                bot_logger.debug("ensure_group_session: on GAME_URL, not navigating to groups")
                 return
-            print(f"DEBUG: ensure_group_session: navigating to groups from {current_url}")
+            bot_logger.debug(f"ensure_group_session: navigating to groups from {current_url}")
             self.adapter.driver.get(GROUPS_URL)
             self.group_configured = False
             return
 
         # On groups page: try to join or create
-        if not self._try_join_group_by_name(ROOM_NAME):
+        if not self._try_join_group_by_name(self.room_name):
             self._create_group()
 
     def _try_join_group_by_name(self, room_name):
@@ -181,6 +222,10 @@ class TagproBot:
                     join_button = group.find_element(By.CSS_SELECTOR, "a.btn.btn-primary.pull-right")
                     join_button.click()
                     time.sleep(1)
+                    if self.resume_configured:
+                        event_logger.info(f"Rejoined {room_name}, keeping its restored configuration")
+                        self.group_configured = True
+                        self.resume_configured = False
                     self._post_join_or_create_setup()
                     return True
                 except Exception:
@@ -189,6 +234,8 @@ class TagproBot:
 
     def _create_group(self):
         """Create a new group and run setup."""
+        # a new group has none of the restored settings
+        self.resume_configured = False
         create_btns = self.adapter.find_elements("#create-group-btn")
         if create_btns:
             try:
@@ -235,7 +282,7 @@ class TagproBot:
             if "/login" not in current_url:
                 # Navigate to login page
                 event_logger.info("LOGIN_MODE: Navigating to login page")
-                self.adapter.driver.get("https://tagpro.koalabeast.com/login")
+                self.adapter.driver.get(f"{BASE_URL}/login")
                 return
             else:
                 # We're on login page - try to click Google login if available
@@ -452,12 +499,12 @@ class TagproBot:
         lobby_settings = self.settings_manager.get_lobby_settings()
         
         event_logger.info("Configuring group settings...")
-        print("DEBUG: Configuring group settings...")
+        bot_logger.debug("Configuring group settings...")
         
         # Set group name and basic settings
-        for setting_name, setting_value in GROUP_SETTINGS.items():
+        for setting_name, setting_value in self.group_settings.items():
             event_logger.info(f"Sending group setting: {setting_name} = {setting_value}")
-            print(f"DEBUG: Sending group setting: {setting_name} = {setting_value}")
+            bot_logger.debug(f"Sending group setting: {setting_name} = {setting_value}")
             self.adapter.send_ws_message(["setting", {"name": setting_name, "value": setting_value}])
         
         # Move bot to spectators
@@ -493,13 +540,18 @@ class TagproBot:
                     # Game has been without gameId for timeout period, end it
                     event_logger.info(f"End of game: {self.current_game_preset}")
                     
-                    # Process and upload replay if we have a UUID
+                    # Queue the replay for background upload if we have a UUID
                     if hasattr(self, 'current_game_uuid') and self.current_game_uuid:
-                        self._process_and_upload_replay(self.current_game_uuid)
+                        self.upload_queue.enqueue(self.current_game_uuid, source=self.name)
+                        self.current_game_uuid = None
+                    self.metrics["games_ended"] += 1
+                    GAMES_ENDED.inc(group=self.name)
                     
                     self.game_is_active = False
                     self.game_id_pending = False
                     self.adapter.send_chat_msg("GG. Loading next map. Please return to lobby.")
+                    # players still on red are waiting for the next launch
+                    self.lobby_filled_at = time.time() if self.num_ready_balls else None
                     delattr(self, 'game_end_timer_start')
         else:
             # Game has a gameId - game is now fully started
@@ -510,6 +562,14 @@ class TagproBot:
             if self.game_id_pending:
                 self.game_id_pending = False
                 event_logger.info(f"Game ID received: {event_details.get('gameId')}, joiner phase complete")
+                if self.lobby_filled_at is not None:
+                    latency = time.time() - self.lobby_filled_at
+                    self.launch_latencies.append(latency)
+                    self.lobby_filled_at = None
+                    event_logger.info(
+                        f"Launch latency: {latency:.1f}s "
+                        f"(avg {sum(self.launch_latencies) / len(self.launch_latencies):.1f}s over {len(self.launch_latencies)} launches)"
+                    )
                 # Reset current_preset to None since game has actually started
                 self.current_preset = None
                 
@@ -520,6 +580,23 @@ class TagproBot:
                 self.game_is_active = True
                 event_logger.info(f"Game activated with {self.num_ready_balls} ready players")
 
+    def handle_replay_processed(self, game_uuid, details, previous, source=None):
+        """Announce a run's result as soon as the upload worker processes it.
+
+        Called from the upload worker thread, so only queue the message here;
+        it is sent from the main loop. The queue may be shared by several
+        groups, so only announce games this group enqueued.
+        """
+        if source is not None and source != self.name:
+            return
+        if previous is RECORDS_UNKNOWN:
+            event_logger.info(f"Processed {game_uuid}: {details['record_time']}ms on {details['map_name']} (world records unknown)")
+            self.announcements.put(get_record_announcement(details, None, records_known=False))
+            return
+        is_wr = previous is None or details["record_time"] < previous["record_time"]
+        event_logger.info(f"Processed {game_uuid}: {details['record_time']}ms on {details['map_name']} (new WR: {is_wr})")
+        self.announcements.put(get_record_announcement(details, previous))
+
     def handle_team_change(self, lobby_snapshot=None):
         """Handle lobby/team changes and keep ready counts in sync.
 
@@ -563,11 +640,15 @@ class TagproBot:
         # Commit the new snapshot and log concise state
         self.lobby_players = lobby_players_current
         red_count = self.num_ready_balls
-        print(f"(Red) Ready balls: {red_count}")
-        print(f"Lobby Players: {self.lobby_players}")
-        print(
-            f"Game active: {self.game_is_active}, Ready players: {red_count}"
-        )
+        if red_count and self.lobby_filled_at is None and not self.game_is_active:
+            # launch right away instead of waiting for the next preset interval
+            self.lobby_filled_at = time.time()
+            self.launch_requested = True
+        elif not red_count:
+            self.lobby_filled_at = None
+        bot_logger.debug("(Red) Ready balls: %s", red_count)
+        bot_logger.debug("Lobby Players: %s", self.lobby_players)
+        bot_logger.debug("Game active: %s, Ready players: %s", self.game_is_active, red_count)
 
         # Only reset to default if no users AND we haven't set custom settings
         if self.num_in_lobby == 1:
@@ -584,11 +665,17 @@ class TagproBot:
         # Don't set current_preset to None immediately - keep it for potential re-launches
         self.game_id_pending = True  # Set pending state before launching
         self.joiner_started_at = time.time()
-        print(f"DEBUG: maybe_launch: preset={self.current_game_preset} ready_balls={self.num_ready_balls} url={self.adapter.driver.current_url}")
+        if bot_logger.isEnabledFor(logging.DEBUG):
+            bot_logger.debug(f"maybe_launch: preset={self.current_game_preset} ready_balls={self.num_ready_balls} url={self.adapter.driver.current_url}")
+        games_before = self.adapter.get_event_count("game")
         self.adapter.send_ws_message(["groupPlay"])
+        self.settings_manager.rotation.mark_played(self.current_game_preset)
+        self.metrics["launches"] += 1
         event_logger.info(f"Launched preset: {self.current_game_preset}")
         event_logger.info("Game ID pending - bot will stay in game during joiner phase")
-        time.sleep(LAUNCH_DELAY)
+        # Wait for the server to start the game rather than a fixed delay
+        if not self.adapter.wait_for_event("game", games_before, LAUNCH_ACK_TIMEOUT):
+            event_logger.info(f"No game event within {LAUNCH_ACK_TIMEOUT}s of groupPlay")
         return True
 
     def load_random_preset(self):
@@ -598,106 +685,155 @@ class TagproBot:
 
     def load_preset(self, preset):
         """Load a specific preset."""
+        settings_before = self.adapter.get_event_count("setting")
         self.adapter.send_ws_message(["groupPresetApply", preset])
         self.current_preset = preset
         event_logger.info(f"Set preset: {preset}")
-        # Give the preset time to apply
-        time.sleep(2)
-
-    def _process_and_upload_replay(self, game_uuid):
-        """Process a replay and upload it to the world records site."""
-        try:
-            event_logger.info(f"Processing replay for UUID: {game_uuid}")
-            
-            # Get replay data from TagPro
-            replay_data = get_replay_data(game_uuid)
-            if not replay_data:
-                event_logger.info(f"Failed to get replay data for UUID: {game_uuid}")
-                return
-            
-            # Extract world record details using existing function
-            replay_details = get_details(replay_data)
-            if not replay_details or replay_details.get("record_time") is None:
-                event_logger.info(f"No valid world record data for UUID: {game_uuid}")
-                return
-            
-            # Filter to only include maps in spreadsheet (same logic as replay_manager)
-            from maps import get_maps
-            spreadsheet_map_ids = set([m["map_id"] for m in get_maps()])
-            
-            if replay_details["map_id"] not in spreadsheet_map_ids:
-                event_logger.info(f"Map {replay_details['map_id']} not in spreadsheet, skipping upload")
-                return
-            
-            # Upload single replay to world records site
-            response = requests.post(
-                "https://worldrecords.bambitp.workers.dev/upload",
-                params={"password": "insertPW"},
-                headers={"Content-Type": "application/json"},
-                json=[replay_details],
-                timeout=30
-            )
-            
-            if response.status_code == 200:
-                event_logger.info(f"Successfully uploaded replay to world records site: {game_uuid}")
-                event_logger.info(f"Record: {replay_details['record_time']}ms by {replay_details['capping_player']} on {replay_details['map_name']}")
-                
-                # Only save UUID to file after successful upload
-                write_replay_uuid(game_uuid)
-                event_logger.info(f"Saved UUID to replay_uuids.txt: {game_uuid}")
-            else:
-                event_logger.info(f"Failed to upload replay. Status: {response.status_code}, Response: {response.text}")
-                
-        except Exception as e:
-            event_logger.info(f"Error processing replay {game_uuid}: {e}")
-            # Don't let replay processing errors crash the bot
+        # Wait for the server to echo the new settings back, or time out
+        # (e.g. re-applying the current preset changes nothing)
+        start = time.time()
+        confirmed = self.adapter.wait_for_event("setting", settings_before, PRESET_APPLY_TIMEOUT)
+        event_logger.info(f"Preset {'confirmed' if confirmed else 'unconfirmed'} after {time.time() - start:.2f}s")
+
+    def export_state(self):
+        """Return the lobby state worth keeping across a browser or process restart."""
+        return {
+            "current_preset": self.current_preset,
+            "current_game_preset": self.current_game_preset,
+            "current_game_uuid": self.current_game_uuid,
+            "game_is_active": self.game_is_active,
+            "game_id_pending": self.game_id_pending,
+            "group_configured": self.group_configured,
+            "authed_members": dict(self.chat_handler.authed_members),
+            "disallow_someballs": self.chat_handler.disallow_someballs,
+        }
+
+    def restore_state(self, state, page_reloaded=True):
+        """Apply a state from export_state.
+
+        With page_reloaded the browser tab is new, so the group has to be
+        joined again and the joiner phase starts over.
+        """
+        self.current_preset = state["current_preset"]
+        self.current_game_preset = state["current_game_preset"]
+        self.current_game_uuid = state["current_game_uuid"]
+        self.game_is_active = state["game_is_active"]
+        self.game_id_pending = state["game_id_pending"]
+        self.group_configured = state["group_configured"]
+        self.chat_handler.authed_members = dict(state["authed_members"])
+        self.chat_handler.disallow_someballs = state["disallow_someballs"]
+        if page_reloaded:
+            # the group keeps its settings while we're away, so rejoining it
+            # doesn't need to configure it again
+            self.resume_configured = state["group_configured"]
+            self.group_configured = False
+            self.game_id_pending = False
+            self.joiner_started_at = None
+            self.lobby_players = None
+
+    def resume(self, state):
+        """Pick up from a snapshot written before the process restarted.
+
+        A game that was running then has probably ended during the downtime
+        and nothing will report its end, so its replay is queued right away;
+        the upload queue keeps retrying until TagPro has the replay. A pending
+        launch only counts once its game page gave a UUID: the previous game's
+        UUID is cleared when that game ends.
+        """
+        self.restore_state(state)
+        if self.current_game_uuid and (self.game_is_active or state["game_id_pending"]):
+            event_logger.info(f"RESUME: queueing replay of interrupted game {self.current_game_uuid}")
+            self.upload_queue.enqueue(self.current_game_uuid, source=self.name)
+            self.current_game_uuid = None
+            self.game_is_active = False
+        event_logger.info(f"RESUME: {self.name} restored (preset={self.current_preset}, configured={self.resume_configured})")
+
+    def stats(self):
+        """Return this group's counters and queue figures."""
+        ticks = self.metrics["ticks"]
+        return {
+            "group": self.name,
+            "ticks": ticks,
+            "avg_tick_seconds": self.metrics["tick_seconds"] / ticks if ticks else None,
+            "max_tick_seconds": self.metrics["max_tick_seconds"],
+            "launches": self.metrics["launches"],
+            "games_ended": self.metrics["games_ended"],
+            "avg_launch_latency": sum(self.launch_latencies) / len(self.launch_latencies) if self.launch_latencies else None,
+            "chat_queue": self.adapter.chat_queue.stats(),
+            "chat_commands": self.chat_handler.router.stats(),
+            "ws_frames": self.adapter.get_ws_stats(),
+            "browser": self.adapter.get_browser_resources(),
+        }
 
     def run(self):
         """Main bot loop."""
         i = 1
-        launched_new = False
-        
         while True:
             time.sleep(1)
+            self.tick(i)
+            i += 1
 
-            self.adapter.process_ws_events()
+    def tick(self, i):
+        """Run one iteration of the lobby loop, called about once per second."""
+        start = time.time()
+        calls_before = self.adapter.webdriver_calls
 
-            if self.game_id_pending:
-                dbg = self.adapter.get_ws_debug_info()
-                print(f"DEBUG: joiner phase active. url={dbg['url']} on_groups={dbg['on_groups']} ws_ids={dbg['ws_ids']} readyState={dbg['last_ready_state']}")
+        self.adapter.process_ws_events()
 
-            # Health check: ensure we are in a specific group page; if not, navigate and join/create
-            self.ensure_group_session()
+        if self.game_id_pending and bot_logger.isEnabledFor(logging.DEBUG):
+            dbg = self.adapter.get_ws_debug_info()
+            bot_logger.debug(f"joiner phase active. url={dbg['url']} on_groups={dbg['on_groups']} ws_ids={dbg['ws_ids']} readyState={dbg['last_ready_state']}")
 
-            if launched_new:
-                print("LAUNCHED NEW")
-                time.sleep(GAME_STR_DELAY)
-                try:
-                    dbg = self.adapter.get_ws_debug_info()
-                    print(f"DEBUG: sending game_str. url={dbg['url']} on_groups={dbg['on_groups']} ws_ids={dbg['ws_ids']} readyState={dbg['last_ready_state']}")
-                    self.adapter.send_chat_msg(self.game_str)
-                except Exception as e:
-                    print("FAILED TO SEND CHAT MSG", e)
-                launched_new = False
-
-            # Send periodic messages
-            if i % PERIODIC_MESSAGE_INTERVAL == 0:
-                self.adapter.send_chat_msg(random.choice(PERIODIC_MESSAGES))
-
-            # Load random preset and maybe launch
-            if i % PRESET_LOAD_INTERVAL == 0 and not self.adapter.is_game_active() and self.num_in_lobby != 1:
-                event_logger.info(f"Attempting to load preset and launch: i={i}, is_game_active={self.adapter.is_game_active()}, num_in_lobby={self.num_in_lobby}")
-                print(f"DEBUG: Attempting to load preset and launch: i={i}, is_game_active={self.adapter.is_game_active()}, num_in_lobby={self.num_in_lobby}")
-                self.load_random_preset()
-                # Give time for preset to load before trying to launch
-                time.sleep(LAUNCH_DELAY)
-                # Try to launch if conditions are met
-                launched_new = self.maybe_launch()
-                if launched_new:
-                    print(f"DEBUG: Successfully launched game with preset: {self.current_game_preset}")
-                else:
-                    print(f"DEBUG: Failed to launch game. Conditions: is_game_active={self.adapter.is_game_active()}, num_ready_balls={self.num_ready_balls}, current_preset={self.current_preset}")
+        # Health check: ensure we are in a specific group page; if not, navigate and join/create
+        self.ensure_group_session()
 
-            # (Deprecated) Periodic ensure_in_group replaced by continuous health check
-            
-            i += 1
+        if self.launched_new:
+            print("LAUNCHED NEW")
+            self.game_str_due_at = time.time() + GAME_STR_DELAY
+            self.launched_new = False
+
+        if self.game_str_due_at is not None and time.time() >= self.game_str_due_at:
+            self.game_str_due_at = None
+            try:
+                if bot_logger.isEnabledFor(logging.DEBUG):
+                    dbg = self.adapter.get_ws_debug_info()
+                    bot_logger.debug(f"sending game_str. url={dbg['url']} on_groups={dbg['on_groups']} ws_ids={dbg['ws_ids']} readyState={dbg['last_ready_state']}")
+                self.adapter.send_chat_msg(self.game_str)
+            except Exception as e:
+                print("FAILED TO SEND CHAT MSG", e)
+
+        # Send record announcements from the upload worker
+        while not self.announcements.empty():
+            self.adapter.send_chat_msg(self.announcements.get_nowait())
+
+        # Send periodic messages, dropped if chat is backed up
+        if i % PERIODIC_MESSAGE_INTERVAL == 0:
+            self.adapter.send_chat_msg(random.choice(PERIODIC_MESSAGES), priority=CHAT_PRIORITY_LOW)
+            event_logger.info(f"Group stats: {self.stats()}")
+            event_logger.info(f"Upload queue: {self.upload_queue.stats()}")
+
+        # Send chat lines still waiting on pacing
+        self.adapter.flush_chat()
+
+        # Load random preset and maybe launch
+        if (i % PRESET_LOAD_INTERVAL == 0 or self.launch_requested) and not self.adapter.is_game_active() and self.num_in_lobby != 1:
+            self.launch_requested = False
+            event_logger.info(f"Attempting to load preset and launch: i={i}, num_in_lobby={self.num_in_lobby}")
+            bot_logger.debug("Attempting to load preset and launch: i=%s, num_in_lobby=%s", i, self.num_in_lobby)
+            # load_preset returns once the server has confirmed the preset
+            self.load_random_preset()
+            # Try to launch if conditions are met
+            self.launched_new = self.maybe_launch()
+            if self.launched_new:
+                bot_logger.debug(f"Successfully launched game with preset: {self.current_game_preset}")
+            elif bot_logger.isEnabledFor(logging.DEBUG):
+                bot_logger.debug(f"Failed to launch game. Conditions: is_game_active={self.adapter.is_game_active()}, num_ready_balls={self.num_ready_balls}, current_preset={self.current_preset}")
+
+        # (Deprecated) Periodic ensure_in_group replaced by continuous health check
+
+        elapsed = time.time() - start
+        self.metrics["ticks"] += 1
+        self.metrics["tick_seconds"] += elapsed
+        self.metrics["max_tick_seconds"] = max(self.metrics["max_tick_seconds"], elapsed)
+        TICK_SECONDS.observe(elapsed, group=self.name)
+        TICK_WEBDRIVER_CALLS.observe(self.adapter.webdriver_calls - calls_before, group=self.name)
@@ -21,6 +21,10 @@ def test_imports():
         )
         print("✓ constants.py imported successfully")
         
+        # Test metrics
+        import metrics
+        print("✓ metrics.py imported successfully")
+        
         # Test utils
         from utils import (
             setup_logger, time_since, timedelta_str, 
@@ -28,22 +32,70 @@ def test_imports():
         )
         print("✓ utils.py imported successfully")
         
+        # Test chat queue
+        from chat_queue import ChatQueue
+        print("✓ chat_queue.py imported successfully")
+        
         # Test driver adapter
         from driver_adapter import DriverAdapter
         print("✓ driver_adapter.py imported successfully")
         
+        # Test legal map pools
+        from map_pool import MapPool, map_pool
+        print("✓ map_pool.py imported successfully")
+        
+        # Test rotation scheduler
+        from rotation import RotationScheduler
+        print("✓ rotation.py imported successfully")
+        
         # Test settings manager
         from settings_manager import SettingsManager
         print("✓ settings_manager.py imported successfully")
         
+        # Test command router
+        from command_router import CommandRouter
+        print("✓ command_router.py imported successfully")
+        
         # Test chat handler
         from chat_handler import ChatHandler
         print("✓ chat_handler.py imported successfully")
         
+        # Test world record cache
+        from wr_cache import WorldRecordCache
+        print("✓ wr_cache.py imported successfully")
+        
+        # Test replay upload queue
+        from upload_queue import ReplayUploadQueue
+        print("✓ upload_queue.py imported successfully")
+        
         # Test main bot
         from tagpro_bot import TagproBot
         print("✓ tagpro_bot.py imported successfully")
         
+        # Test recorder
+        from ws_recorder import WsRecorder, load_recording
+        print("✓ ws_recorder.py imported successfully")
+        
+        # Test browser watchdog
+        from browser_watchdog import BrowserWatchdog
+        print("✓ browser_watchdog.py imported successfully")
+        
+        # Test state snapshots
+        from state_snapshot import StateSnapshots
+        print("✓ state_snapshot.py imported successfully")
+        
+        # Test group orchestrator
+        from group_orchestrator import GroupOrchestrator
+        print("✓ group_orchestrator.py imported successfully")
+        
+        # Test replay adapter
+        from replay_adapter import ReplayAdapter, replay_recording
+        print("✓ replay_adapter.py imported successfully")
+        
+        # Test local groups server
+        from local_groups_server import LocalGroupsServer
+        print("✓ local_groups_server.py imported successfully")
+        
         # Test main
         from main import main
         print("✓ main.py imported successfully")
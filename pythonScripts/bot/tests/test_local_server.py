@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Test the local groups server's WebSocket protocol without a browser.
+"""
+
+import sys
+import os
+import asyncio
+import base64
+import json
+import struct
+
+# Add the parent directory to the path so we can import bot modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from local_groups_server import LocalGroupsServer, WebSocket
+
+
+async def http_get(port, path, headers=""):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(f"GET {path} HTTP/1.1\r\nHost: localhost\r\n{headers}\r\n".encode())
+    response = await reader.read()
+    writer.close()
+    return response.decode()
+
+
+async def open_socket(port):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    key = base64.b64encode(os.urandom(16)).decode()
+    writer.write((
+        "GET /socket.io/?EIO=4&transport=websocket HTTP/1.1\r\nHost: localhost\r\n"
+        f"Upgrade: websocket\r\nConnection: Upgrade\r\nSec-WebSocket-Key: {key}\r\n\r\n"
+    ).encode())
+    head = (await reader.readuntil(b"\r\n\r\n")).decode()
+    assert "101 Switching Protocols" in head and WebSocket.accept_key(key) in head, head
+    return reader, writer
+
+
+def send_masked(writer, text):
+    payload, mask = text.encode(), os.urandom(4)
+    writer.write(struct.pack("!BB", 0x81, 0x80 | len(payload)) + mask + bytes(b ^ mask[i % 4] for i, b in enumerate(payload)))
+
+
+async def session(port):
+    redirect = await http_get(port, "/groups/create")
+    group_id = redirect.split("Location: /groups/")[1].split("\r\n")[0]
+    assert 'id="red-team"' in await http_get(port, f"/groups/{group_id}")
+
+    reader, writer = await open_socket(port)
+    client = WebSocket(reader, writer)
+    assert (await client.recv()).startswith("0{")
+    send_masked(writer, f"40/groups/{group_id},")
+    assert (await client.recv()).startswith(f"40/groups/{group_id},")
+
+    events = []
+    async def read_events(n):
+        for _ in range(n):
+            message = await client.recv()
+            events.append(json.loads(message[message.index(",") + 1:]))
+
+    await read_events(3)  # you, member (self, snapshot), member (broadcast)
+    assert events[0][0] == "you"
+    send_masked(writer, f'42/groups/{group_id},["setting",{{"name":"groupName","value":"Test lobby"}}]')
+    await read_events(2)  # join chat, setting ack
+    assert ["setting", {"name": "groupName", "value": "Test lobby"}] in events, events
+    writer.close()
+    assert "Test lobby" in await http_get(port, "/groups/")
+
+
+async def game_pages(server, port):
+    first, second = server.create_group(), server.create_group()
+    first.game_uuid, second.game_uuid = "uuid-first", "uuid-second"
+    for group in (first, second):
+        page = await http_get(port, "/game", f"Referer: http://localhost:{port}/groups/{group.id}\r\n")
+        assert json.dumps({"gameUuid": group.game_uuid}) in page, page
+    assert "clientInfo: null" in await http_get(port, "/game")
+
+
+async def main(scenario):
+    server = LocalGroupsServer(players=0)
+    listener = await asyncio.start_server(server.handle_connection, "127.0.0.1", 0)
+    port = listener.sockets[0].getsockname()[1]
+    async with listener:
+        await scenario(server, port)
+
+
+def test_setting_is_acknowledged():
+    """A setting frame should be echoed back and rename the group."""
+    asyncio.run(main(lambda server, port: session(port)))
+    print("✓ local server acknowledges settings")
+
+
+def test_game_page_is_per_group():
+    """Each group's game page reports that group's game UUID."""
+    asyncio.run(main(game_pages))
+    print("✓ game page reports the referring group's game")
+
+
+if __name__ == "__main__":
+    test_setting_is_acknowledged()
+    test_game_page_is_per_group()
@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Test the Prometheus text output of the bot metrics.
+"""
+
+import sys
+import os
+
+# Add the parent directory to the path so we can import bot modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import metrics
+
+
+def test_histogram_buckets_are_cumulative():
+    """Bucket counts include everything at or below their bound."""
+    histogram = metrics.Histogram("tick_seconds", "Tick time", buckets=(0.1, 1))
+    for value in (0.05, 0.1, 0.5, 3):
+        histogram.observe(value, group="main")
+    lines = histogram.render()
+    assert 'tick_seconds_bucket{group="main",le="0.1"} 2' in lines, lines
+    assert 'tick_seconds_bucket{group="main",le="1"} 3' in lines, lines
+    assert 'tick_seconds_bucket{group="main",le="+Inf"} 4' in lines, lines
+    assert 'tick_seconds_count{group="main"} 4' in lines, lines
+    print("✓ histogram buckets are cumulative")
+
+
+def test_counter_labels():
+    """Counters keep one series per label set."""
+    counter = metrics.Counter("frames_total", "Frames")
+    counter.inc(event="chat")
+    counter.inc(2, event="chat")
+    counter.inc(event='we"ird')
+    lines = counter.render()
+    assert 'frames_total{event="chat"} 3' in lines, lines
+    assert 'frames_total{event="we\\"ird"} 1' in lines, lines
+    print("✓ counters keep one series per label set")
+
+
+def test_disabled_metrics_are_free():
+    """With metrics off, timed() must hand back the original function."""
+    def func():
+        return 42
+    assert metrics._NULL.timed(func) is func
+    with metrics._NULL.time():
+        pass
+    print("✓ disabled metrics are no-ops")
+
+
+if __name__ == "__main__":
+    test_histogram_buckets_are_cumulative()
+    test_counter_labels()
+    test_disabled_metrics_are_free()
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Test game start/end detection by replaying a synthetic recording.
+"""
+
+import sys
+import os
+import gzip
+import json
+import tempfile
+
+# Add the parent directory to the path so we can import bot modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from replay_adapter import replay_recording
+from ws_recorder import load_recording
+
+
+def write_recording(path, records):
+    with gzip.open(path, "wt", encoding="utf-8") as f:
+        for record in records:
+            f.write(json.dumps(record) + "\n")
+
+
+def lobby(*red):
+    return {"red-team": [{"name": name, "location": "page"} for name in red], "blue-team": [], "spectators": [], "waiting": []}
+
+
+RECORDING = [
+    [0.0, "frames", {"0": [["you", "bot"], ["member", {"id": "p1", "name": "Some Ball 1"}]]}],
+    [0.1, "dom", {"lobby_players": lobby("Some Ball 1")}],
+    [5.0, "frames", {"0": [["game", {"gameId": "g1"}]]}],
+    [6.0, "dom", {"game_uuid": "uuid-1"}],
+    [60.0, "frames", {"0": [["game", {"gameId": None}]]}],
+    [63.0, "frames", {"0": [["game", {"gameId": None}]]}],
+]
+
+
+def test_replay_detects_game_start_and_end():
+    """A game with a gameId, then gameId None past GAME_END_TIMEOUT, is one game."""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "session.ndjson.gz")
+        write_recording(path, RECORDING)
+        summary = replay_recording(path)
+
+    assert summary["frames"] == 5, summary
+    assert summary["games"] == [{"started_at": 5.0, "ended_at": 63.0, "preset": None}], summary["games"]
+    assert summary["uploads"] == ["uuid-1"], summary["uploads"]
+    assert summary["handler_latency"]["game"]["count"] == 3
+    print("✓ replay detects game start and end")
+
+
+def test_truncated_recording_loads():
+    """A recording cut off mid-write should still load its complete lines."""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "session.ndjson.gz")
+        write_recording(path, RECORDING)
+        with open(path, "rb") as f:
+            data = f.read()
+        with open(path, "wb") as f:
+            f.write(data[:-12])
+        records = load_recording(path)
+    assert 0 < len(records) <= len(RECORDING)
+    print("✓ truncated recording loads")
+
+
+if __name__ == "__main__":
+    test_replay_detects_game_start_and_end()
+    test_truncated_recording_loads()
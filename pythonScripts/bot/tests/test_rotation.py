@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Test the weighted rotation scheduler used for preset selection.
+"""
+
+import sys
+import os
+import random
+from collections import Counter
+
+# Add the parent directory to the path so we can import bot modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import rotation as rotation_module
+from rotation import AliasTable, RotationScheduler
+
+
+def test_alias_table_matches_weights():
+    """Alias sampling should follow the given weights."""
+    random.seed(0)
+    table = AliasTable([1.0, 3.0, 0.0, 4.0])
+    counts = Counter(table.sample() for _ in range(80000))
+    assert counts[2] == 0
+    for index, weight in [(0, 1.0), (1, 3.0), (3, 4.0)]:
+        assert abs(counts[index] / 80000 - weight / 8.0) < 0.01, counts
+    print("✓ alias table sampling follows weights")
+
+
+class CyclingRandom:
+    """Stand-in for the random module that draws every index twice in a row, in order."""
+
+    def __init__(self):
+        self.draws = 0
+
+    def randrange(self, n):
+        self.draws += 1
+        return (self.draws // 2) % n
+
+    def random(self):
+        return 0.0
+
+
+def test_recently_played_presets_are_skipped():
+    """Presets in the recent LRU should not come straight back."""
+    maps = [{"preset": f"gZ{i}", "fun": "3", "map_id": str(i)} for i in range(10)]
+    rotation = RotationScheduler(replay_stats_path="does-not-exist.json", recent_size=5)
+    # every pick rejects the repeat of the last preset once, never reaching the fallback
+    stub = rotation_module.random = CyclingRandom()
+    try:
+        for _ in range(200):
+            preset = rotation.pick(maps)
+            assert preset not in rotation.recent
+            rotation.mark_played(preset)
+    finally:
+        rotation_module.random = random
+    assert len(rotation.recent) == 5
+    assert stub.draws > 200  # picks did reject recent presets
+    print("✓ recently played presets are skipped")
+
+
+def test_pool_of_recent_presets_still_picks():
+    """A pool made only of recent presets should still yield a preset."""
+    maps = [{"preset": "gZa", "fun": "3", "map_id": "1"}]
+    rotation = RotationScheduler(replay_stats_path="does-not-exist.json")
+    rotation.mark_played("gZa")
+    assert rotation.pick(maps) == "gZa"
+    print("✓ pool of recent presets still picks")
+
+
+if __name__ == "__main__":
+    test_alias_table_matches_weights()
+    test_recently_played_presets_are_skipped()
+    test_pool_of_recent_presets_still_picks()
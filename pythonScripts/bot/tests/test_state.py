@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Test bot state snapshots and resuming from them after a restart.
+"""
+
+import sys
+import os
+import json
+import tempfile
+import time
+
+# Add the parent directory to the path so we can import bot modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from replay_adapter import ReplayAdapter, UploadCollector, VirtualClock
+from state_snapshot import StateSnapshots
+from tagpro_bot import TagproBot
+from constants import GROUPS, GAME_END_TIMEOUT
+
+
+def make_bot():
+    clock = VirtualClock()
+    settings_file = os.path.join(tempfile.mkdtemp(), "bot_settings.json")
+    uploads = UploadCollector(clock)
+    bot = TagproBot(ReplayAdapter([], clock), upload_queue=uploads, group_config=dict(GROUPS[0], settings_file=settings_file))
+    return bot, uploads
+
+
+def test_snapshot_only_written_on_change():
+    """Unchanged state isn't rewritten and stale snapshots are ignored."""
+    path = os.path.join(tempfile.mkdtemp(), "bot_state.json")
+    snapshots = StateSnapshots(path)
+    assert snapshots.load() == {}
+    assert snapshots.save({"a": {"current_preset": "x"}})
+    assert not snapshots.save({"a": {"current_preset": "x"}})
+    assert StateSnapshots(path).load() == {"a": {"current_preset": "x"}}
+
+    with open(path) as f:
+        snapshot = json.load(f)
+    snapshot["saved_at"] -= 2 * snapshots.max_age
+    with open(path, "w") as f:
+        json.dump(snapshot, f)
+    assert StateSnapshots(path).load() == {}
+    print("✓ snapshots are written on change and expire")
+
+
+def test_resume_queues_interrupted_game():
+    """A game running at shutdown has its replay queued and isn't tracked anymore."""
+    before, _ = make_bot()
+    before.current_preset = "preset-1"
+    before.current_game_uuid = "uuid-1"
+    before.game_is_active = True
+    before.group_configured = True
+
+    bot, uploads = make_bot()
+    bot.resume(before.export_state())
+    assert [uuid for _, uuid in uploads.enqueued] == ["uuid-1"]
+    assert bot.current_preset == "preset-1"
+    assert bot.current_game_uuid is None and not bot.game_is_active
+    assert not bot.group_configured and bot.resume_configured
+    print("✓ interrupted game is queued on resume")
+
+
+def test_resume_skips_already_uploaded_game():
+    """A launch pending after a finished game doesn't queue that game again."""
+    before, uploads_before = make_bot()
+    before.current_game_uuid = "uuid-1"
+    before.game_is_active = True
+    before.game_end_timer_start = time.time() - GAME_END_TIMEOUT - 1
+    before.handle_game({"gameId": None})
+    assert [uuid for _, uuid in uploads_before.enqueued] == ["uuid-1"]
+    assert before.current_game_uuid is None
+    before.game_id_pending = True
+
+    bot, uploads = make_bot()
+    bot.resume(before.export_state())
+    assert uploads.enqueued == []
+    print("✓ finished game isn't queued again on resume")
+
+
+def test_idle_resume_queues_nothing():
+    """Without a game in flight resuming only restores the lobby state."""
+    before, _ = make_bot()
+    bot, uploads = make_bot()
+    bot.resume(before.export_state())
+    assert uploads.enqueued == []
+    assert not bot.resume_configured
+    print("✓ idle resume queues nothing")
+
+
+if __name__ == "__main__":
+    test_snapshot_only_written_on_change()
+    test_resume_queues_interrupted_game()
+    test_resume_skips_already_uploaded_game()
+    test_idle_resume_queues_nothing()
@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Test that the upload queue only counts replays it actually uploaded.
+"""
+
+import sys
+import os
+import tempfile
+
+# Add the parent directory to the path so we can import bot modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from upload_queue import ReplayUploadQueue
+
+
+def make_queue(uploads):
+    path = os.path.join(tempfile.mkdtemp(), "upload_queue.json")
+
+    def upload(details):
+        uploads.append(details["uuid"])
+        return True
+
+    return ReplayUploadQueue(path, fetch_func=lambda uuid: {"uuid": uuid, "record_time": None}, upload_func=upload)
+
+
+def test_unuploadable_replays_are_skipped():
+    """A replay without an uploadable run is retired without touching upload stats."""
+    uploads = []
+    queue = make_queue(uploads)
+    queue.enqueue("unfinished")
+    queue._attempt("unfinished")
+    stats = queue.stats()
+    assert uploads == [] and stats["depth"] == 0
+    assert stats["skipped"] == 1 and stats["uploaded"] == 0 and stats["last_latency"] is None
+    print("✓ unuploadable replays are skipped")
+
+
+def test_uploaded_replays_are_counted():
+    """An upload that succeeded counts and sets the latency."""
+    uploads = []
+    queue = make_queue(uploads)
+    queue.enqueue("run")
+    queue._items["run"]["details"] = {"uuid": "run", "record_time": 5000}
+    queue._attempt("run")
+    stats = queue.stats()
+    assert uploads == ["run"]
+    assert stats["uploaded"] == 1 and stats["skipped"] == 0 and stats["last_latency"] is not None
+    print("✓ uploaded replays are counted")
+
+
+if __name__ == "__main__":
+    test_unuploadable_replays_are_skipped()
+    test_uploaded_replays_are_counted()
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Test that the browser watchdog replaces a dead browser and hands state over.
+"""
+
+import sys
+import os
+
+# Add the parent directory to the path so we can import bot modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from browser_watchdog import BrowserWatchdog
+
+
+class FakeDriver:
+    def __init__(self, alive=True):
+        self.alive = alive
+        self.quit_called = False
+
+    def execute_cdp_cmd(self, cmd, params):
+        if not self.alive:
+            raise ConnectionError("chrome not reachable")
+        return {"product": "Chrome"}
+
+    def quit(self):
+        self.quit_called = True
+
+
+class FakeTabs:
+    pid = None
+
+    def __init__(self, alive=True):
+        self.driver = FakeDriver(alive)
+
+
+class FakeAdapter:
+    def __init__(self, tabs):
+        self.tabs = tabs
+        self.consecutive_ws_failures = 0
+        self.browsers_started = 0
+
+    def attach(self, tabs=None):
+        if tabs is None:
+            tabs = FakeTabs()
+            self.browsers_started += 1
+        self.tabs = tabs
+
+
+class FakeBot:
+    def __init__(self, name, adapter):
+        self.name = name
+        self.adapter = adapter
+        self.state = {"current_game_uuid": f"uuid-{name}"}
+        self.restored = None
+
+    def export_state(self):
+        return dict(self.state)
+
+    def restore_state(self, state):
+        self.restored = state
+
+
+def test_dead_browser_is_replaced():
+    """A failing heartbeat recycles once and every bot gets its state back."""
+    old = FakeTabs(alive=False)
+    bots = [FakeBot("a", FakeAdapter(old)), FakeBot("b", FakeAdapter(old))]
+    watchdog = BrowserWatchdog(bots, interval=1)
+
+    watchdog.tick(1)
+    assert old.driver.quit_called
+    assert bots[0].adapter.browsers_started == 1 and bots[1].adapter.browsers_started == 0
+    assert bots[0].adapter.tabs is bots[1].adapter.tabs is not old
+    assert [bot.restored["current_game_uuid"] for bot in bots] == ["uuid-a", "uuid-b"]
+    assert watchdog.stats()["recycles"] == 1 and watchdog.stats()["last_reason"] == "heartbeat"
+
+    watchdog.tick(2)
+    assert watchdog.stats()["recycles"] == 1
+    print("✓ dead browser is replaced with state handed over")
+
+
+def test_drain_failures_trigger_recycle():
+    """Too many failed WebSocket drains count as a dead session."""
+    tabs = FakeTabs()
+    bot = FakeBot("a", FakeAdapter(tabs))
+    bot.adapter.consecutive_ws_failures = 10
+    watchdog = BrowserWatchdog([bot], interval=1)
+    assert watchdog.check()[0] == "ws_failures"
+    print("✓ failed drains trigger a recycle")
+
+
+if __name__ == "__main__":
+    test_dead_browser_is_replaced()
+    test_drain_failures_trigger_recycle()
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Test that the world record cache only keeps our own unconfirmed records
+on top of the site's index.
+"""
+
+import sys
+import os
+from unittest import mock
+
+# Add the parent directory to the path so we can import bot modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import wr_cache
+from wr_cache import RECORDS_UNKNOWN, WorldRecordCache
+from utils import get_record_announcement
+
+
+class FakeResponse:
+    def __init__(self, entries):
+        self.entries = entries
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return list(self.entries)
+
+
+def serve(entries):
+    """Patch requests.get to answer with entries, for a with block."""
+    return mock.patch.object(wr_cache.requests, "get", lambda url, timeout=None: FakeResponse(entries))
+
+
+def run(uuid, map_id, record_time):
+    return {"uuid": uuid, "map_id": map_id, "record_time": record_time}
+
+
+def offline(url, timeout=None):
+    raise wr_cache.requests.RequestException("offline")
+
+
+def test_site_corrections_are_picked_up():
+    """A record the site drops leaves the cache on the next refresh."""
+    site = [run("a", "m1", 5000), run("b", "m2", 7000)]
+    with serve(site):
+        cache = WorldRecordCache(url="test")
+        assert cache.get("m1")["uuid"] == "a"
+
+        site.remove(site[0])
+        cache.refresh()
+        assert cache.get("m1") is None
+    print("✓ removed records leave the cache")
+
+
+def test_own_records_stay_until_confirmed():
+    """Our faster run is kept until the site has it, then the site's entry is used."""
+    site = [run("a", "m1", 5000)]
+    with serve(site):
+        cache = WorldRecordCache(url="test")
+        assert cache.record(run("ours", "m1", 4000))["uuid"] == "a"
+
+        cache.refresh()
+        assert cache.get("m1")["uuid"] == "ours"
+
+        site.append(run("ours", "m1", 4000))
+        cache.refresh()
+        assert cache._pending == {}
+        site[:] = [run("a", "m1", 5000)]
+        cache.refresh()
+        assert cache.get("m1")["uuid"] == "a"
+    print("✓ own records stay until confirmed")
+
+
+def test_unconfirmed_records_age_out():
+    """A run the site never picks up stops being overlaid after pending_max_age."""
+    with serve([run("a", "m1", 5000)]):
+        cache = WorldRecordCache(url="test", pending_max_age=-1)
+        cache.record(run("ours", "m1", 4000))
+        cache.refresh()
+        assert cache.get("m1")["uuid"] == "a"
+    print("✓ unconfirmed records age out")
+
+
+def test_no_records_is_unknown():
+    """Without the site or a local file no run is announced as a first record."""
+    with mock.patch.object(wr_cache.requests, "get", offline):
+        cache = WorldRecordCache(url="test", replay_stats_path="does-not-exist.json")
+        assert cache.get("m1") is None
+        ours = dict(run("ours", "m1", 4000), map_name="Map 1", capping_player="alice")
+        assert cache.record(ours) is RECORDS_UNKNOWN
+        assert "WORLD RECORD" not in get_record_announcement(ours, None, records_known=False)
+
+    # our run is laid over the first index that loads
+    with serve([run("a", "m1", 5000)]):
+        cache.refresh()
+        assert cache.get("m1")["uuid"] == "ours"
+    print("✓ missing records stay unknown")
+
+
+if __name__ == "__main__":
+    test_site_corrections_are_picked_up()
+    test_own_records_stay_until_confirmed()
+    test_unconfirmed_records_age_out()
+    test_no_records_is_unknown()
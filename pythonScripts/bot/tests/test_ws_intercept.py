@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Test the WebSocket intercept script and the event acks read through it.
+"""
+
+import sys
+import os
+import json
+
+# Add the parent directory to the path so we can import bot modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from constants import WS_EVENT_ALLOWLIST, WS_RING_CAPACITY
+from driver_adapter import DriverAdapter
+
+
+class FakeDriver:
+    def __init__(self, counts=()):
+        self.scripts = []
+        self.counts = list(counts)
+
+    def execute_cdp_cmd(self, cmd, params):
+        assert cmd == "Page.addScriptToEvaluateOnNewDocument"
+        self.scripts.append(params["source"])
+
+    def execute_script(self, script, *args):
+        # successive event counts, None for a failed read
+        count = self.counts.pop(0) if len(self.counts) > 1 else self.counts[0]
+        if count is None:
+            raise RuntimeError("page not reachable")
+        return count
+
+
+class FakeAdapter:
+    def __init__(self, counts=()):
+        self.driver = FakeDriver(counts)
+
+    def get_event_count(self, event_type):
+        return DriverAdapter.get_event_count(self, event_type)
+
+
+def test_intercept_script_is_filled_in():
+    """The allowlist and capacity are substituted and no placeholder is left."""
+    adapter = FakeAdapter()
+    DriverAdapter.inject_ws_intercept(adapter)
+    [script] = adapter.driver.scripts
+    assert "__WS_" not in script
+    assert f"const WS_ALLOWLIST = new Set({json.dumps(WS_EVENT_ALLOWLIST)});" in script
+    assert f"const WS_CAPACITY = {WS_RING_CAPACITY};" in script
+    assert "(ring.start + 1) % WS_CAPACITY" in script
+    print("✓ intercept script is filled in")
+
+
+def test_ack_needs_a_known_baseline():
+    """Without a baseline count the first count read isn't taken as the ack."""
+    assert DriverAdapter.wait_for_event(FakeAdapter([3, 4]), "game", 3, 0.5)
+    assert not DriverAdapter.wait_for_event(FakeAdapter([None, 3]), "game", None, 0.3)
+    assert DriverAdapter.wait_for_event(FakeAdapter([None, 3, 3, 4]), "game", None, 0.5)
+    assert not DriverAdapter.wait_for_event(FakeAdapter([None]), "game", None, 0.2)
+    print("✓ acks need a known baseline")
+
+
+if __name__ == "__main__":
+    test_intercept_script_is_filled_in()
+    test_ack_needs_a_known_baseline()
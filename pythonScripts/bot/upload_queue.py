@@ -0,0 +1,208 @@
+import json
+import logging
+import os
+import threading
+import time
+
+from constants import UPLOAD_QUEUE_PATH, UPLOAD_RETRY_BASE, UPLOAD_RETRY_MAX, UPLOAD_MAX_AGE
+from replay_manager import fetch_replay_details, is_uploadable, upload_replay_details, wr_cache
+import metrics
+
+
+event_logger = logging.getLogger("events_logger")
+
+UPLOAD_ATTEMPT_SECONDS = metrics.histogram("bot_upload_attempt_seconds", "Duration of one replay fetch/upload attempt")
+UPLOAD_LATENCY_SECONDS = metrics.histogram(
+    "bot_upload_latency_seconds", "Time from game end to a finished upload", (10, 30, 60, 120, 300, 600, 1800, 3600)
+)
+UPLOAD_RESULTS = metrics.counter("bot_upload_attempts_total", "Replay upload attempts, by result")
+UPLOAD_QUEUE_DEPTH = metrics.gauge("bot_upload_queue_depth", "Replays waiting to be uploaded")
+
+
+class ReplayUploadQueue:
+    """Durable on-disk queue of finished games whose replays still need uploading.
+
+    Game end only enqueues the UUID; a background worker thread fetches the
+    replay and uploads it, retrying with exponential backoff so lobby
+    management never waits on TagPro or the world records site.
+
+    Once a replay's details are extracted they are stored with the queue item,
+    so retries only repeat the upload. Listeners registered with
+    add_listener are called from the worker thread as
+    listener(game_uuid, details, previous_best, source) right after processing,
+    where source is whatever was passed to enqueue (e.g. the group name).
+    """
+
+    def __init__(self, path=UPLOAD_QUEUE_PATH, fetch_func=fetch_replay_details, upload_func=upload_replay_details):
+        self.path = path
+        self.fetch_func = fetch_func
+        self.upload_func = upload_func
+        self.listeners = []
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._items = self._load()
+
+        # Visibility counters
+        self.uploaded = 0
+        self.skipped = 0
+        self.dropped = 0
+        self.last_latency = None
+
+    def _load(self):
+        """Load pending items from disk, tolerating a missing or corrupt file."""
+        try:
+            with open(self.path, 'r') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except Exception as e:
+            print(f"Failed to load upload queue: {e}")
+            return {}
+
+    def _save(self):
+        """Atomically persist pending items. Caller must hold the lock."""
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        tmp = self.path + ".tmp"
+        with open(tmp, 'w') as f:
+            json.dump(self._items, f, indent=2)
+        os.replace(tmp, self.path)
+
+    def add_listener(self, listener):
+        """Register a callback for processed replays."""
+        self.listeners.append(listener)
+
+    def enqueue(self, game_uuid, source=None):
+        """Queue a game UUID for processing. Returns immediately."""
+        now = time.time()
+        with self._lock:
+            if game_uuid not in self._items:
+                self._items[game_uuid] = {"enqueued": now, "attempts": 0, "next_attempt": now, "source": source}
+                self._save()
+            depth = len(self._items)
+        UPLOAD_QUEUE_DEPTH.set(depth)
+        event_logger.info(f"UPLOAD_QUEUE: queued {game_uuid} (depth={depth})")
+        self._wakeup.set()
+
+    @property
+    def depth(self):
+        with self._lock:
+            return len(self._items)
+
+    def stats(self):
+        """Return queue depth and upload latency figures."""
+        now = time.time()
+        with self._lock:
+            oldest = min((item["enqueued"] for item in self._items.values()), default=None)
+            depth = len(self._items)
+        return {
+            "depth": depth,
+            "oldest_age": None if oldest is None else now - oldest,
+            "uploaded": self.uploaded,
+            "skipped": self.skipped,
+            "dropped": self.dropped,
+            "last_latency": self.last_latency,
+        }
+
+    def start(self):
+        """Start the worker thread if it is not already running."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._thread = threading.Thread(target=self._worker, name="replay-upload", daemon=True)
+        self._thread.start()
+
+    def _next_due(self):
+        """Return (uuid, seconds until due) for the item due soonest."""
+        with self._lock:
+            if not self._items:
+                return None, None
+            uuid, item = min(self._items.items(), key=lambda kv: kv[1]["next_attempt"])
+            return uuid, item["next_attempt"] - time.time()
+
+    def _worker(self):
+        while True:
+            uuid, wait = self._next_due()
+            if uuid is None or wait > 0:
+                self._wakeup.wait(timeout=wait)
+                self._wakeup.clear()
+                continue
+            self._attempt(uuid)
+
+    def _process(self, uuid):
+        """Extract details for uuid and notify listeners.
+
+        Returns the details, None to retry later, or False if the replay will
+        never be uploadable.
+        """
+        details = self.fetch_func(uuid)
+        if details is None:
+            return None
+        if not is_uploadable(details):
+            event_logger.info(f"UPLOAD_QUEUE: {uuid} has no uploadable record, skipping")
+            return False
+
+        # the only place runs enter the local best-time index: before the upload,
+        # so the announcement doesn't wait on the world records site
+        previous = wr_cache.record(details)
+        with self._lock:
+            source = self._items[uuid].get("source") if uuid in self._items else None
+        for listener in self.listeners:
+            try:
+                listener(uuid, details, previous, source)
+            except Exception as e:
+                event_logger.info(f"UPLOAD_QUEUE: listener error for {uuid}: {e}")
+
+        with self._lock:
+            if uuid in self._items:
+                self._items[uuid]["details"] = details
+                self._save()
+        return details
+
+    def _attempt(self, uuid):
+        """Run one upload attempt for uuid and reschedule or retire it."""
+        start = time.time()
+        with self._lock:
+            details = self._items[uuid].get("details")
+        try:
+            if details is None:
+                details = self._process(uuid)
+            skipped = details is False
+            done = skipped or (details is not None and self.upload_func(details))
+        except Exception as e:
+            event_logger.info(f"UPLOAD_QUEUE: error processing {uuid}: {e}")
+            skipped = done = False
+
+        now = time.time()
+        with self._lock:
+            item = self._items.get(uuid)
+            if item is None:
+                return
+            UPLOAD_ATTEMPT_SECONDS.observe(now - start)
+            if skipped:
+                # never uploadable, so it counts toward neither uploads nor their latency
+                self._items.pop(uuid)
+                self.skipped += 1
+                UPLOAD_RESULTS.inc(result="skipped")
+            elif done:
+                self._items.pop(uuid)
+                self.uploaded += 1
+                self.last_latency = now - item["enqueued"]
+                UPLOAD_RESULTS.inc(result="uploaded")
+                UPLOAD_LATENCY_SECONDS.observe(self.last_latency)
+                event_logger.info(
+                    f"UPLOAD_QUEUE: finished {uuid} in {now - start:.1f}s "
+                    f"(latency={self.last_latency:.1f}s, depth={len(self._items)})"
+                )
+            elif now - item["enqueued"] > UPLOAD_MAX_AGE:
+                self._items.pop(uuid)
+                self.dropped += 1
+                UPLOAD_RESULTS.inc(result="dropped")
+                event_logger.info(f"UPLOAD_QUEUE: giving up on {uuid} after {item['attempts'] + 1} attempts")
+            else:
+                item["attempts"] += 1
+                UPLOAD_RESULTS.inc(result="retry")
+                backoff = min(UPLOAD_RETRY_BASE * 2 ** (item["attempts"] - 1), UPLOAD_RETRY_MAX)
+                item["next_attempt"] = now + backoff
+                event_logger.info(f"UPLOAD_QUEUE: retrying {uuid} in {backoff}s (depth={len(self._items)})")
+            UPLOAD_QUEUE_DEPTH.set(len(self._items))
+            self._save()
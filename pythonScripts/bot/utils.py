@@ -1,33 +1,103 @@
+import atexit
 import datetime as dt
 import logging
 import json
 import os
-from rapidfuzz import fuzz
+import queue
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from rapidfuzz import fuzz, process
 from maps import get_maps
 from replay_manager import get_wr_entry
+from constants import LOG_MAX_BYTES, LOG_BACKUP_COUNT
+import metrics
 
 
-def setup_logger(name, filename):
-    """Set up a logger with file handler and formatter."""
+GAME_INFO_SECONDS = metrics.histogram("bot_get_game_info_seconds", "Time to build the MAP info message")
+
+
+class _DeferredQueueHandler(QueueHandler):
+    """QueueHandler that leaves formatting to the listener thread."""
+
+    def prepare(self, record):
+        return record
+
+
+class EventSampler(logging.Filter):
+    """Keep one in every N records per event type.
+
+    Records carry their type in `event_type` (pass it with extra=...).
+    sample_every maps a type to N; 0 suppresses the type entirely and types
+    not listed are always kept.
+    """
+
+    def __init__(self, sample_every):
+        super().__init__()
+        self.sample_every = sample_every
+        self.seen = {}
+        self.suppressed = 0
+
+    def filter(self, record):
+        event_type = getattr(record, "event_type", None)
+        every = self.sample_every.get(event_type)
+        if every is None or every == 1:
+            return True
+        count = self.seen.get(event_type, 0)
+        self.seen[event_type] = count + 1
+        if every and count % every == 0:
+            return True
+        self.suppressed += 1
+        return False
+
+
+_log_listeners = []
+
+
+def stop_log_listeners():
+    """Flush and stop every logging listener thread."""
+    while _log_listeners:
+        _log_listeners.pop().stop()
+
+
+atexit.register(stop_log_listeners)
+
+
+def setup_logger(name, filename, level=logging.INFO, sample_every=None):
+    """Set up a logger that writes to logs/<filename> and the console.
+
+    Records are handed to a queue and written by a listener thread, so the
+    caller never waits on file or console I/O. Files rotate at LOG_MAX_BYTES.
+    sample_every configures an EventSampler for per-event-type sampling.
+    """
     logger = logging.getLogger(name)
-    logger.setLevel(logging.INFO)
-    
+    logger.setLevel(level)
+    if logger.handlers:
+        # already set up by another module
+        return logger
+    logger.propagate = False
+
     # Create logs directory if it doesn't exist
-    import os
     os.makedirs('logs', exist_ok=True)
-    
+
     # Put log files in the logs directory
     log_path = os.path.join('logs', filename)
-    handler = logging.FileHandler(log_path)
+    handler = RotatingFileHandler(log_path, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUP_COUNT)
     formatter = logging.Formatter("%(asctime)s - %(levelname)s - %(message)s", "%Y-%m-%d %H:%M:%S")
     handler.setFormatter(formatter)
-    logger.addHandler(handler)
-    
+
     # Add console handler for real-time output
     console_handler = logging.StreamHandler()
     console_handler.setFormatter(formatter)
-    logger.addHandler(console_handler)
-    
+
+    if sample_every:
+        # filter on the logger so dropped records never reach the queue
+        logger.addFilter(EventSampler(sample_every))
+
+    log_queue = queue.SimpleQueue()
+    logger.addHandler(_DeferredQueueHandler(log_queue))
+    listener = QueueListener(log_queue, handler, console_handler)
+    listener.start()
+    _log_listeners.append(listener)
+
     return logger
 
 
@@ -59,6 +129,7 @@ def default_float(s, default=None):
         return default
 
 
+@GAME_INFO_SECONDS.timed
 def get_game_info(preset):
     """Get formatted game information string for a given preset."""
     if preset is None:
@@ -97,26 +168,42 @@ def get_game_info(preset):
     return "\n".join(msgs)
 
 
-def get_legal_maps(maps, settings, num_ready_balls):
-    """Filter maps based on settings and number of ready players."""
-    if settings["category"]:
-        maps = [m for m in maps if settings["category"].lower() in m["category"].lower()]
-    
-    if settings["difficulty"]:
-        low, high = float(settings["difficulty"][0] or 0.0), float(settings["difficulty"][1] or 100.0)
-        maps = [m for m in maps if low <= default_float(m["difficulty"], 10) <= high]
-    
-    minfun = default_float(settings["minfun"], 0.0)
-    maps = [m for m in maps if default_float(m["fun"], 100) >= minfun]
-    
-    maps = [m for m in maps if any(str(br) in m["balls_req"] for br in range((num_ready_balls or 1) + 1))]
-    
-    return maps
+def get_record_announcement(details, previous, records_known=True):
+    """Format the chat announcement for a just-processed run.
+
+    previous is the best entry for the map before this run, or None. Without
+    records_known there is nothing to compare against, so only the time is given.
+    """
+    run_time = timedelta_str(dt.timedelta(seconds=details['record_time'] / 1000))
+    if not records_known:
+        return f"Finished {details['map_name']} in {run_time}"
+    if previous is None:
+        return f"NEW WORLD RECORD! {details['capping_player']} set the first record on {details['map_name']}: {run_time}"
+
+    margin = timedelta_str(dt.timedelta(seconds=abs(details['record_time'] - previous['record_time']) / 1000))
+    if details['record_time'] < previous['record_time']:
+        return (
+            f"NEW WORLD RECORD! {details['capping_player']} capped {details['map_name']} in {run_time}, "
+            f"beating {previous['capping_player']}'s record by {margin}"
+        )
+    return f"Finished {details['map_name']} in {run_time}, {margin} off the WR held by {previous['capping_player']}"
+
+
+class InfoMessageIndex:
+    """Fuzzy lookup over a fixed list of info messages.
+
+    The messages are lowered once up front so each query is a single
+    process.extractOne call.
+    """
 
+    def __init__(self, messages):
+        self.messages = list(messages)
+        self._choices = [m.lower() for m in self.messages]
 
-def find_best_info_message(query, periodic_messages):
-    """Find the best matching info message for a given query."""
-    return max(periodic_messages, key=lambda s: fuzz.partial_ratio(query.lower(), s.lower()))
+    def best(self, query):
+        """Find the best matching info message for a given query."""
+        _, _, index = process.extractOne(query.lower(), self._choices, scorer=fuzz.partial_ratio, processor=None)
+        return self.messages[index]
 
 
 def save_settings(settings, filename='bot_settings.json'):
@@ -0,0 +1,157 @@
+import json
+import threading
+import time
+
+import requests
+
+from constants import WR_URL, WR_CACHE_TTL, WR_PENDING_MAX_AGE, REPLAY_STATS_PATH
+
+
+# returned by WorldRecordCache.record while neither the site nor the local file had records
+RECORDS_UNKNOWN = object()
+
+
+def index_best_records(entries):
+    """Index record entries by map_id, keeping only the fastest per map."""
+    best = {}
+    for entry in entries:
+        if not entry.get("record_time"):
+            continue
+        current = best.get(entry["map_id"])
+        if current is None or entry["record_time"] < current["record_time"]:
+            best[entry["map_id"]] = entry
+    return best
+
+
+def load_local_records(replay_stats_path):
+    """Load record entries from the local replay stats file."""
+    for _ in range(10):
+        try:
+            data = json.load(open(replay_stats_path))
+        except json.decoder.JSONDecodeError:
+            time.sleep(0.1)
+            continue
+        except FileNotFoundError:
+            return []
+        break
+    else:
+        return []
+
+    if isinstance(data, dict):
+        return list(data.values())
+    elif isinstance(data, list):
+        return data
+    raise TypeError("Unexpected data format in replay_stats.json")
+
+
+class WorldRecordCache:
+    """In-memory map_id -> best record index of the world records site.
+
+    The first lookup fetches synchronously. After that, lookups always answer
+    from memory; once the index is older than the TTL a background refresh is
+    started and the stale index keeps being served until it completes. If
+    neither the site nor the local stats file has records, the index stays
+    unknown (lookups return None, record() returns RECORDS_UNKNOWN) and the
+    fetch is retried after another TTL.
+
+    Records passed to record() are kept as pending until the site's index
+    contains them, has a run at least as fast, or pending_max_age passes;
+    only those are laid over a refreshed index, so a record the site removed
+    or corrected drops out of the cache on the next refresh.
+    """
+
+    def __init__(self, url=WR_URL, ttl=WR_CACHE_TTL, replay_stats_path=REPLAY_STATS_PATH,
+                 pending_max_age=WR_PENDING_MAX_AGE):
+        self.url = url
+        self.ttl = ttl
+        self.replay_stats_path = replay_stats_path
+        self.pending_max_age = pending_max_age
+        self._lock = threading.Lock()
+        self._best = None
+        self._pending = {}  # uuid -> (entry, recorded at)
+        self._fetched_at = 0.0
+        self._refreshing = False
+
+    def get(self, map_id):
+        """Return the fastest known record for map_id, or None."""
+        stale = time.time() - self._fetched_at > self.ttl
+        if self._best is None and stale:
+            self.refresh()
+        elif stale:
+            self._refresh_in_background()
+        best = self._best
+        return None if best is None else best.get(map_id)
+
+    def refresh(self):
+        """Fetch the full record list and rebuild the index."""
+        try:
+            response = requests.get(self.url, timeout=10)
+            response.raise_for_status()
+            entries = response.json()
+            best = index_best_records(entries)
+            print(f"Loaded world records for {len(best)} maps")
+        except (requests.RequestException, ValueError) as e:
+            print(f"Failed to fetch world records: {e}")
+            if self._best is not None:
+                # keep serving the stale index, try again after another TTL
+                self._fetched_at = time.time()
+                return
+            print(f"Falling back to local file: {self.replay_stats_path}")
+            entries = load_local_records(self.replay_stats_path)
+            best = index_best_records(entries)
+            if not best:
+                # an empty index would make every run look like a first record;
+                # stay unknown so the next lookup tries again
+                print("No local records either, world records unknown")
+                # retry after another TTL rather than on every lookup
+                self._fetched_at = time.time()
+                return
+
+        known = {entry.get("uuid") for entry in entries}
+        now = time.time()
+        with self._lock:
+            # keep records we uploaded ourselves that the site hasn't caught up with
+            for uuid, (entry, recorded_at) in list(self._pending.items()):
+                site = best.get(entry["map_id"])
+                if uuid in known or now - recorded_at > self.pending_max_age \
+                        or (site is not None and site["record_time"] <= entry["record_time"]):
+                    del self._pending[uuid]
+                    continue
+                best[entry["map_id"]] = entry
+            self._best = best
+            self._fetched_at = time.time()
+
+    def _refresh_in_background(self):
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+
+        def _run():
+            try:
+                self.refresh()
+            finally:
+                self._refreshing = False
+
+        threading.Thread(target=_run, name="wr-refresh", daemon=True).start()
+
+    def record(self, details):
+        """Fold a freshly processed run into the index.
+
+        Returns the previous best entry for the map (None if there was none),
+        or RECORDS_UNKNOWN if no record list could be loaded.
+        """
+        if details.get("record_time") is None:
+            return None
+        if self._best is None and time.time() - self._fetched_at > self.ttl:
+            self.refresh()
+        with self._lock:
+            if self._best is None:
+                # overlaid once a refresh succeeds, unless the site has it by then
+                self._pending[details["uuid"]] = (details, time.time())
+                return RECORDS_UNKNOWN
+            previous = self._best.get(details["map_id"])
+            if previous is None or details["record_time"] < previous["record_time"]:
+                self._best[details["map_id"]] = details
+                self._pending[details["uuid"]] = (details, time.time())
+            return previous
@@ -0,0 +1,67 @@
+import atexit
+import gzip
+import json
+import os
+import threading
+import time
+
+from constants import RECORDING_FLUSH_INTERVAL
+
+
+class WsRecorder:
+    """Records what a DriverAdapter sees into a gzip NDJSON file.
+
+    Each line is [seconds since start, kind, data] where kind is "frames"
+    (one process_ws_events drain, {ws_id: [frame, ...]}) or "dom" (a DOM read
+    such as {"lobby_players": {...}}). ReplayAdapter plays these files back.
+    """
+
+    def __init__(self, path):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self.path = path
+        self.started_at = time.time()
+        self.records = 0
+        self._lock = threading.Lock()
+        self._file = gzip.open(path, "wt", encoding="utf-8")
+        self._flushed_at = self.started_at
+        atexit.register(self.close)
+
+    def _write(self, kind, data):
+        now = time.time()
+        line = json.dumps([round(now - self.started_at, 3), kind, data], separators=(",", ":"))
+        with self._lock:
+            if self._file is None:
+                return
+            self._file.write(line + "\n")
+            self.records += 1
+            if now - self._flushed_at >= RECORDING_FLUSH_INTERVAL:
+                self._file.flush()
+                self._flushed_at = now
+
+    def record_frames(self, ws_messages):
+        """Record one drain of the page's WebSocket buffers."""
+        if any(ws_messages.values()):
+            self._write("frames", ws_messages)
+
+    def record_dom(self, name, value):
+        """Record the result of a DOM read, e.g. record_dom("game_active", True)."""
+        self._write("dom", {name: value})
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+def load_recording(path):
+    """Return the [t, kind, data] records of a recording, in order."""
+    records = []
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        try:
+            for line in f:
+                records.append(json.loads(line))
+        except (EOFError, json.decoder.JSONDecodeError):
+            # the tail of a recording that wasn't closed cleanly
+            pass
+    return records
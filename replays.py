@@ -30,12 +30,16 @@ async def process_unprocessed_replays(stats_path, unproc_path, replays_dir, maps
         unproc_path: Path to the unprocessed replays JSON file
         replays_dir: Directory where replay files are stored
         maps: List of map configurations from the spreadsheet
+
+    Returns:
+        Dictionary of the replays added to the stats file, keyed by UUID
     """
     stats = await jsonutil.read_json(stats_path)
     unproc = await jsonutil.read_json(unproc_path)
     # Get set of already downloaded replay UUIDs
     downloaded = {p.stem for p in replays_dir.iterdir() if p.is_file()}
     now = time.time()
+    new = {}
 
     for uuid, info in list(unproc.items()):
         first, last = info["first"], info["last"]
@@ -68,10 +72,12 @@ async def process_unprocessed_replays(stats_path, unproc_path, replays_dir, maps
         # Save replay data and update stats
         (replays_dir / f"{uuid}.json").write_text(json.dumps(replay))
         stats[uuid] = details
+        new[uuid] = details
         unproc.pop(uuid)
 
     await jsonutil.write_json(stats_path, stats)
     await jsonutil.write_json(unproc_path, unproc)
+    return new
 
 
 async def retrieve_replay_data(uuid: str) -> Optional[List[Any]]:
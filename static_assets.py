@@ -0,0 +1,300 @@
+"""
+Static file serving for the web service.
+
+Files under static/ are indexed once instead of being resolved and stat'ed on
+every request. Compressible files get gzip and (if the brotli package is
+installed) brotli variants written next to them, either at image build time
+(`python static_assets.py static`) or by precompress() at startup, and the
+smallest variant the client accepts is served. Content-hashed names such as
+maps.00e83aba.js are cached by browsers for a year; everything else is
+revalidated with its ETag. Small files are kept in memory.
+"""
+
+import gzip
+import mimetypes
+import os
+import re
+import sys
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Optional, Set, Tuple
+
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, Response
+
+try:
+    import brotli
+except ImportError:
+    # Without brotli only gzip variants are produced and served
+    brotli = None
+
+
+COMPRESSIBLE_SUFFIXES = {".html", ".js", ".css", ".json", ".ndjson", ".svg", ".txt", ".md"}
+MIN_COMPRESS_SIZE = 1024  # bytes; smaller files aren't worth a variant
+HASHED_NAME = re.compile(r"\.[0-9a-f]{8}\.[A-Za-z0-9]+$")  # e.g. style.89a2bd73.css
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE_CONTROL = "no-cache"
+MEMORY_CACHE_BYTES = 8 * 1024 * 1024  # total size of files kept in memory
+MEMORY_CACHE_MAX_FILE = 256 * 1024  # larger files are streamed from disk
+
+# content codings in order of preference, with the suffix of their variant file
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+
+def compress(data: bytes, encoding: str, fast: bool = False) -> bytes:
+    """Encode data with a content coding from ENCODINGS; fast trades size for speed."""
+    if encoding == "br":
+        return brotli.compress(data, quality=5 if fast else 11)
+    return gzip.compress(data, compresslevel=6 if fast else 9, mtime=0)
+
+
+def available_encodings() -> Tuple[Tuple[str, str], ...]:
+    """The (encoding, suffix) pairs this process can produce."""
+    return tuple((enc, suffix) for enc, suffix in ENCODINGS if enc != "br" or brotli is not None)
+
+
+def parse_accept_encoding(header: Optional[str]) -> Set[str]:
+    """
+    Return the content codings an Accept-Encoding header allows.
+
+    Codings with q=0 are excluded; "*" stands for any coding not listed.
+    """
+    accepted, refused = set(), set()
+    for part in (header or "").split(","):
+        coding, _, params = part.strip().partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        (accepted if q > 0 else refused).add(coding)
+    if "*" in accepted:
+        accepted |= {enc for enc, _ in ENCODINGS} - refused
+    return accepted
+
+
+def negotiate_encoding(accept_encoding: Optional[str], available) -> Optional[str]:
+    """The preferred coding in available that the client accepts, or None for identity."""
+    if not available:
+        return None
+    accepted = parse_accept_encoding(accept_encoding)
+    for encoding, _ in ENCODINGS:
+        if encoding in accepted and encoding in available:
+            return encoding
+    return None
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Whether an If-None-Match header matches etag (weak comparison)."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(","))
+
+
+def precompress(root: Path) -> int:
+    """
+    Write missing or outdated .gz/.br variants for every compressible file under root.
+
+    Variants that don't come out smaller than the original are skipped.
+
+    Returns:
+        Number of variant files written
+    """
+    written = 0
+    encodings = available_encodings()
+    for dirpath, _, filenames in os.walk(root):
+        for filename in filenames:
+            path = Path(dirpath) / filename
+            if path.suffix not in COMPRESSIBLE_SUFFIXES:
+                continue
+            stat = path.stat()
+            if stat.st_size < MIN_COMPRESS_SIZE:
+                continue
+            data = None
+            for encoding, suffix in encodings:
+                variant = path.with_name(path.name + suffix)
+                if variant.exists() and variant.stat().st_mtime_ns >= stat.st_mtime_ns:
+                    continue
+                if data is None:
+                    data = path.read_bytes()
+                compressed = compress(data, encoding)
+                if len(compressed) >= len(data):
+                    continue
+                tmp = variant.with_name(variant.name + ".tmp")
+                tmp.write_bytes(compressed)
+                os.replace(tmp, variant)
+                written += 1
+    return written
+
+
+def _is_variant(path: Path) -> bool:
+    """Whether path is a compressed variant of another file, or one being written."""
+    return path.suffix == ".tmp" or (path.suffix in (".gz", ".br") and path.with_suffix("").is_file())
+
+
+class _Asset:
+    """One static file and its precompressed variants."""
+
+    def __init__(self, path: Path, rel: str):
+        self.path = path
+        self.rel = rel
+        self.media_type = mimetypes.guess_type(path.name)[0] or "application/octet-stream"
+        self.immutable = HASHED_NAME.search(rel) is not None
+        self.cache_control = IMMUTABLE_CACHE_CONTROL if self.immutable else REVALIDATE_CACHE_CONTROL
+        self.compressible = path.suffix in COMPRESSIBLE_SUFFIXES
+        self.signature = None
+        self.etag = None
+        self.variants: Dict[str, Tuple[Path, int]] = {}
+
+    def refresh(self) -> bool:
+        """Re-stat the file if it can change; returns False if it is gone."""
+        if self.signature is not None and self.immutable:
+            return True
+        try:
+            stat = self.path.stat()
+        except FileNotFoundError:
+            return False
+        signature = (stat.st_mtime_ns, stat.st_size)
+        if signature == self.signature:
+            return True
+        self.signature = signature
+        self.etag = f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+        self.variants = {}
+        if self.compressible:
+            for encoding, suffix in available_encodings():
+                variant = self.path.with_name(self.path.name + suffix)
+                try:
+                    variant_stat = variant.stat()
+                except FileNotFoundError:
+                    continue
+                # a variant older than the file it was made from is stale
+                if variant_stat.st_mtime_ns >= stat.st_mtime_ns:
+                    self.variants[encoding] = (variant, variant_stat.st_size)
+        return True
+
+    def select(self, accept_encoding: Optional[str]) -> Tuple[Optional[str], Path, int]:
+        """Pick the variant to send: (content coding or None, file, size)."""
+        encoding = negotiate_encoding(accept_encoding, self.variants)
+        if encoding is not None:
+            return (encoding, *self.variants[encoding])
+        return None, self.path, self.signature[1]
+
+
+class StaticAssets:
+    """
+    Serves the files under root with compression, caching headers and ETags.
+
+    Call load() once at startup; files added later are picked up on first request.
+    """
+
+    def __init__(self, root: Path, memory_cache_bytes: int = MEMORY_CACHE_BYTES,
+                 memory_cache_max_file: int = MEMORY_CACHE_MAX_FILE):
+        self.root = Path(root).resolve()
+        self.memory_cache_bytes = memory_cache_bytes
+        self.memory_cache_max_file = memory_cache_max_file
+        self._assets: Dict[str, _Asset] = {}
+        self._memory: "OrderedDict[Tuple[Path, str], bytes]" = OrderedDict()
+        self._memory_size = 0
+
+    def load(self, compress: bool = True) -> None:
+        """Index every file under root, writing compressed variants first if compress."""
+        if compress:
+            try:
+                written = precompress(self.root)
+                if written:
+                    print(f"Precompressed {written} static file variants")
+            except OSError as e:
+                # e.g. a read-only static directory; serve what was built
+                print(f"Warning: Failed to precompress static files: {e}")
+        assets = {}
+        for dirpath, _, filenames in os.walk(self.root):
+            for filename in filenames:
+                path = Path(dirpath) / filename
+                if _is_variant(path):
+                    continue
+                rel = path.relative_to(self.root).as_posix()
+                asset = _Asset(path, rel)
+                if asset.refresh():
+                    assets[rel] = asset
+        self._assets = assets
+
+    def _lookup(self, rel: str) -> Optional[_Asset]:
+        asset = self._assets.get(rel)
+        if asset is None:
+            # not indexed yet: only accept real files inside root
+            path = (self.root / rel).resolve()
+            # variants are only served through their original, with Content-Encoding
+            if self.root not in path.parents or not path.is_file() or _is_variant(path):
+                return None
+            rel = path.relative_to(self.root).as_posix()
+            asset = self._assets.get(rel) or _Asset(path, rel)
+            self._assets[rel] = asset
+        if not asset.refresh():
+            self._assets.pop(rel, None)
+            return None
+        return asset
+
+    def _read_cached(self, path: Path, etag: str) -> bytes:
+        key = (path, etag)
+        data = self._memory.get(key)
+        if data is not None:
+            self._memory.move_to_end(key)
+            return data
+        data = path.read_bytes()
+        self._memory[key] = data
+        self._memory_size += len(data)
+        while self._memory_size > self.memory_cache_bytes:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_size -= len(evicted)
+        return data
+
+    def is_forbidden(self, rel: str) -> bool:
+        """Whether rel points outside root (e.g. "../main.py")."""
+        return rel not in self._assets and self.root not in (self.root / rel).resolve().parents
+
+    def response(self, rel: str, headers: Headers, retry: bool = True) -> Optional[Response]:
+        """
+        Build the response for the file at rel, or None if there is no such file.
+
+        Args:
+            rel: Path relative to root, as taken from the URL
+            headers: The request headers (Accept-Encoding, If-None-Match)
+            retry: Whether to index the file again if it turns out to be gone
+        """
+        asset = self._lookup(rel)
+        if asset is None:
+            return None
+        encoding, path, size = asset.select(headers.get("accept-encoding"))
+        etag = asset.etag if encoding is None else f'{asset.etag[:-1]}-{encoding}"'
+        response_headers = {"ETag": etag, "Cache-Control": asset.cache_control}
+        if asset.variants:
+            response_headers["Vary"] = "Accept-Encoding"
+        if etag_matches(headers.get("if-none-match"), etag):
+            return Response(status_code=304, headers=response_headers)
+        if encoding is not None:
+            response_headers["Content-Encoding"] = encoding
+        try:
+            if size <= self.memory_cache_max_file:
+                return Response(self._read_cached(path, etag), media_type=asset.media_type, headers=response_headers)
+            if not path.is_file():
+                raise FileNotFoundError(path)
+        except FileNotFoundError:
+            # immutable files aren't re-stat'ed, so a deletion is only noticed here;
+            # the next lookup finds the file gone or its remaining variants
+            self._assets.pop(asset.rel, None)
+            return self.response(rel, headers, retry=False) if retry else None
+        return FileResponse(path, media_type=asset.media_type, headers=response_headers)
+
+
+if __name__ == "__main__":
+    # Build step: python static_assets.py [static dir]
+    root = Path(sys.argv[1] if len(sys.argv) > 1 else Path(__file__).parent / "static")
+    print(f"Wrote {precompress(root)} compressed variants under {root}")
@@ -0,0 +1,259 @@
+"""
+In-memory view of replay_stats.json for the /stats family of endpoints.
+
+The store loads the stats file once and is told about every replay committed
+afterwards, bumping a generation counter each time. Responses are cached per
+normalized query, already serialized and compressed, and their ETag is derived
+from the generation, so a client that already has the current data gets a 304
+without the records being touched at all.
+"""
+
+import base64
+import binascii
+import bisect
+import json
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from starlette.datastructures import Headers
+from starlette.responses import Response, StreamingResponse
+
+import jsonutil
+from static_assets import MIN_COMPRESS_SIZE, available_encodings, compress, etag_matches, negotiate_encoding
+
+RESPONSE_CACHE_SIZE = 256  # distinct queries kept serialized
+STREAM_CHUNK_LINES = 200  # NDJSON lines per write when streaming
+
+# Orders records can be paged in, as sort keys that end with the replay UUID
+ORDERS = {
+    # newest first
+    "timestamp": lambda uuid, record: (-(record.get("timestamp") or 0), uuid),
+    # fastest first, unfinished runs last
+    "record_time": lambda uuid, record: (
+        record.get("record_time") is None, record.get("record_time") or 0, uuid
+    ),
+}
+# Element types of each order's sort key, to validate cursors against
+ORDER_KEY_TYPES = {
+    "timestamp": ((int, float), str),
+    "record_time": (bool, (int, float), str),
+}
+
+
+def encode_cursor(order: str, key: Tuple) -> str:
+    """Opaque cursor pointing just after the record with this sort key."""
+    return base64.urlsafe_b64encode(json.dumps([order, list(key)]).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[str, Tuple]:
+    """
+    Return (order, sort key) from encode_cursor.
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        order, key = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except (binascii.Error, UnicodeDecodeError, TypeError, ValueError):
+        raise ValueError("Invalid cursor")
+    if order not in ORDERS or not isinstance(key, list) or not _key_matches(key, ORDER_KEY_TYPES[order]):
+        raise ValueError("Invalid cursor")
+    return order, tuple(key)
+
+
+def _key_matches(key: List[Any], types: Tuple) -> bool:
+    # bool is an int subclass, so only accept it where a bool is expected
+    return len(key) == len(types) and all(
+        isinstance(value, expected) and (expected is bool or not isinstance(value, bool))
+        for value, expected in zip(key, types)
+    )
+
+
+def project(record: Dict[str, Any], fields: Optional[List[str]]) -> Dict[str, Any]:
+    """Only the given fields of a record, or all of them if fields is None."""
+    if fields is None:
+        return record
+    return {field: record[field] for field in fields if field in record}
+
+
+class SortedIndex:
+    """Sort keys of every record in one of ORDERS, kept sorted as replays arrive."""
+
+    def __init__(self, key_func: Callable[[str, Dict[str, Any]], Tuple]):
+        self.key_func = key_func
+        self.keys: List[Tuple] = []
+
+    def rebuild(self, records: Dict[str, Dict[str, Any]]) -> None:
+        self.keys = sorted(self.key_func(uuid, record) for uuid, record in records.items())
+
+    def add(self, uuid: str, record: Dict[str, Any]) -> None:
+        bisect.insort(self.keys, self.key_func(uuid, record))
+
+    def after(self, key: Optional[Tuple] = None) -> Iterator[Tuple]:
+        """Keys in order, starting after key."""
+        start = 0 if key is None else bisect.bisect_right(self.keys, key)
+        for i in range(start, len(self.keys)):
+            yield self.keys[i]
+
+
+class StatsStore:
+    """
+    The replay stats, keyed by replay UUID, plus a cache of serialized responses.
+
+    Every change goes through add() or commit(), which bump `generation`,
+    drop the cached responses and update the indexes registered with
+    add_index(). An index has rebuild(records) and add(uuid, record).
+    """
+
+    def __init__(self, path: Path, cache_size: int = RESPONSE_CACHE_SIZE):
+        self.path = path
+        self.cache_size = cache_size
+        self.records: Dict[str, Dict[str, Any]] = {}
+        # the epoch keeps ETags from a previous process from matching
+        self.epoch = int(time.time())
+        self.generation = 0
+        self._responses: "OrderedDict[Tuple, Dict[Optional[str], bytes]]" = OrderedDict()
+        self.indexes: List[Any] = []
+        self.orders = {name: self.add_index(SortedIndex(key_func)) for name, key_func in ORDERS.items()}
+
+    def add_index(self, index):
+        """Keep index up to date from now on; returns it."""
+        index.rebuild(self.records)
+        self.indexes.append(index)
+        return index
+
+    async def load(self) -> None:
+        """Read the stats file, replacing whatever was loaded before."""
+        self.records = await jsonutil.read_json(self.path)
+        for index in self.indexes:
+            index.rebuild(self.records)
+        self._changed()
+
+    def add(self, new: Dict[str, Dict[str, Any]]) -> None:
+        """Take in replays that were already written to the stats file."""
+        if not new:
+            return
+        replaced = any(uuid in self.records for uuid in new)
+        self.records.update(new)
+        for index in self.indexes:
+            if replaced:
+                # a reprocessed replay; indexes only know how to add
+                index.rebuild(self.records)
+            else:
+                for uuid, record in new.items():
+                    index.add(uuid, record)
+        self._changed()
+
+    async def commit(self, new: Dict[str, Dict[str, Any]]) -> None:
+        """Add replays and write the stats file."""
+        self.add(new)
+        await jsonutil.write_json(self.path, self.records)
+
+    def _changed(self) -> None:
+        self.generation += 1
+        self._responses.clear()
+
+    def page(self, order: str, predicate: Callable[[Dict[str, Any]], bool],
+             limit: Optional[int] = None, cursor: Optional[str] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        Records matching predicate in the given order, resuming after cursor.
+
+        Returns:
+            Up to limit records (all if None), and the cursor of the next page
+            or None if this was the last one
+
+        Raises:
+            ValueError: If the cursor is malformed or was made for another order
+        """
+        after = None
+        if cursor is not None:
+            cursor_order, after = decode_cursor(cursor)
+            if cursor_order != order:
+                raise ValueError(f"Cursor is for order={cursor_order}")
+        records, last = [], None
+        for key in self.orders[order].after(after):
+            record = self.records[key[-1]]
+            if not predicate(record):
+                continue
+            if limit is not None and len(records) == limit:
+                return records, encode_cursor(order, last)
+            records.append(record)
+            last = key
+        return records, None
+
+    def etag(self, encoding: Optional[str] = None, version: Optional[str] = None) -> str:
+        """
+        Strong ETag of the current generation, for one content coding.
+
+        Responses that change less often than the records can pass their own
+        version instead of the generation.
+        """
+        return f'"stats-{self.epoch:x}-{version or self.generation}-{encoding or "identity"}"'
+
+    def not_modified(self, headers: Headers, encoding: Optional[str] = None,
+                     version: Optional[str] = None) -> Optional[Response]:
+        """A 304 if the request's If-None-Match is the current ETag, else None."""
+        # small bodies are sent uncompressed, so the identity ETag is current too
+        for etag in {self.etag(encoding, version), self.etag(None, version)}:
+            if etag_matches(headers.get("if-none-match"), etag):
+                return Response(status_code=304, headers={"Cache-Control": "no-cache", "Vary": "Accept-Encoding", "ETag": etag})
+        return None
+
+    def stream(self, lines: Iterable[bytes], media_type: str = "application/x-ndjson",
+               extra_headers: Optional[Dict[str, str]] = None) -> Response:
+        """Stream lines uncached and uncompressed, with the current ETag; see not_modified()."""
+        return StreamingResponse(
+            _chunked(lines), media_type=media_type,
+            headers={"Cache-Control": "no-cache", "ETag": self.etag(), **(extra_headers or {})},
+        )
+
+    def cached_response(self, key: Tuple, build: Callable[[], Any], headers: Headers,
+                        media_type: str = "application/json", version: Optional[str] = None) -> Response:
+        """
+        Respond with the result of build(), reusing it until the next change.
+
+        Args:
+            key: Normalized query the result depends on (e.g. sorted non-default params)
+            build: Returns the JSON-serializable result or, for other media types, bytes
+            headers: The request headers (Accept-Encoding, If-None-Match)
+            media_type: Content type of the response
+            version: What the result depends on, if not the generation (see etag())
+        """
+        encoding = negotiate_encoding(headers.get("accept-encoding"), dict(available_encodings()))
+        not_modified = self.not_modified(headers, encoding, version)
+        if not_modified is not None:
+            return not_modified
+        response_headers = {"Cache-Control": "no-cache", "Vary": "Accept-Encoding"}
+
+        key = (key, version)
+        bodies = self._responses.get(key)
+        if bodies is None:
+            result = build()
+            body = result if isinstance(result, bytes) else json.dumps(result).encode()
+            bodies = self._responses[key] = {None: body}
+            while len(self._responses) > self.cache_size:
+                self._responses.popitem(last=False)
+        else:
+            self._responses.move_to_end(key)
+
+        if len(bodies[None]) < MIN_COMPRESS_SIZE:
+            encoding = None
+        if encoding not in bodies:
+            bodies[encoding] = compress(bodies[None], encoding, fast=True)
+        if encoding is not None:
+            response_headers["Content-Encoding"] = encoding
+        return Response(bodies[encoding], media_type=media_type, headers={**response_headers, "ETag": self.etag(encoding, version)})
+
+
+def _chunked(lines: Iterable[bytes], chunk_lines: int = STREAM_CHUNK_LINES) -> Iterator[bytes]:
+    """Group lines into larger writes."""
+    chunk = []
+    for line in lines:
+        chunk.append(line)
+        if len(chunk) == chunk_lines:
+            yield b"".join(chunk)
+            chunk = []
+    if chunk:
+        yield b"".join(chunk)
@@ -0,0 +1,48 @@
+"""
+Record builders shared by the web service tests.
+
+Importing this also puts the repository root on sys.path, so the test
+scripts can import the web service modules whether they are run directly
+or through pytest.
+"""
+
+import sys
+import os
+
+# Add the parent directory to the path so we can import the web service modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def player(name, user_id=None):
+    return {"name": name, "user_id": user_id}
+
+
+ALICE, BOB, CAROL, DAVE = player("alice", "u1"), player("bob", "u2"), player("carol", "u3"), player("dave", "u4")
+
+
+def run(uuid, map_name, record_time, timestamp=0, players=None, capper=ALICE, is_solo=None, map_id=None):
+    """A replay_stats.json record; players default to just the capper."""
+    players = [capper] if players is None else players
+    return {
+        "uuid": uuid, "map_id": map_id or f"id-{map_name}", "map_name": map_name,
+        "record_time": record_time, "timestamp": timestamp, "players": players,
+        "capping_player": capper["name"], "capping_player_user_id": capper["user_id"],
+        "capping_player_quote": None, "is_solo": len(players) == 1 if is_solo is None else is_solo,
+    }
+
+
+def ingest(index, runs):
+    """Add runs one by one the way StatsStore does; returns the records dict."""
+    records = {}
+    index.rebuild(records)
+    for record in runs:
+        records[record["uuid"]] = record
+        index.add(record["uuid"], record)
+    return records
+
+
+def rebuilt(index, runs):
+    """Rebuild index from all of runs at once; returns the records dict."""
+    records = {record["uuid"]: record for record in runs}
+    index.rebuild(records)
+    return records
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Test that the incrementally kept per-map best runs match a rebuild from scratch.
+"""
+
+from pathlib import Path
+
+from builders import BOB, ingest, player, rebuilt, run
+from best_records import BestRecords
+from stats_store import StatsStore
+
+CATALOG = [{"map_id": "id-A", "difficulty": 4, "balls_req": "2"}]
+RUNS = [
+    run("r1", "A", 5000),
+    run("r2", "A", 4000),
+    # ties r2, which stays ahead of it
+    run("r3", "A", 4000),
+    run("r4", "A", 6000),
+    # beats r2 for the record
+    run("r5", "A", 3500, capper=BOB),
+    # a Some Ball record
+    run("r6", "B", 3000, capper=player("Some Ball 3")),
+    run("r7", "B", None),
+]
+
+
+def test_incremental_matches_rebuild():
+    """Adding runs one by one gives the same table as rebuilding from all of them."""
+    incremental, full = BestRecords(), BestRecords()
+    for index in (incremental, full):
+        index.set_catalog(CATALOG)
+    ingest(incremental, RUNS)
+    rebuilt(full, RUNS)
+    assert incremental.snapshot() == full.snapshot()
+
+    a, b = full.snapshot()
+    assert a["record"]["uuid"] == "r5" and a["record"]["capping_player"] == "bob"
+    assert [medal["uuid"] for medal in a["medals"]] == ["r5", "r2", "r3"]
+    assert (a["difficulty"], a["balls_req"]) == (4, "2")
+    assert b["record"]["capping_player"] == "Some Ball 3" and b["difficulty"] is None
+    print("✓ incremental best records match a rebuild")
+
+
+def test_slower_runs_keep_the_version():
+    """A run outside the top runs doesn't invalidate the snapshot."""
+    records = BestRecords()
+    ingest(records, RUNS)
+    version = records.version
+    records.add("r8", run("r8", "A", 4000))
+    assert records.version == version
+    print("✓ slower runs keep the version")
+
+
+def test_reprocessed_record_is_replaced():
+    """A replay processed again with a slower time no longer holds the record."""
+    store = StatsStore(Path("unused.json"))
+    records = store.add_index(BestRecords())
+    store.add({record["uuid"]: record for record in RUNS})
+    store.add({"r5": run("r5", "A", 4500, capper=BOB)})
+    a, _ = records.snapshot()
+    assert a["record"]["uuid"] == "r2"
+    assert [(medal["uuid"], medal["record_time"]) for medal in a["medals"]] == [("r2", 4000), ("r3", 4000), ("r5", 4500)]
+    print("✓ reprocessed records are replaced")
+
+
+if __name__ == "__main__":
+    test_incremental_matches_rebuild()
+    test_slower_runs_keep_the_version()
+    test_reprocessed_record_is_replaced()
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+Test that the incrementally kept leaderboards match a rebuild from scratch.
+"""
+
+from builders import ALICE, BOB, CAROL, DAVE, ingest, player, rebuilt, run
+from leaderboards import Leaderboards
+
+RUNS = [
+    run("r1", "A", 5000, players=[ALICE, BOB]),
+    # beats r1, so alice and bob lose their record
+    run("r2", "A", 4000, capper=CAROL),
+    # ties r2, which keeps the record
+    run("r3", "A", 4000, capper=DAVE),
+    # every Some Ball counts once, as "Some Balls"
+    run("r4", "B", 3000, players=[player("Some Ball 1"), player("some ball 2"), ALICE], capper=player("Some Ball 2")),
+    run("r5", "B", None, capper=BOB),
+]
+
+
+def scores(leaderboards):
+    return {
+        board: {entry["key"]: (entry["name"], entry["score"], entry["has_player_id"]) for entry in entries}
+        for board, entries in leaderboards.snapshot().items()
+    }
+
+
+def test_incremental_matches_rebuild():
+    """Adding runs one by one gives the same boards as rebuilding from all of them."""
+    incremental, full = Leaderboards(), Leaderboards()
+    ingest(incremental, RUNS)
+    rebuilt(full, RUNS)
+    assert scores(incremental) == scores(full)
+    print("✓ incremental leaderboards match a rebuild")
+
+
+def test_replaced_record_takes_its_points_back():
+    """The counts processLeaderboardData gives for the same runs."""
+    leaderboards = Leaderboards()
+    ingest(leaderboards, RUNS)
+    assert scores(leaderboards) == {
+        "world_records": {"u3": ("carol", 1, True), "Some Balls": ("Some Balls", 1, False), "u1": ("alice", 1, True)},
+        "solo_records": {"u3": ("carol", 1, True)},
+        "capping_records": {"u3": ("carol", 1, True), "Some Balls": ("Some Balls", 1, False)},
+        "games_completed": {
+            "u1": ("alice", 2, True), "u2": ("bob", 1, True), "u3": ("carol", 1, True),
+            "u4": ("dave", 1, True), "Some Balls": ("Some Balls", 1, False),
+        },
+    }
+    assert leaderboards.best["A"]["uuid"] == "r2" and leaderboards.best["B"]["uuid"] == "r4"
+    print("✓ replaced records take their points back")
+
+
+if __name__ == "__main__":
+    test_incremental_matches_rebuild()
+    test_replaced_record_takes_its_points_back()
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Test that the incrementally kept player index matches a rebuild from scratch.
+"""
+
+from pathlib import Path
+
+from builders import ALICE, BOB, ingest, player, rebuilt, run
+from leaderboards import Leaderboards
+from players import PlayerIndex
+from stats_store import StatsStore
+
+RUNS = [
+    run("r1", "A", 5000, 100, players=[ALICE, BOB]),
+    # alice's new personal best and the map's new record
+    run("r2", "A", 4000, 300),
+    # ties alice's best, which keeps r2
+    run("r3", "A", 4000, 200, players=[ALICE, BOB], capper=BOB),
+    # Some Balls have no user id and aren't indexed
+    run("r4", "B", 3000, 400, players=[player("Some Ball 1"), BOB], capper=player("Some Ball 1")),
+    run("r5", "B", None, 500),
+]
+
+
+def build():
+    incremental, full, leaderboards = PlayerIndex(), PlayerIndex(), Leaderboards()
+    ingest(incremental, RUNS)
+    records = rebuilt(full, RUNS)
+    rebuilt(leaderboards, RUNS)
+    return records, incremental, full, leaderboards
+
+
+def test_incremental_matches_rebuild():
+    """Adding runs one by one gives the same index as rebuilding from all of them."""
+    records, incremental, full, leaderboards = build()
+    assert (incremental.runs, incremental.capped, incremental.best) == (full.runs, full.capped, full.best)
+    assert set(full.runs) == {"u1", "u2"}
+    assert full.best["u1"] == {"A": (4000, "r2")}
+    assert full.best["u2"] == {"A": (4000, "r3"), "B": (3000, "r4")}
+    for user_id in full.runs:
+        assert incremental.profile(user_id, records, leaderboards) == full.profile(user_id, records, leaderboards)
+    print("✓ incremental player index matches a rebuild")
+
+
+def test_profile():
+    """A profile counts runs and caps, newest runs first."""
+    records, _, index, leaderboards = build()
+    profile = index.profile("u1", records, leaderboards, recent=2)
+    assert (profile["runs"], profile["caps"], profile["completed_maps"]) == (4, 3, 1)
+    assert [run["uuid"] for run in profile["recent"]] == ["r5", "r2"]
+    assert profile["world_records"] == 1 and profile["solo_records"] == 1
+    assert index.profile("u1", records, leaderboards, recent=0)["name"] == "alice"
+    assert index.profile("u3", records, leaderboards) is None
+    print("✓ profiles count runs and caps")
+
+
+def test_reprocessed_run_is_replaced():
+    """A replay processed again with other players moves to them, counted once."""
+    store = StatsStore(Path("unused.json"))
+    index = store.add_index(PlayerIndex())
+    store.add({record["uuid"]: record for record in RUNS})
+    store.add({"r2": run("r2", "A", 4500, 300, capper=BOB)})
+    assert index.best["u1"] == {"A": (4000, "r3")}
+    assert index.best["u2"]["A"] == (4000, "r3")
+    assert [uuid for _, uuid in index.runs["u1"]] == ["r5", "r3", "r1"]
+    assert index.capped["u2"].count("r2") == 1 and "r2" not in index.capped["u1"]
+    print("✓ reprocessed runs are replaced")
+
+
+if __name__ == "__main__":
+    test_incremental_matches_rebuild()
+    test_profile()
+    test_reprocessed_run_is_replaced()
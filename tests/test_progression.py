@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Test that the incrementally kept record progression matches a rebuild from scratch.
+"""
+
+from builders import ingest, player, rebuilt, run
+from progression import Progression
+
+RUNS = [
+    run("r1", "M1", 5000, 10),
+    run("r2", "M1", 4000, 20),
+    # slower than the record
+    run("r3", "M1", 4500, 30),
+    # ties the record, which keeps r2
+    run("r4", "M1", 4000, 40),
+    # a Some Ball record on another map
+    run("r5", "M2", 3000, 50, capper=player("Some Ball 2")),
+    run("r6", "M1", None, 60),
+    # backfilled: played between r1 and r2, and a record at the time
+    run("r7", "M1", 4200, 15),
+]
+
+
+def series(progression, map_id="id-M1"):
+    return [(entry["uuid"], entry["margin"]) for entry in progression.for_map(map_id)["progression"]]
+
+
+def test_incremental_matches_rebuild():
+    """Adding runs one by one, a backfilled one last, gives the same series as a rebuild."""
+    incremental, full = Progression(), Progression()
+    ingest(incremental, RUNS)
+    rebuilt(full, RUNS)
+    assert incremental.series == full.series
+    assert full.for_map("id-M2")["current"]["capping_player"] == "Some Ball 2"
+    assert full.for_map("missing") is None
+    print("✓ incremental progression matches a rebuild")
+
+
+def test_backfilled_runs_rewrite_the_series():
+    """An out-of-order run is placed by when it was played, and later margins follow."""
+    progression = Progression()
+    records = ingest(progression, RUNS[:4])
+    assert series(progression) == [("r1", None), ("r2", 1000)]
+
+    backfill = run("r7", "M1", 4200, 15)
+    records["r7"] = backfill
+    progression.add("r7", backfill)
+    assert series(progression) == [("r1", None), ("r7", 800), ("r2", 200)]
+
+    # older than every run so far: the new first record
+    first = run("r0", "M1", 6000, 5)
+    records["r0"] = first
+    progression.add("r0", first)
+    assert series(progression) == [("r0", None), ("r1", 1000), ("r7", 800), ("r2", 200)]
+    print("✓ backfilled runs rewrite the series")
+
+
+def test_versions_only_change_with_the_series():
+    """Runs that don't break the record leave the map's version alone."""
+    records = {}
+    progression = Progression()
+    progression.rebuild(records)
+    versions = []
+    for record in RUNS:
+        records[record["uuid"]] = record
+        progression.add(record["uuid"], record)
+        versions.append(progression.versions.get("id-M1", 0))
+    assert versions == [1, 2, 2, 2, 2, 2, 3]
+    print("✓ versions only change with the series")
+
+
+if __name__ == "__main__":
+    test_incremental_matches_rebuild()
+    test_backfilled_runs_rewrite_the_series()
+    test_versions_only_change_with_the_series()
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Test that static files are only served as what they are, and only while they exist.
+"""
+
+import tempfile
+from pathlib import Path
+from unittest import mock
+
+from starlette.datastructures import Headers
+
+import builders  # noqa: F401 (puts the web service modules on sys.path)
+from static_assets import StaticAssets
+
+GZIP = Headers({"accept-encoding": "gzip"})
+
+
+def make_assets(**kwargs):
+    root = Path(tempfile.mkdtemp())
+    (root / "maps.00e83aba.js").write_text("var maps = [];\n" * 200)
+    assets = StaticAssets(root, **kwargs)
+    assets.load()
+    return root, assets
+
+
+def test_variants_are_not_served_by_name():
+    """A .gz/.br variant or a .tmp file requested directly is not found."""
+    root, assets = make_assets()
+    assert (root / "maps.00e83aba.js.gz").is_file()
+    for name in ("maps.00e83aba.js.gz", "maps.00e83aba.js.br", "maps.00e83aba.js.gz.tmp"):
+        (root / name).write_bytes(b"variant")
+        assert assets.response(name, GZIP) is None, name
+    response = assets.response("maps.00e83aba.js", GZIP)
+    assert response.headers["content-encoding"] == "gzip"
+    print("✓ variants aren't served by name")
+
+
+def test_deleted_hashed_file_is_dropped():
+    """A hashed file deleted after indexing is a 404, streamed or from memory."""
+    for max_file in (0, 1024 * 1024):
+        root, assets = make_assets(memory_cache_max_file=max_file)
+        for path in root.glob("maps.00e83aba.js*"):
+            path.unlink()
+        assert assets.response("maps.00e83aba.js", GZIP) is None
+        assert "maps.00e83aba.js" not in assets._assets
+    print("✓ deleted hashed files are dropped")
+
+
+def test_missing_index_is_not_found():
+    """/ is a 404, not a 200 with null, when there is no index.html."""
+    from fastapi.testclient import TestClient
+    import main
+
+    _, assets = make_assets()
+    with mock.patch.object(main, "static_assets", assets):
+        response = TestClient(main.app).get("/")
+    assert response.status_code == 404
+    print("✓ missing index.html is a 404")
+
+
+if __name__ == "__main__":
+    test_variants_are_not_served_by_name()
+    test_deleted_hashed_file_is_dropped()
+    test_missing_index_is_not_found()
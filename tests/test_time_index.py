@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Test date-range queries over the day buckets and the windowed leaderboard.
+"""
+
+import time
+from unittest import mock
+
+from builders import BOB, CAROL, ingest, run
+from time_index import BUCKET_MS, TimeIndex
+
+DAY = 10 * BUCKET_MS  # start of the first bucket used
+HOUR = BUCKET_MS // 24
+RUNS = [
+    run("r1", "A", 3000, DAY + 1 * HOUR),
+    run("r2", "A", 4000, DAY + 20 * HOUR, capper=BOB),
+    run("r3", "A", 3500, DAY + BUCKET_MS + 2 * HOUR, capper=CAROL),
+    # exactly on the next bucket's first millisecond
+    run("r4", "B", 1000, DAY + BUCKET_MS),
+    run("r5", "B", None, DAY + 3 * HOUR),
+]
+
+
+def brute_force(since, until):
+    best = {}
+    for record in RUNS:
+        if record["record_time"] is None or not since <= record["timestamp"] < until:
+            continue
+        entry = (record["record_time"], record["timestamp"], record["uuid"])
+        best[record["map_name"]] = min(best.get(record["map_name"], entry), entry)
+    return best
+
+
+def test_window_splitting_buckets():
+    """Windows that cut through a day only see that day's runs inside them."""
+    index = TimeIndex()
+    ingest(index, RUNS)
+    # r1 is the day's best but before the window
+    assert index.best_between(DAY + 12 * HOUR, DAY + 2 * BUCKET_MS)["A"][2] == "r3"
+    # both ends inside a bucket
+    assert index.best_between(DAY + 12 * HOUR, DAY + BUCKET_MS + HOUR) == {
+        "A": (4000, DAY + 20 * HOUR, "r2"), "B": (1000, DAY + BUCKET_MS, "r4"),
+    }
+    for since in range(DAY - HOUR, DAY + 2 * BUCKET_MS, 5 * HOUR):
+        for until in range(since, DAY + 3 * BUCKET_MS, 7 * HOUR):
+            assert index.best_between(since, until) == brute_force(since, until), (since, until)
+            assert sorted(index.uuids(since, until)) == sorted(
+                r["uuid"] for r in RUNS if since <= r["timestamp"] < until
+            )
+    print("✓ windows splitting buckets match a brute force")
+
+
+def test_until_on_a_bucket_boundary():
+    """until is exclusive, also when it is the first millisecond of a bucket."""
+    index = TimeIndex()
+    ingest(index, RUNS)
+    assert "B" not in index.best_between(until=DAY + BUCKET_MS)
+    assert list(index.uuids(until=DAY + BUCKET_MS)) == ["r1", "r5", "r2"]
+    assert index.best_between(until=DAY + BUCKET_MS + 1)["B"][2] == "r4"
+    assert index.best_between(since=DAY + BUCKET_MS)["A"][2] == "r3"
+
+    board = index.window_leaderboard(until=DAY + BUCKET_MS)
+    assert [m["uuid"] for m in board["maps"]] == ["r1"]
+    assert [(e["key"], e["score"]) for e in board["world_records"]] == [("u1", 1)]
+    print("✓ until on a bucket boundary is exclusive")
+
+
+def test_period_etag_moves_with_the_window():
+    """A period window's ETag changes at midnight even without new replays."""
+    from fastapi.testclient import TestClient
+    import main
+
+    client = TestClient(main.app)
+    now = time.time()
+    with mock.patch.object(main.time, "time", lambda: now):
+        response = client.get("/leaderboards/window?period=week")
+        etag = response.headers["etag"]
+        assert client.get("/leaderboards/window?period=week", headers={"If-None-Match": etag}).status_code == 304
+    with mock.patch.object(main.time, "time", lambda: now + 86400):
+        response = client.get("/leaderboards/window?period=week", headers={"If-None-Match": etag})
+        assert response.status_code == 200 and response.headers["etag"] != etag
+    print("✓ period ETags move with the window")
+
+
+if __name__ == "__main__":
+    test_window_splitting_buckets()
+    test_until_on_a_bucket_boundary()
+    test_period_etag_moves_with_the_window()
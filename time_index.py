@@ -0,0 +1,123 @@
+"""
+Replays bucketed by UTC day of their timestamp, for date-range queries.
+
+Each bucket keeps its runs in timestamp order and the fastest finished run
+per map. A window's per-map bests are the merge of its whole buckets' bests,
+plus a scan of the runs in the (at most two) partially covered buckets, so
+weekly or monthly leaderboards never look at records outside the window.
+"""
+
+import bisect
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from leaderboards import new_entry, player_key
+
+BUCKET_MS = 86_400_000  # one day; record timestamps are in milliseconds
+PERIODS = {"week": 7, "month": 30}  # days, for the windowed leaderboard
+
+# Fields of a map's fastest run in a window
+WINDOW_RECORD_FIELDS = ("uuid", "map_id", "record_time", "timestamp", "capping_player", "capping_player_user_id")
+
+
+class _Bucket:
+    def __init__(self):
+        self.runs: List[Tuple[int, str]] = []  # (timestamp, uuid), sorted
+        self.best: Dict[str, Tuple[int, int, str]] = {}  # map name -> (record_time, timestamp, uuid)
+
+
+class TimeIndex:
+    """Per-day buckets of runs and per-map bests, as a StatsStore index."""
+
+    def __init__(self):
+        self.buckets: Dict[int, _Bucket] = {}
+        self.days: List[int] = []  # bucket keys, sorted
+        self.records: Dict[str, Dict[str, Any]] = {}
+
+    def rebuild(self, records: Dict[str, Dict[str, Any]]) -> None:
+        self.buckets, self.days, self.records = {}, [], records
+        for uuid, record in records.items():
+            self.add(uuid, record)
+
+    def add(self, uuid: str, record: Dict[str, Any]) -> None:
+        timestamp = record.get("timestamp") or 0
+        day = timestamp // BUCKET_MS
+        bucket = self.buckets.get(day)
+        if bucket is None:
+            bucket = self.buckets[day] = _Bucket()
+            bisect.insort(self.days, day)
+        bisect.insort(bucket.runs, (timestamp, uuid))
+        record_time = record.get("record_time")
+        if record_time is not None:
+            best = bucket.best.get(record["map_name"])
+            entry = (record_time, timestamp, uuid)
+            if best is None or entry < best:
+                bucket.best[record["map_name"]] = entry
+
+    def _days_between(self, since: Optional[int], until: Optional[int]) -> List[int]:
+        start = 0 if since is None else bisect.bisect_left(self.days, since // BUCKET_MS)
+        end = len(self.days) if until is None else bisect.bisect_right(self.days, (until - 1) // BUCKET_MS)
+        return self.days[start:end]
+
+    @staticmethod
+    def _covers(day: int, since: Optional[int], until: Optional[int]) -> bool:
+        """Whether the whole bucket lies inside [since, until)."""
+        return (since is None or day * BUCKET_MS >= since) and (until is None or (day + 1) * BUCKET_MS <= until)
+
+    def uuids(self, since: Optional[int] = None, until: Optional[int] = None) -> Iterator[str]:
+        """UUIDs of the runs with since <= timestamp < until, oldest first."""
+        for day in self._days_between(since, until):
+            runs = self.buckets[day].runs
+            if self._covers(day, since, until):
+                yield from (uuid for _, uuid in runs)
+                continue
+            start = 0 if since is None else bisect.bisect_left(runs, (since,))
+            end = len(runs) if until is None else bisect.bisect_left(runs, (until,))
+            yield from (uuid for _, uuid in runs[start:end])
+
+    def best_between(self, since: Optional[int] = None,
+                     until: Optional[int] = None) -> Dict[str, Tuple[int, int, str]]:
+        """Fastest finished run per map name within [since, until), as (record_time, timestamp, uuid)."""
+        best: Dict[str, Tuple[int, int, str]] = {}
+        for day in self._days_between(since, until):
+            bucket = self.buckets[day]
+            if self._covers(day, since, until):
+                candidates = bucket.best.items()
+            else:
+                candidates = []
+                for _, uuid in bucket.runs:
+                    record = self.records[uuid]
+                    timestamp = record.get("timestamp") or 0
+                    if record.get("record_time") is not None and (since is None or timestamp >= since) \
+                            and (until is None or timestamp < until):
+                        candidates.append((record["map_name"], (record["record_time"], timestamp, uuid)))
+            for map_name, entry in candidates:
+                current = best.get(map_name)
+                if current is None or entry < current:
+                    best[map_name] = entry
+        return best
+
+    def window_leaderboard(self, since: Optional[int] = None, until: Optional[int] = None) -> Dict[str, Any]:
+        """
+        The fastest run per map within the window, and a leaderboard of the
+        players in those runs, counted like the overall world records board.
+        """
+        best = self.best_between(since, until)
+        maps, board = [], {}
+        for map_name in sorted(best):
+            record = self.records[best[map_name][2]]
+            maps.append({"map_name": map_name, **{field: record.get(field) for field in WINDOW_RECORD_FIELDS}})
+            seen = set()
+            for player in record["players"]:
+                key = player_key(player)
+                if key in seen:
+                    continue
+                seen.add(key)
+                if key not in board:
+                    board[key] = new_entry(player)
+                board[key]["score"] += 1
+        return {
+            "since": since,
+            "until": until,
+            "maps": maps,
+            "world_records": sorted(({"key": key, **entry} for key, entry in board.items()), key=lambda e: -e["score"]),
+        }